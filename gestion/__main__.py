@@ -0,0 +1,9 @@
+# gestion/__main__.py
+"""
+Exécution du paquet: python -m gestion (voir gestion/cli.py)
+"""
+
+import sys
+from gestion.cli import main
+
+sys.exit(main())
@@ -0,0 +1,143 @@
+# gestion/app.py
+"""
+Application graphique (lancée par main.py)
+"""
+
+import tkinter as tk
+from tkinter import messagebox
+import sys
+import threading
+
+print("🚀 Démarrage de l'application...")
+
+try:
+    print("📦 Import des modules...")
+    from gestion.database.database_manager import DatabaseManager
+    print("✅ DatabaseManager importé")
+
+    from gestion.controllers.auth_controller import AuthController
+    print("✅ AuthController importé")
+
+    from gestion.views.login_view import LoginView
+    print("✅ LoginView importé")
+
+except Exception as e:
+    print(f"❌ Erreur d'import: {e}")
+    sys.exit(1)
+
+class MainApplication:
+    def __init__(self):
+        print("🔧 Initialisation de l'application...")
+        self.root = tk.Tk()
+        print("✅ Fenêtre principale créée")
+
+        self.root.withdraw()  # Cacher la fenêtre principale au début
+        print("👁️ Fenêtre principale cachée")
+
+        # Initialiser la base de données
+        self.init_database()
+
+        # Sauvegardes automatiques en arrière-plan
+        from gestion.database.backup_scheduler import BackupScheduler
+        self.backup_scheduler = BackupScheduler()
+        self.backup_scheduler.start()
+
+        # Entretien de la base pendant l'inactivité
+        from gestion.database.maintenance import MaintenanceService
+        self.maintenance = MaintenanceService(self.root)
+        self.maintenance.start()
+
+        # Démarrer avec l'écran de connexion
+        self.show_login()
+
+    def init_database(self):
+        print("🗄️ Initialisation de la base de données...")
+        try:
+            db_manager = DatabaseManager()
+            db_manager.create_tables()
+            db_manager.create_default_admin()
+            print("✅ Base de données initialisée avec succès")
+        except Exception as e:
+            print(f"❌ Erreur base de données: {e}")
+            messagebox.showerror("Erreur", f"Erreur lors de l'initialisation de la base de données: {str(e)}")
+            sys.exit(1)
+
+        # Tâches non indispensables à l'ouverture: en arrière-plan, leurs erreurs n'empêchent pas la caisse de démarrer
+        self.startup_jobs = threading.Thread(target=self.run_startup_jobs, name="startup-jobs", daemon=True)
+        self.startup_jobs.start()
+
+    def run_startup_jobs(self):
+        """Photographie du stock et archivage des mouvements anciens (thread d'arrière-plan, connexion dédiée)"""
+        from gestion.database.archive_manager import ArchiveManager
+        from gestion.models.product_model import ProductModel
+
+        db_manager = DatabaseManager()
+        try:
+            # Photographie quotidienne du stock (historique des quantités)
+            try:
+                if ProductModel(db_manager).take_stock_snapshot(only_if_missing_today=True):
+                    print("📸 Photographie du stock enregistrée")
+            except Exception as e:
+                print(f"⚠️ Photographie du stock non enregistrée: {e}")
+
+            # Déplacer les mouvements anciens vers les archives annuelles (repris au prochain démarrage en cas d'échec)
+            try:
+                ArchiveManager(db_manager).archive_old_movements()
+            except Exception as e:
+                print(f"⚠️ Archivage des mouvements interrompu: {e}")
+        finally:
+            db_manager.close()
+
+    def show_login(self):
+        print("🔐 Affichage de l'écran de connexion...")
+        try:
+            login_view = LoginView(self.root, self.on_login_success)
+            print("✅ Écran de connexion créé")
+        except Exception as e:
+            print(f"❌ Erreur création login: {e}")
+            messagebox.showerror("Erreur", f"Erreur lors de la création de l'interface de connexion: {str(e)}")
+
+    def on_login_success(self, user_data):
+        print(f"✅ Connexion réussie pour: {user_data['full_name']}")
+        try:
+            from gestion.views.main_view import MainView
+
+            # Fermer la fenêtre de connexion et afficher l'interface principale
+            for widget in self.root.winfo_children():
+                widget.destroy()
+
+            self.root.deiconify()  # Réafficher la fenêtre principale
+            main_view = MainView(self.root, user_data)
+            print("✅ Interface principale chargée")
+
+            # Catalogue et index de recherche préparés en arrière-plan: la première frappe n'attend pas
+            from gestion.models.product_model import ProductModel
+            ProductModel().start_catalog_warmup()
+
+            # Actualiser les vues lorsque d'autres postes modifient la base
+            from gestion.database.change_watcher import ChangeWatcher
+            self.change_watcher = ChangeWatcher(self.root)
+            self.change_watcher.start()
+        except Exception as e:
+            print(f"❌ Erreur interface principale: {e}")
+            messagebox.showerror("Erreur", f"Erreur lors du chargement de l'interface principale: {str(e)}")
+
+    def run(self):
+        print("🎯 Lancement de la boucle principale...")
+        self.root.mainloop()
+        self.maintenance.stop()
+        self.backup_scheduler.stop(timeout=5)
+        # Laisser l'archivage terminer l'année en cours (chaque année est une transaction)
+        self.startup_jobs.join(timeout=5)
+
+def main():
+    """Lance l'application graphique"""
+    try:
+        app = MainApplication()
+        app.run()
+    except Exception as e:
+        print(f"💥 Erreur critique: {e}")
+        import traceback
+        traceback.print_exc()
+        messagebox.showerror("Erreur critique", f"Erreur lors du lancement de l'application: {str(e)}")
+        sys.exit(1)
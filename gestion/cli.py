@@ -0,0 +1,357 @@
+# gestion/cli.py
+"""
+Ligne de commande sans interface graphique (tâches planifiées, serveur sans écran)
+
+Usage: python -m gestion <commande> [options]   (depuis le dossier de l'application)
+
+    report sales vendeurs stock alerts valuation --period 30d --format csv [--compression gzip]
+    import-csv produits.csv [--delimiter ;]
+    backup [--force]
+    vacuum [--pages N]
+    analyze [table ...]
+    cache [--clear]
+    benchmark [--period year] [--formats csv ndjson xlsx] [--rows 100000 1000000]
+              [--compression xz --levels 0 1 6] [--backup-presets 0 1 6]
+
+Aucun module tkinter n'est importé: seuls les modèles, contrôleurs et exporteurs sont chargés.
+"""
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+from datetime import date
+from gestion.config.config import config
+from gestion.utils.helpers import get_date_range_options
+
+# Période en ligne de commande -> libellé de get_date_range_options()
+PERIODS = {
+    'today': "Aujourd'hui",
+    'yesterday': "Hier",
+    '7d': "7 derniers jours",
+    '30d': "30 derniers jours",
+    'month': "Ce mois",
+    'last-month': "Mois dernier",
+    'year': "Cette année"
+}
+
+# Colonnes reconnues dans un fichier d'import de produits
+IMPORT_COLUMNS = ('name', 'category', 'purchase_price', 'selling_price', 'quantity', 'min_stock_level', 'sku', 'barcode')
+
+def resolve_period(args):
+    """Dates de début et de fin: --start/--end si fournies, sinon la période nommée"""
+    start_date, end_date = get_date_range_options()[PERIODS[args.period]]
+    if args.start:
+        start_date = date.fromisoformat(args.start)
+    if args.end:
+        end_date = date.fromisoformat(args.end)
+    if start_date > end_date:
+        raise ValueError("La date de début doit précéder la date de fin")
+    return start_date, end_date
+
+def init_database():
+    """Crée ou met à jour le schéma comme au démarrage de l'application"""
+    from gestion.database.database_manager import DatabaseManager
+    db = DatabaseManager()
+    try:
+        db.create_tables()
+        db.create_default_admin()
+    finally:
+        db.close()
+
+def command_report(args):
+    """Génère un ou plusieurs rapports (en parallèle s'il y en a plusieurs)"""
+    from gestion.utils.exporters import ReportBatch, ReportJob, run_report_job
+
+    db_path = os.path.abspath(config.DATABASE_PATH)
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Base de données introuvable: {db_path}")
+
+    period = resolve_period(args)
+    use_cache = False if args.no_cache else None
+    jobs = [ReportJob(report, args.format, period, compression=args.compression) for report in args.reports]
+    if len(jobs) == 1:
+        job = jobs[0]
+        try:
+            job.output, job.stats = run_report_job(job, db_path, use_cache)
+        except Exception as e:
+            job.error = str(e)
+        print_job(job)
+    else:
+        ReportBatch(jobs, db_path, args.workers, use_cache).run(lambda job, completed, total: print_job(job, completed, total))
+
+    return 1 if any(job.failed for job in jobs) else 0
+
+def print_job(job, completed=None, total=None):
+    """Affiche le résultat d'un rapport"""
+    counter = f"[{completed}/{total}] " if completed else ""
+    if job.failed:
+        print(f"❌ {counter}{job.report}: {job.error}")
+    else:
+        stats = job.stats
+        origin = ", repris du cache" if stats.get('cached') else f", {stats['seconds']} s"
+        print(f"✅ {counter}{job.output} ({stats['rows']} ligne(s){origin})")
+
+def command_import_csv(args):
+    """Importe des produits depuis un fichier CSV (une ligne par produit, en-têtes IMPORT_COLUMNS)"""
+    from gestion.controllers.category_controller import CategoryController
+    from gestion.controllers.product_controller import ProductController
+
+    init_database()
+    product_controller = ProductController()
+    category_controller = CategoryController()
+    categories = {row['name'].strip().lower(): row['categories_id'] for row in category_controller.get_all_categories()}
+
+    imported = 0
+    failed = 0
+    with open(args.file, newline='', encoding='utf-8-sig') as csvfile:
+        reader = csv.DictReader(csvfile, delimiter=args.delimiter)
+        missing = [column for column in ('name', 'category', 'purchase_price', 'selling_price')
+                   if column not in (reader.fieldnames or ())]
+        if missing:
+            raise ValueError(f"Colonnes manquantes: {', '.join(missing)}")
+
+        # Ligne 1: en-têtes
+        for line_number, row in enumerate(reader, start=2):
+            row = {column: (row.get(column) or '').strip() for column in IMPORT_COLUMNS}
+            category_key = row['category'].lower()
+            if category_key and category_key not in categories:
+                success, message = category_controller.create_category(row['category'])
+                if not success:
+                    print(f"❌ Ligne {line_number}: {message}")
+                    failed += 1
+                    continue
+                categories = {c['name'].strip().lower(): c['categories_id']
+                              for c in category_controller.get_all_categories()}
+
+            success, message = product_controller.create_product(
+                row['name'], categories.get(category_key), row['purchase_price'], row['selling_price'],
+                row['quantity'] or 0, row['min_stock_level'] or 5, row['sku'] or None, row['barcode'] or None
+            )
+            if success:
+                imported += 1
+            else:
+                print(f"❌ Ligne {line_number}: {message}")
+                failed += 1
+
+    print(f"📥 {imported} produit(s) importé(s), {failed} ligne(s) rejetée(s)")
+    return 1 if failed else 0
+
+def command_backup(args):
+    """Sauvegarde la base si elle a changé depuis la dernière sauvegarde (ou toujours avec --force)"""
+    from gestion.database.backup_scheduler import BackupScheduler
+
+    backup_path = BackupScheduler().run_once(force=args.force)
+    if backup_path:
+        print(f"✅ Sauvegarde vérifiée: {backup_path}")
+    return 0
+
+def command_vacuum(args):
+    """Libère les pages libres de la base (toutes par défaut)"""
+    from gestion.database.database_manager import DatabaseManager
+
+    db = DatabaseManager()
+    try:
+        pages = args.pages or db.get_freelist_count()
+        freed = db.incremental_vacuum(pages) if pages else 0
+        print(f"🧹 {freed} page(s) libérée(s), {db.get_freelist_count()} restante(s)")
+    finally:
+        db.close()
+    return 0
+
+def command_analyze(args):
+    """Met à jour les statistiques du planificateur de requêtes"""
+    from gestion.database.database_manager import DatabaseManager
+
+    db = DatabaseManager()
+    try:
+        db.analyze(args.tables or None)
+        print("📈 Statistiques mises à jour")
+    finally:
+        db.close()
+    return 0
+
+def command_cache(args):
+    """Affiche les statistiques du cache des rapports (ou le vide avec --clear)"""
+    from gestion.utils.report_cache import report_cache
+
+    if args.clear:
+        report_cache.clear()
+        print("🗑️ Cache des rapports vidé")
+    stats = report_cache.get_stats()
+    print(f"📦 {stats['entries']} rapport(s) en cache, {stats['bytes'] / 1024 / 1024:.1f} / "
+          f"{stats['max_bytes'] / 1024 / 1024:.0f} Mo")
+    print(f"🎯 {stats['entry_hits']} réutilisation(s), {stats['entry_saved_seconds']} s de génération évitées")
+    return 0
+
+def command_benchmark(args):
+    """Mesure le débit d'export du rapport des ventes dans chaque format (fichiers supprimés ensuite)
+
+    Avec --rows, chaque format est mesuré sur les N premières ventes de la période
+    pour chaque N (évolution avec la taille du rapport). Avec --levels, chaque niveau
+    de --compression est mesuré (taille obtenue contre débit); --backup-presets mesure
+    de même les niveaux lzma des sauvegardes complètes de la base.
+    """
+    from gestion.utils.exporters import UNCOMPRESSED_FORMATS
+
+    if args.levels and not args.compression:
+        raise ValueError("--levels demande --compression gzip ou xz")
+
+    db_path = os.path.abspath(config.DATABASE_PATH)
+    period = resolve_period(args)
+    print(f"⏱️ Export des ventes du {period[0]} au {period[1]}")
+
+    # Niveau de compression des exports modifié le temps de la mesure
+    level_key = {'gzip': 'gzip_level', 'xz': 'xz_preset'}.get(args.compression)
+    default_level = config.EXPORT_CONFIG.get(level_key)
+
+    failed = 0
+    try:
+        for limit in args.rows or [None]:
+            if limit:
+                print(f"📏 {limit} premières ventes")
+            for format_type in args.formats:
+                # XLSX et HTML ne se compressent pas: mesurés sans compression
+                if format_type in UNCOMPRESSED_FORMATS or not args.compression:
+                    failed += benchmark_export(format_type, format_type, None, period, db_path, limit)
+                    continue
+                for level in args.levels or [default_level]:
+                    config.EXPORT_CONFIG[level_key] = level
+                    label = f"{format_type} {args.compression}-{level}" if args.levels else format_type
+                    failed += benchmark_export(label, format_type, args.compression, period, db_path, limit)
+    finally:
+        if level_key:
+            config.EXPORT_CONFIG[level_key] = default_level
+
+    if args.backup_presets:
+        failed += benchmark_backup(db_path, args.backup_presets)
+    return 1 if failed else 0
+
+def benchmark_export(label, format_type, compression, period, db_path, limit=None):
+    """Mesure un export des ventes et affiche sa taille et son débit; retourne 1 en cas d'échec"""
+    from gestion.utils.exporters import ReportJob, run_report_job
+
+    job = ReportJob('sales', format_type, period, filename=f"benchmark_{os.getpid()}_{format_type}",
+                    compression=compression)
+    started = time.perf_counter()
+    try:
+        if limit:
+            job.output, job.stats = export_sales_sample(job, db_path, limit)
+        else:
+            job.output, job.stats = run_report_job(job, db_path, use_cache=False)
+        size = sum(os.path.getsize(path) for path in glob.glob(glob.escape(job.filename) + '*'))
+        stats = job.stats
+        print(f"  {label:<12} {stats['rows']:>9} ligne(s)  {size / 1024 / 1024:>8.1f} Mo  "
+              f"{time.perf_counter() - started:>7.2f} s  {stats['rows_per_second']:>9} lignes/s")
+        return 0
+    except Exception as e:
+        print(f"  {label:<12} ❌ {e}")
+        return 1
+    finally:
+        for path in glob.glob(glob.escape(job.filename) + '*'):
+            os.remove(path)
+
+def benchmark_backup(db_path, presets):
+    """Mesure une sauvegarde complète compressée pour chaque niveau lzma; retourne 1 en cas d'échec"""
+    import tempfile
+    from gestion.database.backup_service import BackupService
+
+    print(f"💾 Sauvegarde complète de {os.path.getsize(db_path) / 1024 / 1024:.1f} Mo")
+    with tempfile.TemporaryDirectory() as backup_dir:
+        for preset in presets:
+            service = BackupService(db_path, backup_dir, step_sleep=0)
+            service.compression_preset = preset
+            started = time.perf_counter()
+            try:
+                backup_path = service.backup_full()
+                size = os.path.getsize(backup_path)
+                print(f"  xz-{preset:<9} {size / 1024 / 1024:>8.1f} Mo  {time.perf_counter() - started:>7.2f} s")
+            except Exception as e:
+                print(f"  xz-{preset:<9} ❌ {e}")
+                return 1
+            finally:
+                for name in os.listdir(backup_dir):
+                    os.remove(os.path.join(backup_dir, name))
+    return 0
+
+def export_sales_sample(job, db_path, limit):
+    """Exporte les limit premières ventes de la période d'un job (mesure à taille fixe)"""
+    from itertools import islice
+    from gestion.database.database_manager import DatabaseManager
+    from gestion.models.product_model import ProductModel
+    from gestion.utils.exporters import SalesExporter
+
+    db = DatabaseManager(db_path, read_only=True)
+    try:
+        sales = islice(ProductModel(db).iter_sales(job.start_date, job.end_date), limit)
+        exporter = SalesExporter()
+        output = exporter.export_sales_report(sales, job.format_type, job.filename, compression=job.compression)
+        return output, exporter.last_export_stats
+    finally:
+        db.close()
+
+def add_period_arguments(parser, default):
+    """Options de période communes"""
+    parser.add_argument('--period', choices=list(PERIODS), default=default, help=f"période (défaut: {default})")
+    parser.add_argument('--start', help="date de début AAAA-MM-JJ (remplace celle de la période)")
+    parser.add_argument('--end', help="date de fin AAAA-MM-JJ (remplace celle de la période)")
+
+def build_parser():
+    """Analyseur des arguments de la ligne de commande"""
+    from gestion.utils.exporters import BATCH_REPORTS, COMPRESSION_EXTENSIONS
+
+    formats = ['csv', 'xlsx', 'txt', 'json', 'ndjson', 'html']
+    parser = argparse.ArgumentParser(prog="python -m gestion", description="Gestion d'inventaire sans interface graphique")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    report = subparsers.add_parser('report', help="générer des rapports")
+    report.add_argument('reports', nargs='+', choices=list(BATCH_REPORTS), help="rapports à générer")
+    add_period_arguments(report, '30d')
+    report.add_argument('--format', choices=formats, default='csv', help="format des fichiers (défaut: csv)")
+    report.add_argument('--compression', choices=list(COMPRESSION_EXTENSIONS), help="compression des formats texte")
+    report.add_argument('--workers', type=int, help="processus utilisés pour plusieurs rapports")
+    report.add_argument('--no-cache', action='store_true', help="régénérer même si un rapport identique est en cache")
+    report.set_defaults(handler=command_report)
+
+    import_csv = subparsers.add_parser('import-csv', help="importer des produits depuis un fichier CSV")
+    import_csv.add_argument('file', help=f"fichier CSV (colonnes: {', '.join(IMPORT_COLUMNS)})")
+    import_csv.add_argument('--delimiter', default=',', help="séparateur de colonnes (défaut: ,)")
+    import_csv.set_defaults(handler=command_import_csv)
+
+    backup = subparsers.add_parser('backup', help="sauvegarder la base")
+    backup.add_argument('--force', action='store_true', help="sauvegarder même sans modification")
+    backup.set_defaults(handler=command_backup)
+
+    vacuum = subparsers.add_parser('vacuum', help="libérer les pages libres de la base")
+    vacuum.add_argument('--pages', type=int, help="nombre de pages à libérer (défaut: toutes)")
+    vacuum.set_defaults(handler=command_vacuum)
+
+    analyze = subparsers.add_parser('analyze', help="mettre à jour les statistiques des requêtes")
+    analyze.add_argument('tables', nargs='*', help="tables à analyser (défaut: toutes)")
+    analyze.set_defaults(handler=command_analyze)
+
+    cache = subparsers.add_parser('cache', help="statistiques du cache des rapports")
+    cache.add_argument('--clear', action='store_true', help="vider le cache")
+    cache.set_defaults(handler=command_cache)
+
+    benchmark = subparsers.add_parser('benchmark', help="mesurer le débit des exports")
+    add_period_arguments(benchmark, 'year')
+    benchmark.add_argument('--formats', nargs='+', choices=formats, default=formats, help="formats mesurés")
+    benchmark.add_argument('--compression', choices=list(COMPRESSION_EXTENSIONS), help="compression des formats texte")
+    benchmark.add_argument('--rows', type=int, nargs='+', help="tailles mesurées: N premières ventes (ex. 100000 1000000)")
+    benchmark.add_argument('--levels', type=int, nargs='+', help="niveaux de --compression mesurés (gzip 1-9, xz 0-9)")
+    benchmark.add_argument('--backup-presets', type=int, nargs='+', help="niveaux lzma mesurés sur une sauvegarde complète")
+    benchmark.set_defaults(handler=command_benchmark)
+
+    return parser
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande; retourne le code de sortie"""
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
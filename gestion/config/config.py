@@ -15,6 +15,7 @@ class Config:
     # Répertoires
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     LOGS_DIR = os.path.join(BASE_DIR, "..", "logs")
+    REPORT_CACHE_DIR = os.path.join(BASE_DIR, "..", "cache", "reports")
 
     # Application
     APP_NAME = "Gestion d'Inventaire"
@@ -54,7 +55,23 @@ class Config:
     DB_CONFIG = {
         'backup_interval': 24,  # heures
         'max_backups': 7,
-        'auto_vacuum': True
+        'auto_vacuum': True,  # libère les pages libres par petits lots pendant l'inactivité
+        'maintenance_interval': 30000,  # millisecondes entre deux étapes d'entretien
+        'maintenance_idle_seconds': 60,  # inactivité requise avant un nettoyage
+        'vacuum_pages_per_step': 256,  # pages libérées par étape
+        'analyze_after_rows': 10000,  # lignes écrites en masse déclenchant un ANALYZE
+        'change_poll_interval': 2000,  # millisecondes
+        'query_cache_size': 128,  # nombre de résultats de requêtes en cache
+        'archive_after_days': 730,  # ancienneté des mouvements archivés (None: pas d'archivage)
+        'archive_dir': 'gestion/database/archives',
+        'backup_pages_per_step': 256,  # pages copiées entre deux pauses
+        'backup_step_sleep': 0.005,  # secondes de pause pour laisser passer les ventes
+        'backup_max_restarts': 3,  # reprises tolérées avant une copie en une étape
+        'backup_mode': 'incremental',  # 'plain' (copie .db), 'full' (compressée) ou 'incremental'
+        'full_backup_every': 7,  # incréments avant une nouvelle sauvegarde complète
+        # Niveau lzma (0-9). Mesuré sur une base de 122 Mo: 1 donne 19,4 Mo en 9,7 s, 6 donne 16,4 Mo en 84 s
+        # (python -m gestion benchmark --backup-presets 0 1 6 9)
+        'backup_compression_preset': 1
     }
 
     # Logs
@@ -72,6 +89,17 @@ class Config:
         'format': '{:,.0f} Ar'
     }
 
+    # Exports
+    EXPORT_CONFIG = {
+        'html_rows_per_page': 5000,  # au-delà, rapport HTML découpé en pages avec sommaire
+        'gzip_level': 6,  # niveau gzip (1-9): 1M ventes en CSV, 3,1 Mo en 13,5 s contre 2,9 Mo en 17,3 s au niveau 9
+        'xz_preset': 1,  # niveau xz (0-9): 1M ventes en CSV, 3,0 Mo en 15,6 s contre 2,5 Mo en 55 s au niveau 6
+        'batch_workers': None,  # processus des rapports en lot (None: un par cœur)
+        'report_cache': True,  # réutilise un rapport déjà généré si les données n'ont pas changé
+        'report_cache_max_mb': 500,  # taille du cache des rapports (les moins récemment utilisés sont supprimés)
+        'preview_rows': 50  # lignes affichées dans l'aperçu d'un rapport
+    }
+
     # Pagination
     PAGINATION = {
         'items_per_page': 50,
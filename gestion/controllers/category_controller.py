@@ -4,6 +4,7 @@ Contrôleur pour la gestion des catégories
 """
 
 from gestion.models.category_model import CategoryModel
+from gestion.utils.events import event_bus, CATEGORY, CREATED, UPDATED, DELETED
 
 class CategoryController:
     def __init__(self):
@@ -25,6 +26,7 @@ class CategoryController:
 
             # Créer la catégorie
             category_id = self.category_model.create_category(name.strip())
+            event_bus.emit(CATEGORY, CREATED, [category_id], {'name': name.strip()})
 
             return True, f"Catégorie créée avec succès (ID: {category_id})"
 
@@ -64,6 +66,7 @@ class CategoryController:
             rows_affected = self.category_model.update_category(category_id, name.strip())
 
             if rows_affected > 0:
+                event_bus.emit(CATEGORY, UPDATED, [category_id], {'name': name.strip()})
                 return True, "Catégorie mise à jour avec succès"
             else:
                 return False, "Aucune catégorie trouvée avec cet ID"
@@ -79,6 +82,7 @@ class CategoryController:
             rows_affected = self.category_model.delete_category(category_id)
 
             if rows_affected > 0:
+                event_bus.emit(CATEGORY, DELETED, [category_id])
                 return True, "Catégorie supprimée avec succès"
             else:
                 return False, "Aucune catégorie trouvée avec cet ID"
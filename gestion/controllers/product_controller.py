@@ -6,6 +6,8 @@ Contrôleur pour la gestion des produits et du stock
 from gestion.models.product_model import ProductModel
 from gestion.models.category_model import CategoryModel
 from gestion.models.vendeur_model import VendeurModel
+from gestion.models.dashboard_model import DashboardModel
+from gestion.utils.events import event_bus, PRODUCT, STOCK_MOVEMENT, CREATED, UPDATED, DELETED
 
 class ProductController:
     def __init__(self):
@@ -13,8 +15,10 @@ class ProductController:
         self.product_model = ProductModel()
         self.category_model = CategoryModel()
         self.vendeur_model = VendeurModel()
+        self.dashboard_model = DashboardModel()
 
-    def create_product(self, name, category_id, purchase_price, selling_price, initial_quantity=0, min_stock_level=5):
+    def create_product(self, name, category_id, purchase_price, selling_price, initial_quantity=0, min_stock_level=5,
+                       sku=None, barcode=None):
         """Crée un nouveau produit"""
         try:
             # Validations
@@ -41,12 +45,18 @@ class ProductController:
             if initial_quantity < 0 or min_stock_level < 0:
                 raise Exception("Les quantités ne peuvent pas être négatives")
 
+            sku, barcode = self._validate_codes(None, sku, barcode)
+
             # Créer le produit
             product_id = self.product_model.create_product(
                 name.strip(), category_id, purchase_price, selling_price,
-                initial_quantity, min_stock_level
+                initial_quantity, min_stock_level, sku, barcode
             )
 
+            # Notifier les vues du nouveau produit
+            product = self.product_model.get_product_by_id(product_id)
+            event_bus.emit(PRODUCT, CREATED, [product_id], product)
+
             return True, f"Produit créé avec succès (ID: {product_id})"
 
         except Exception as e:
@@ -59,7 +69,36 @@ class ProductController:
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des produits: {str(e)}")
 
-    def update_product(self, product_id, name, category_id, purchase_price, selling_price, min_stock_level):
+    def search_products(self, prefix, limit=20):
+        """Recherche instantanée des produits par début de nom (saisie en caisse)"""
+        try:
+            return self.product_model.search_products_by_prefix(prefix, limit)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la recherche de produits: {str(e)}")
+
+    def fuzzy_search(self, text, limit=20):
+        """Recherche approchée des produits (fautes de frappe, accents, casse)"""
+        try:
+            return self.product_model.fuzzy_search(text, limit)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la recherche approchée: {str(e)}")
+
+    def search(self, text, scope='products', limit=50):
+        """Recherche plein texte dans les produits ou les notes des mouvements"""
+        try:
+            return self.product_model.search(text, scope, limit)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la recherche: {str(e)}")
+
+    def search_sales(self, text, limit=500):
+        """Recherche dans l'historique des ventes (produit, catégorie ou notes)"""
+        try:
+            return self.product_model.search_sales(text, limit)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la recherche des ventes: {str(e)}")
+
+    def update_product(self, product_id, name, category_id, purchase_price, selling_price, min_stock_level,
+                       sku=None, barcode=None):
         """Met à jour un produit"""
         try:
             # Validations similaires à create_product
@@ -79,12 +118,16 @@ class ProductController:
             if selling_price <= purchase_price:
                 raise Exception("Le prix de vente doit être supérieur au prix d'achat")
 
+            sku, barcode = self._validate_codes(product_id, sku, barcode)
+
             # Mettre à jour le produit
+            before = self.product_model.get_product_by_id(product_id)
             rows_affected = self.product_model.update_product(
-                product_id, name.strip(), category_id, purchase_price, selling_price, min_stock_level
+                product_id, name.strip(), category_id, purchase_price, selling_price, min_stock_level, sku, barcode
             )
 
             if rows_affected > 0:
+                self._publish_product_changes(product_id, before)
                 return True, "Produit mis à jour avec succès"
             else:
                 return False, "Aucun produit trouvé avec cet ID"
@@ -92,6 +135,73 @@ class ProductController:
         except Exception as e:
             return False, str(e)
 
+    def delete_product(self, product_id):
+        """Supprime un produit sans mouvement de stock"""
+        try:
+            rows_affected = self.product_model.delete_product(product_id)
+
+            if rows_affected > 0:
+                event_bus.emit(PRODUCT, DELETED, [product_id])
+                return True, "Produit supprimé avec succès"
+            else:
+                return False, "Aucun produit trouvé avec cet ID"
+
+        except Exception as e:
+            return False, str(e)
+
+    def lookup_by_code(self, code):
+        """Retrouve un produit à partir d'une saisie scanner (SKU ou code-barres)"""
+        try:
+            code = (code or '').strip()
+            if not code:
+                return None
+            return self.product_model.lookup_by_code(code)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la recherche par code: {str(e)}")
+
+    def add_barcode(self, product_id, barcode):
+        """Associe un code-barres supplémentaire à un produit"""
+        try:
+            barcode = (barcode or '').strip()
+            if not barcode:
+                raise Exception("Le code-barres est obligatoire")
+
+            owner_id = self.product_model.find_code_owner(barcode)
+            if owner_id is not None:
+                raise Exception(f"Ce code est déjà attribué au produit ID {owner_id}")
+
+            self.product_model.add_barcode(product_id, barcode)
+            return True, "Code-barres ajouté avec succès"
+
+        except Exception as e:
+            return False, str(e)
+
+    def remove_barcode(self, product_id, barcode):
+        """Retire un code-barres supplémentaire d'un produit"""
+        try:
+            if self.product_model.remove_barcode(product_id, barcode) > 0:
+                return True, "Code-barres supprimé avec succès"
+            return False, "Code-barres introuvable pour ce produit"
+
+        except Exception as e:
+            return False, str(e)
+
+    def _validate_codes(self, product_id, sku, barcode):
+        """Normalise le SKU et le code-barres et vérifie qu'ils ne sont pas déjà utilisés"""
+        sku = (sku or '').strip() or None
+        barcode = (barcode or '').strip() or None
+
+        if sku and sku == barcode:
+            raise Exception("Le SKU et le code-barres doivent être différents")
+
+        for code in (sku, barcode):
+            if code:
+                owner_id = self.product_model.find_code_owner(code)
+                if owner_id is not None and owner_id != product_id:
+                    raise Exception(f"Le code {code} est déjà attribué au produit ID {owner_id}")
+
+        return sku, barcode
+
     def add_stock(self, product_id, user_id, quantity, purchase_price, notes=""):
         """Ajoute du stock à un produit"""
         try:
@@ -109,9 +219,11 @@ class ProductController:
                 raise Exception("Le prix ne peut pas être négatif")
 
             # Ajouter le mouvement de stock
+            before = self.product_model.get_product_by_id(product_id)
             movement_id = self.product_model.add_stock_movement(
                 product_id, user_id, None, 'IN', quantity, purchase_price, notes
             )
+            self._publish_movement(movement_id, product_id, before)
 
             return True, f"Stock ajouté avec succès (Mouvement ID: {movement_id})"
 
@@ -146,6 +258,7 @@ class ProductController:
             movement_id = self.product_model.add_stock_movement(
                 product_id, user_id, vendeur_id, 'OUT', quantity, selling_price, notes
             )
+            self._publish_movement(movement_id, product_id, product)
 
             return True, f"Vente enregistrée avec succès (Mouvement ID: {movement_id})"
 
@@ -166,6 +279,65 @@ class ProductController:
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des produits en stock faible: {str(e)}")
 
+    def get_dashboard_stats(self):
+        """Récupère les statistiques agrégées du tableau de bord (mises en cache)"""
+        try:
+            return self.dashboard_model.get_dashboard_stats()
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération des statistiques: {str(e)}")
+
+    def get_sales(self, start_date=None, end_date=None):
+        """Récupère le détail des ventes d'une période"""
+        try:
+            return self.product_model.get_sales(start_date, end_date)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération des ventes: {str(e)}")
+
+    def iter_sales(self, start_date=None, end_date=None):
+        """Parcourt les ventes d'une période sans les charger en mémoire"""
+        try:
+            return self.product_model.iter_sales(start_date, end_date)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération des ventes: {str(e)}")
+
+    def get_sales_totals(self, start_date=None, end_date=None, vendeur_id=None):
+        """Récupère les totaux des ventes d'une période"""
+        try:
+            return self.product_model.get_sales_totals(start_date, end_date, vendeur_id)
+        except Exception as e:
+            raise Exception(f"Erreur lors du calcul des totaux des ventes: {str(e)}")
+
+    def take_stock_snapshot(self):
+        """Enregistre immédiatement une photographie du stock"""
+        try:
+            snapshot_id = self.product_model.take_stock_snapshot()
+            return True, f"Photographie du stock enregistrée (ID: {snapshot_id})"
+        except Exception as e:
+            return False, str(e)
+
+    def get_inventory_valuation(self, as_of_date):
+        """Récupère la valorisation du stock à une date passée"""
+        try:
+            return self.product_model.get_inventory_valuation(as_of_date)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la valorisation de l'inventaire: {str(e)}")
+
+    def archive_old_movements(self, horizon_days=None):
+        """Archive les mouvements plus anciens que l'horizon configuré"""
+        try:
+            moved = self.product_model.archives.archive_old_movements(horizon_days)
+            return True, f"{moved} mouvement(s) archivé(s)"
+        except Exception as e:
+            return False, str(e)
+
+    def rebuild_sales_rollup(self, start_date=None):
+        """Recalcule le cumul journalier des ventes"""
+        try:
+            rows = self.product_model.db.rebuild_sales_daily(start_date)
+            return True, f"Cumul des ventes reconstruit ({rows} ligne(s))"
+        except Exception as e:
+            return False, str(e)
+
     def get_sales_summary(self, start_date=None, end_date=None, vendeur_id=None):
         """Récupère un résumé des ventes"""
         try:
@@ -173,6 +345,26 @@ class ProductController:
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération du résumé: {str(e)}")
 
+    def _publish_product_changes(self, product_id, before):
+        """Publie uniquement les champs du produit réellement modifiés"""
+        after = self.product_model.get_product_by_id(product_id)
+        if not after:
+            return
+
+        before = before or {}
+        fields = {
+            key: value for key, value in after.items()
+            if key != 'last_updated' and before.get(key) != value
+        }
+        if fields:
+            event_bus.emit(PRODUCT, UPDATED, [product_id], fields)
+
+    def _publish_movement(self, movement_id, product_id, before):
+        """Publie le nouveau mouvement puis la variation de stock du produit"""
+        movement = self.product_model.get_stock_movement_by_id(movement_id)
+        event_bus.emit(STOCK_MOVEMENT, CREATED, [movement_id], movement)
+        self._publish_product_changes(product_id, before)
+
     def calculate_profit_margin(self, purchase_price, selling_price):
         """Calcule la marge bénéficiaire"""
         try:
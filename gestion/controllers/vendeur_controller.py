@@ -4,6 +4,7 @@ Contrôleur pour la gestion des vendeurs
 """
 
 from gestion.models.vendeur_model import VendeurModel
+from gestion.utils.events import event_bus, VENDEUR, CREATED, UPDATED
 
 class VendeurController:
     def __init__(self):
@@ -25,6 +26,7 @@ class VendeurController:
 
             # Créer le vendeur
             vendeur_id = self.vendeur_model.create_vendeur(name.strip(), telephone.strip())
+            event_bus.emit(VENDEUR, CREATED, [vendeur_id], self.vendeur_model.get_vendeur_by_id(vendeur_id))
 
             return True, f"Vendeur créé avec succès (ID: {vendeur_id})"
 
@@ -55,6 +57,7 @@ class VendeurController:
             rows_affected = self.vendeur_model.update_vendeur(vendeur_id, name.strip(), telephone.strip())
 
             if rows_affected > 0:
+                event_bus.emit(VENDEUR, UPDATED, [vendeur_id], {'name': name.strip(), 'telephone': telephone.strip()})
                 return True, "Vendeur mis à jour avec succès"
             else:
                 return False, "Aucun vendeur trouvé avec cet ID"
@@ -68,6 +71,8 @@ class VendeurController:
             rows_affected = self.vendeur_model.toggle_vendeur_status(vendeur_id)
 
             if rows_affected > 0:
+                vendeur = self.vendeur_model.get_vendeur_by_id(vendeur_id)
+                event_bus.emit(VENDEUR, UPDATED, [vendeur_id], {'is_active': vendeur['is_active'] if vendeur else None})
                 return True, "Statut du vendeur modifié avec succès"
             else:
                 return False, "Aucun vendeur trouvé avec cet ID"
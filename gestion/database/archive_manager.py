@@ -0,0 +1,165 @@
+# gestion/database/archive_manager.py
+"""
+Archivage des anciens mouvements de stock dans des bases annuelles attachées à la demande
+"""
+
+import os
+from datetime import datetime, timedelta
+from gestion.config.config import config
+
+# Colonnes de stock_movements, dans l'ordre utilisé par les archives et la vue d'historique
+MOVEMENT_COLUMNS = (
+    'stock_id', 'product_id', 'user_id', 'vendeur_id', 'movement_type', 'quantity',
+    'unit_price', 'total_amount', 'notes', 'created_at'
+)
+
+# Table des archives (sans clés étrangères: les tables référencées sont dans la base principale)
+ARCHIVE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {alias}.stock_movements (
+        stock_id INTEGER PRIMARY KEY,
+        product_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        vendeur_id INTEGER,
+        movement_type VARCHAR(20) NOT NULL,
+        quantity INTEGER NOT NULL,
+        unit_price DECIMAL(10,2) NOT NULL,
+        total_amount DECIMAL(10,2) NOT NULL,
+        notes TEXT,
+        created_at TIMESTAMP
+    )
+"""
+
+# Vue temporaire réunissant les mouvements courants et archivés
+HISTORY_VIEW = 'movements_history'
+
+class ArchiveManager:
+    def __init__(self, db, archive_dir=None):
+        """Initialise le gestionnaire d'archives pour une connexion"""
+        self.db = db
+        self.archive_dir = archive_dir or config.DB_CONFIG['archive_dir']
+
+    def archive_path(self, year):
+        """Chemin du fichier d'archive d'une année"""
+        return os.path.join(self.archive_dir, f"movements_{year}.db")
+
+    def archive_old_movements(self, horizon_days=None):
+        """Déplace les mouvements plus anciens que l'horizon vers les archives annuelles"""
+        horizon_days = horizon_days if horizon_days is not None else config.DB_CONFIG['archive_after_days']
+        if horizon_days is None:
+            return 0
+
+        cutoff = (datetime.now().date() - timedelta(days=horizon_days)).isoformat()
+        years = [row[0] for row in self.db.connection.execute(
+            "SELECT DISTINCT strftime('%Y', created_at) FROM stock_movements WHERE created_at < ?", (cutoff,)
+        )]
+
+        archived = 0
+        for year in years:
+            archived += self._archive_year(int(year), cutoff)
+        self.db.analyze_after_bulk_write(archived, ['stock_movements'])
+        return archived
+
+    def _archive_year(self, year, cutoff):
+        """Déplace les mouvements d'une année antérieurs à cutoff (une transaction)"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        alias = f"archive_{year}"
+        path = self.archive_path(year)
+        upper = min(cutoff, f"{year + 1}-01-01")
+        period = (f"{year}-01-01", upper)
+        columns = ', '.join(MOVEMENT_COLUMNS)
+
+        connection = self.db.connection
+        cursor = connection.cursor()
+        connection.commit()
+        cursor.execute("ATTACH DATABASE ? AS " + alias, (path,))
+        try:
+            cursor.execute(ARCHIVE_TABLE_SQL.format(alias=alias))
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {alias}.idx_archive_movements_date ON stock_movements(created_at)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {alias}.idx_archive_movements_product ON stock_movements(product_id)")
+
+            cursor.execute("BEGIN")
+            try:
+                condition = "created_at >= ? AND created_at < ?"
+                cursor.execute(f"""
+                    INSERT OR IGNORE INTO {alias}.stock_movements ({columns})
+                    SELECT {columns} FROM main.stock_movements WHERE {condition}
+                """, period)
+                cursor.execute(f"""
+                    INSERT OR IGNORE INTO main.archived_products (product_id)
+                    SELECT DISTINCT product_id FROM main.stock_movements WHERE {condition}
+                """, period)
+                cursor.execute(f"DELETE FROM main.stock_movements WHERE {condition}", period)
+                moved = cursor.rowcount
+
+                cursor.execute("""
+                    INSERT INTO main.movement_archives (year, path, movements, archived_until)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (year) DO UPDATE SET
+                        movements = movements + excluded.movements,
+                        archived_until = MAX(archived_until, excluded.archived_until),
+                        archived_at = CURRENT_TIMESTAMP
+                """, (year, path, moved, upper))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+        finally:
+            cursor.execute("DETACH DATABASE " + alias)
+
+        # Les versions de stock_movements ont changé: invalider les caches de cette connexion
+        self.db.after_write("DELETE FROM stock_movements")
+        print(f"📦 {moved} mouvement(s) de {year} archivé(s) dans {path}")
+        return moved
+
+    def get_archives(self, start_date=None, end_date=None):
+        """Liste les archives couvrant tout ou partie d'une période"""
+        query = "SELECT * FROM movement_archives WHERE 1 = 1"
+        params = []
+        if start_date:
+            query += " AND year >= ?"
+            params.append(int(str(start_date)[:4]))
+        if end_date:
+            query += " AND year <= ?"
+            params.append(int(str(end_date)[:4]))
+        return self.db.connection.execute(query + " ORDER BY year", params).fetchall()
+
+    def get_archived_until(self):
+        """Date avant laquelle les mouvements ne sont plus dans la base principale"""
+        return self.db.connection.execute("SELECT MAX(archived_until) FROM movement_archives").fetchone()[0]
+
+    def movements_source(self, start_date=None, end_date=None):
+        """Nom de la table à interroger pour une période: stock_movements, ou la vue
+        d'historique si la période remonte avant la date d'archivage"""
+        archived_until = self.get_archived_until()
+        if not archived_until or (start_date and str(start_date) >= archived_until):
+            return 'stock_movements'
+
+        archives = [archive for archive in self.get_archives(start_date, end_date) if os.path.exists(archive['path'])]
+        if not archives:
+            return 'stock_movements'
+        return self.attach_history(archives)
+
+    def attach_history(self, archives):
+        """Attache les archives demandées et (re)crée la vue temporaire UNION ALL"""
+        connection = self.db.connection
+        attached = {row[1] for row in connection.execute("PRAGMA database_list")}
+        columns = ', '.join(MOVEMENT_COLUMNS)
+
+        selects = [f"SELECT {columns} FROM main.stock_movements"]
+        for archive in archives:
+            alias = f"archive_{archive['year']}"
+            if alias not in attached:
+                connection.execute("ATTACH DATABASE ? AS " + alias, (archive['path'],))
+            selects.append(f"SELECT {columns} FROM {alias}.stock_movements")
+
+        connection.execute(f"DROP VIEW IF EXISTS temp.{HISTORY_VIEW}")
+        connection.execute(f"CREATE TEMP VIEW {HISTORY_VIEW} AS " + " UNION ALL ".join(selects))
+        return HISTORY_VIEW
+
+    def detach_all(self):
+        """Détache toutes les archives de la connexion"""
+        connection = self.db.connection
+        connection.execute(f"DROP VIEW IF EXISTS temp.{HISTORY_VIEW}")
+        for row in connection.execute("PRAGMA database_list").fetchall():
+            if row[1].startswith('archive_'):
+                connection.execute("DETACH DATABASE " + row[1])
@@ -0,0 +1,114 @@
+# gestion/database/backup_scheduler.py
+"""
+Sauvegardes automatiques périodiques (thread d'arrière-plan, utilisable sans interface)
+"""
+
+import json
+import os
+import threading
+import time
+from gestion.config.config import config
+from gestion.database.backup_service import BackupService
+
+# Fichier d'état conservé dans le répertoire des sauvegardes
+STATE_FILENAME = 'backup_state.json'
+
+def database_fingerprint(db_path):
+    """Empreinte de l'état de la base: compteur de modifications de l'en-tête et fichier WAL"""
+    with open(db_path, 'rb') as db_file:
+        header = db_file.read(100)
+    # Octets 24-27: "file change counter", incrémenté à chaque transaction validée (hors WAL)
+    change_counter = int.from_bytes(header[24:28], 'big') if len(header) >= 28 else 0
+
+    wal_path = db_path + '-wal'
+    wal_state = None
+    if os.path.exists(wal_path):
+        stat = os.stat(wal_path)
+        wal_state = [stat.st_size, stat.st_mtime_ns]
+    return [change_counter, wal_state]
+
+class BackupScheduler:
+    def __init__(self, db_path=None, backup_dir=None, interval_hours=None, max_backups=None):
+        """Initialise le planificateur de sauvegardes"""
+        self.db_path = db_path or config.DATABASE_PATH
+        self.backup_dir = backup_dir or config.LOGS_DIR
+        self.interval = (interval_hours or config.DB_CONFIG['backup_interval']) * 3600
+        self.max_backups = max_backups or config.DB_CONFIG['max_backups']
+        self.service = BackupService(self.db_path, self.backup_dir)
+        self.state_path = os.path.join(self.backup_dir, STATE_FILENAME)
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Démarre le planificateur dans un thread (ne bloque pas la boucle Tk)"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run_forever, name="backup-scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=None):
+        """Arrête le planificateur"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def run_forever(self):
+        """Boucle du planificateur: attend l'échéance, sauvegarde, recommence"""
+        while not self.stop_event.is_set():
+            delay = self.seconds_until_due()
+            if delay > 0:
+                self.stop_event.wait(delay)
+                continue
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"❌ Sauvegarde automatique: {e}")
+                # Réessayer plus tard sans boucler sur l'erreur
+                self.save_state(dict(self.load_state(), last_check_at=time.time()))
+
+    def seconds_until_due(self):
+        """Secondes avant la prochaine sauvegarde prévue"""
+        state = self.load_state()
+        last_run = max(state.get('last_backup_at', 0), state.get('last_check_at', 0))
+        return max(0, last_run + self.interval - time.time())
+
+    def run_once(self, force=False):
+        """Sauvegarde si la base a changé depuis la dernière sauvegarde, puis applique la rétention"""
+        state = self.load_state()
+        fingerprint = database_fingerprint(self.db_path)
+        last_path = state.get('last_backup_path')
+
+        if not force and fingerprint == state.get('fingerprint') and last_path and os.path.exists(last_path):
+            print("💤 Sauvegarde automatique ignorée: aucune modification")
+            self.save_state(dict(state, last_check_at=time.time()))
+            return None
+
+        backup_path = self.service.create_backup()
+        self.service.cleanup(self.max_backups)
+
+        self.save_state({
+            'last_backup_at': time.time(),
+            'last_check_at': time.time(),
+            'last_backup_path': backup_path,
+            'fingerprint': fingerprint
+        })
+        print(f"💾 Sauvegarde automatique: {backup_path}")
+        return backup_path
+
+    def load_state(self):
+        """Lit l'état de la dernière sauvegarde"""
+        try:
+            with open(self.state_path, encoding='utf-8') as state_file:
+                return json.load(state_file)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self, state):
+        """Enregistre l'état de la dernière sauvegarde"""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as state_file:
+            json.dump(state, state_file)
+        os.replace(temp_path, self.state_path)
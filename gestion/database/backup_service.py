@@ -0,0 +1,292 @@
+# gestion/database/backup_service.py
+"""
+Sauvegarde à chaud de la base avec l'API de sauvegarde SQLite, sans bloquer l'interface
+"""
+
+import hashlib
+import json
+import lzma
+import os
+import sqlite3
+import struct
+import threading
+import time
+from datetime import datetime
+from gestion.config.config import config
+
+# Fichiers produits: sauvegarde complète compressée (+ empreintes de ses pages) et
+# sauvegarde incrémentale (pages modifiées depuis la dernière complète)
+FULL_PREFIX = 'inventory_full_'
+INCREMENT_PREFIX = 'inventory_incr_'
+FULL_EXTENSION = '.db.xz'
+INCREMENT_EXTENSION = '.pages.xz'
+HASHES_EXTENSION = '.hashes'
+
+# Taille des empreintes de pages (blake2b) et de l'en-tête d'une page dans un incrément
+PAGE_DIGEST_SIZE = 16
+PAGE_RECORD = struct.Struct('>I')
+
+def read_page_size(db_path):
+    """Taille des pages d'une base SQLite (octets 16-17 de l'en-tête, 1 = 65536)"""
+    with open(db_path, 'rb') as db_file:
+        header = db_file.read(100)
+    page_size = int.from_bytes(header[16:18], 'big')
+    return 65536 if page_size == 1 else page_size
+
+def iter_pages(db_path, page_size):
+    """Parcourt les pages d'un fichier sans le charger en mémoire"""
+    with open(db_path, 'rb') as db_file:
+        while True:
+            page = db_file.read(page_size)
+            if not page:
+                return
+            yield page
+
+def page_digest(page):
+    """Empreinte d'une page"""
+    return hashlib.blake2b(page, digest_size=PAGE_DIGEST_SIZE).digest()
+
+class BackupRestarted(Exception):
+    """La base a été modifiée par une autre connexion pendant la copie par lots"""
+
+class BackupJob:
+    """État d'une sauvegarde en arrière-plan, consultable depuis la boucle Tk"""
+
+    def __init__(self):
+        """Initialise l'état de la sauvegarde"""
+        self.remaining = None
+        self.total = None
+        self.done = False
+        self.backup_path = None
+        self.error = None
+        self.thread = None
+
+    @property
+    def progress(self):
+        """Avancement en pourcentage"""
+        if not self.total:
+            return 100 if self.done else 0
+        return round((self.total - self.remaining) / self.total * 100)
+
+class BackupService:
+    def __init__(self, db_path=None, backup_dir=None, pages_per_step=None, step_sleep=None):
+        """Initialise le service de sauvegarde"""
+        self.db_path = db_path or config.DATABASE_PATH
+        self.backup_dir = backup_dir or config.LOGS_DIR
+        self.pages_per_step = pages_per_step or config.DB_CONFIG['backup_pages_per_step']
+        self.step_sleep = step_sleep if step_sleep is not None else config.DB_CONFIG['backup_step_sleep']
+        self.max_restarts = config.DB_CONFIG['backup_max_restarts']
+        self.compression_preset = config.DB_CONFIG['backup_compression_preset']
+
+    def backup(self, progress=None, backup_path=None):
+        """Copie la base page par page puis vérifie la copie (PRAGMA quick_check)
+
+        progress(remaining, total) est appelé après chaque lot de pages. Une
+        écriture d'une autre connexion fait recommencer la copie par lots: après
+        max_restarts reprises, le reste est copié en une seule étape.
+        """
+        os.makedirs(self.backup_dir, exist_ok=True)
+        if backup_path is None:
+            backup_path = os.path.join(self.backup_dir, config.get_backup_filename())
+            # Deux sauvegardes dans la même seconde: ne pas écraser la précédente
+            base, extension = os.path.splitext(backup_path)
+            counter = 1
+            while os.path.exists(backup_path):
+                backup_path = f"{base}_{counter}{extension}"
+                counter += 1
+        temp_path = backup_path + ".part"
+
+        source = sqlite3.connect(self.db_path)
+        target = sqlite3.connect(temp_path)
+        try:
+            state = {'remaining': None, 'restarts': 0}
+
+            def on_step(status, remaining, total):
+                if progress:
+                    progress(remaining, total)
+                if state['remaining'] is not None and remaining > state['remaining']:
+                    state['restarts'] += 1
+                    if state['restarts'] > self.max_restarts:
+                        raise BackupRestarted()
+                state['remaining'] = remaining
+                # Relâcher le verrou de lecture entre deux lots: les caisses continuent d'écrire
+                if remaining and self.step_sleep:
+                    time.sleep(self.step_sleep)
+
+            try:
+                source.backup(target, pages=self.pages_per_step, progress=on_step)
+            except BackupRestarted:
+                # Trop d'écritures concurrentes: copie en une étape (verrou de lecture unique)
+                source.backup(target, pages=-1)
+                if progress:
+                    progress(0, state['remaining'] or 0)
+
+            result = target.execute("PRAGMA quick_check").fetchone()[0]
+            if result != 'ok':
+                raise Exception(f"Sauvegarde corrompue (quick_check: {result})")
+        except Exception as e:
+            target.close()
+            source.close()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise Exception(f"Erreur lors de la sauvegarde: {str(e)}")
+
+        target.close()
+        source.close()
+        os.replace(temp_path, backup_path)
+        return backup_path
+
+    def create_backup(self, progress=None, mode=None):
+        """Crée une sauvegarde selon le mode configuré: 'plain' (.db), 'full' (.db.xz) ou 'incremental'"""
+        mode = mode or config.DB_CONFIG['backup_mode']
+        if mode == 'plain':
+            return self.backup(progress)
+        if mode == 'full':
+            return self.backup_full(progress)
+        if mode == 'incremental':
+            return self.backup_incremental(progress)
+        raise Exception(f"Mode de sauvegarde inconnu: {mode}")
+
+    def backup_full(self, progress=None):
+        """Sauvegarde complète compressée (lzma, en flux) avec les empreintes de ses pages"""
+        name = self._timestamped_name(FULL_PREFIX, FULL_EXTENSION)
+        full_path = os.path.join(self.backup_dir, name)
+        snapshot_path = self.backup(progress, full_path + '.snapshot')
+        try:
+            page_size = read_page_size(snapshot_path)
+            with lzma.open(full_path + '.part', 'wb', preset=self.compression_preset) as compressed, \
+                    open(full_path[:-len(FULL_EXTENSION)] + HASHES_EXTENSION, 'wb') as hashes:
+                for page in iter_pages(snapshot_path, page_size):
+                    compressed.write(page)
+                    hashes.write(page_digest(page))
+            os.replace(full_path + '.part', full_path)
+        finally:
+            os.remove(snapshot_path)
+        return full_path
+
+    def backup_incremental(self, progress=None):
+        """Sauvegarde des seules pages modifiées depuis la dernière sauvegarde complète
+
+        Une nouvelle sauvegarde complète est faite s'il n'y en a pas encore ou si
+        full_backup_every incréments s'appuient déjà sur la dernière.
+        """
+        base = self.latest_full_backup()
+        if base is None or len(self.increments_of(base)) >= config.DB_CONFIG['full_backup_every']:
+            return self.backup_full(progress)
+
+        base_hashes_path = os.path.join(self.backup_dir, base[:-len(FULL_EXTENSION)] + HASHES_EXTENSION)
+        with open(base_hashes_path, 'rb') as hashes_file:
+            base_hashes = hashes_file.read()
+
+        name = self._timestamped_name(INCREMENT_PREFIX, INCREMENT_EXTENSION)
+        increment_path = os.path.join(self.backup_dir, name)
+        snapshot_path = self.backup(progress, increment_path + '.snapshot')
+        try:
+            page_size = read_page_size(snapshot_path)
+            page_count = os.path.getsize(snapshot_path) // page_size
+            header = {'base': base, 'page_size': page_size, 'page_count': page_count}
+            changed = 0
+
+            with lzma.open(increment_path + '.part', 'wb', preset=self.compression_preset) as compressed:
+                compressed.write(json.dumps(header).encode('utf-8') + b'\n')
+                for number, page in enumerate(iter_pages(snapshot_path, page_size)):
+                    offset = number * PAGE_DIGEST_SIZE
+                    if base_hashes[offset:offset + PAGE_DIGEST_SIZE] != page_digest(page):
+                        compressed.write(PAGE_RECORD.pack(number + 1))
+                        compressed.write(page)
+                        changed += 1
+            os.replace(increment_path + '.part', increment_path)
+        finally:
+            os.remove(snapshot_path)
+
+        print(f"💾 Sauvegarde incrémentale: {changed}/{page_count} page(s) modifiée(s) depuis {base}")
+        return increment_path
+
+    def latest_full_backup(self):
+        """Nom de la dernière sauvegarde complète compressée (avec ses empreintes)"""
+        fulls = [name for name in self._list(FULL_PREFIX, FULL_EXTENSION)
+                 if os.path.exists(os.path.join(self.backup_dir, name[:-len(FULL_EXTENSION)] + HASHES_EXTENSION))]
+        return fulls[-1] if fulls else None
+
+    def increments_of(self, base):
+        """Incréments construits sur une sauvegarde complète"""
+        return [name for name in self._list(INCREMENT_PREFIX, INCREMENT_EXTENSION)
+                if self.read_increment_header(os.path.join(self.backup_dir, name))['base'] == base]
+
+    def cleanup(self, max_backups=None):
+        """Conserve les max_backups points de restauration les plus récents (et leurs bases)"""
+        max_backups = max_backups or config.DB_CONFIG['max_backups']
+        points = sorted(
+            self._list(FULL_PREFIX, FULL_EXTENSION) + self._list(INCREMENT_PREFIX, INCREMENT_EXTENSION),
+            key=lambda name: os.path.getmtime(os.path.join(self.backup_dir, name)),
+            reverse=True
+        )
+        kept = set(points[:max_backups])
+        # Un incrément conservé a besoin de sa sauvegarde complète
+        for name in list(kept):
+            if name.startswith(INCREMENT_PREFIX):
+                kept.add(self.read_increment_header(os.path.join(self.backup_dir, name))['base'])
+
+        for name in points:
+            if name in kept:
+                continue
+            os.remove(os.path.join(self.backup_dir, name))
+            if name.startswith(FULL_PREFIX):
+                hashes_path = os.path.join(self.backup_dir, name[:-len(FULL_EXTENSION)] + HASHES_EXTENSION)
+                if os.path.exists(hashes_path):
+                    os.remove(hashes_path)
+
+        # Anciennes copies non compressées
+        from gestion.utils.helpers import cleanup_old_backups
+        cleanup_old_backups(self.backup_dir, max_backups)
+
+    @staticmethod
+    def read_increment_header(increment_path):
+        """Lit l'en-tête JSON d'un incrément"""
+        with lzma.open(increment_path, 'rb') as compressed:
+            return json.loads(compressed.readline())
+
+    def _list(self, prefix, extension):
+        """Fichiers de sauvegarde d'un type, du plus ancien au plus récent"""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        return sorted(name for name in os.listdir(self.backup_dir)
+                      if name.startswith(prefix) and name.endswith(extension))
+
+    def _timestamped_name(self, prefix, extension):
+        """Nom horodaté qui n'écrase pas une sauvegarde existante"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        name = f"{prefix}{timestamp}{extension}"
+        counter = 1
+        while os.path.exists(os.path.join(self.backup_dir, name)):
+            name = f"{prefix}{timestamp}_{counter}{extension}"
+            counter += 1
+        return name
+
+    def backup_async(self, on_progress=None, on_done=None, mode=None):
+        """Lance la sauvegarde dans un thread et retourne son BackupJob
+
+        Les callbacks sont appelés dans le thread de sauvegarde: une interface Tk
+        doit plutôt consulter le BackupJob depuis sa boucle (after).
+        """
+        job = BackupJob()
+
+        def progress(remaining, total):
+            job.remaining = remaining
+            job.total = total
+            if on_progress:
+                on_progress(remaining, total)
+
+        def run():
+            try:
+                job.backup_path = self.create_backup(progress, mode)
+            except Exception as e:
+                job.error = e
+            finally:
+                job.done = True
+                if on_done:
+                    on_done(job)
+
+        job.thread = threading.Thread(target=run, name="backup", daemon=True)
+        job.thread.start()
+        return job
@@ -0,0 +1,94 @@
+# gestion/database/change_watcher.py
+"""
+Détection peu coûteuse des modifications faites par d'autres postes (PRAGMA data_version)
+"""
+
+from gestion.config.config import config
+from gestion.database.database_manager import DatabaseManager
+from gestion.utils.events import (
+    event_bus, ALL, REFRESHED, PRODUCT, CATEGORY, VENDEUR, STOCK_MOVEMENT
+)
+
+# Entité publiée lorsqu'une table a changé
+TABLE_ENTITIES = {
+    'products': PRODUCT,
+    'categories': CATEGORY,
+    'vendeur': VENDEUR,
+    'stock_movements': STOCK_MOVEMENT
+}
+# Table écrite par une modification locale de chaque entité
+ENTITY_TABLES = {entity: table for table, entity in TABLE_ENTITIES.items()}
+
+class ChangeWatcher:
+    def __init__(self, root, interval_ms=None):
+        """Initialise le service de détection des modifications"""
+        self.root = root
+        self.interval_ms = interval_ms or config.DB_CONFIG['change_poll_interval']
+        # Connexion dédiée: data_version ne change que pour les écritures des autres connexions
+        self.db = DatabaseManager()
+        self.data_version = None
+        self.table_versions = {}
+        self.job = None
+        self.unsubscribe = None
+
+    def start(self):
+        """Démarre la surveillance périodique"""
+        self.sync()
+        self.unsubscribe = event_bus.subscribe(ALL, self.on_local_change)
+        self.schedule()
+
+    def stop(self):
+        """Arrête la surveillance"""
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+        if self.unsubscribe:
+            self.unsubscribe()
+            self.unsubscribe = None
+
+    def schedule(self):
+        """Planifie la prochaine vérification sur la boucle Tk"""
+        self.job = self.root.after(self.interval_ms, self.poll)
+
+    def sync(self):
+        """Mémorise l'état courant de la base comme référence"""
+        self.data_version = self.db.get_data_version()
+        self.table_versions = self.db.get_table_versions()
+
+    def on_local_change(self, event):
+        """Les écritures locales sont déjà publiées: ne pas les signaler une seconde fois
+
+        Seul le compteur de la table écrite avance: data_version et les autres tables
+        restent à leur dernière vérification, pour que les écritures d'autres postes
+        non encore relevées soient signalées au prochain passage.
+        """
+        table = ENTITY_TABLES.get(event.entity)
+        if event.action == REFRESHED or table is None:
+            return
+        self.table_versions[table] = self.db.get_table_versions().get(table)
+
+    def poll(self):
+        """Vérifie data_version puis, seulement s'il a changé, les compteurs par table"""
+        try:
+            self.check_changes()
+        except Exception as e:
+            print(f"Erreur lors de la détection des modifications: {e}")
+        finally:
+            self.schedule()
+
+    def check_changes(self):
+        """Publie un événement REFRESHED pour chaque table modifiée par une autre connexion"""
+        data_version = self.db.get_data_version()
+        if data_version == self.data_version:
+            return []
+
+        self.data_version = data_version
+        versions = self.db.get_table_versions()
+        changed = [table for table, version in versions.items() if self.table_versions.get(table) != version]
+        self.table_versions = versions
+
+        for table in changed:
+            if table in TABLE_ENTITIES:
+                event_bus.emit(TABLE_ENTITIES[table], REFRESHED, [])
+
+        return changed
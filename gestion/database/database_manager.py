@@ -5,21 +5,171 @@ Gestionnaire de base de données SQLite pour l'application de gestion d'inventai
 
 import sqlite3
 import hashlib
+import logging
 import os
+import re
+import time
 from datetime import datetime
+from urllib.request import pathname2url
+from gestion.config.config import config
+from gestion.database.query_cache import QueryCache
+
+# Tables lues par une requête et table ciblée par une écriture
+READ_TABLES_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)', re.IGNORECASE)
+WRITE_TABLE_PATTERN = re.compile(r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|UPDATE|DELETE\s+FROM)\s+(\w+)', re.IGNORECASE)
 
 class DatabaseManager:
-    def __init__(self, db_path="gestion/database/inventory.db"):
-        """Initialise le gestionnaire de base de données"""
+    # Tables dont les écritures sont comptées dans table_versions
+    VERSIONED_TABLES = ('products', 'categories', 'vendeur', 'stock_movements', 'product_barcodes')
+
+    # Migrations du schéma: (numéro, requêtes), appliquées dans l'ordre selon PRAGMA user_version
+    MIGRATIONS = [
+        (1, [
+            # Codes produits pour la lecture au scanner
+            "ALTER TABLE products ADD COLUMN sku VARCHAR(50)",
+            "ALTER TABLE products ADD COLUMN barcode VARCHAR(50)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_products_sku ON products(sku)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_products_barcode ON products(barcode)",
+            # Codes-barres supplémentaires (plusieurs conditionnements d'un même produit)
+            """
+            CREATE TABLE IF NOT EXISTS product_barcodes (
+                barcode VARCHAR(50) PRIMARY KEY,
+                product_id INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (product_id) REFERENCES products(products_id)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_product_barcodes_product ON product_barcodes(product_id)",
+            """
+            CREATE TRIGGER IF NOT EXISTS delete_product_barcodes
+                AFTER DELETE ON products
+                BEGIN
+                    DELETE FROM product_barcodes WHERE product_id = OLD.products_id;
+                END
+            """
+        ]),
+        (2, [
+            # Cumul journalier des ventes (vendeur_id = 0: vente sans vendeur)
+            """
+            CREATE TABLE IF NOT EXISTS sales_daily (
+                day DATE NOT NULL,
+                product_id INTEGER NOT NULL,
+                vendeur_id INTEGER NOT NULL DEFAULT 0,
+                quantity INTEGER NOT NULL DEFAULT 0,
+                revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+                cost DECIMAL(12,2) NOT NULL DEFAULT 0,
+                transactions INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, product_id, vendeur_id)
+            ) WITHOUT ROWID
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_sales_daily_vendeur ON sales_daily(vendeur_id, day)",
+            # Le coût est figé au prix d'achat du moment de la vente. Les suppressions de
+            # mouvements (archivage) ne retirent rien du cumul: voir rebuild_sales_daily()
+            """
+            CREATE TRIGGER IF NOT EXISTS sales_daily_insert
+                AFTER INSERT ON stock_movements
+                WHEN NEW.movement_type = 'OUT'
+                BEGIN
+                    INSERT INTO sales_daily (day, product_id, vendeur_id, quantity, revenue, cost, transactions)
+                    SELECT DATE(NEW.created_at), NEW.product_id, COALESCE(NEW.vendeur_id, 0),
+                           NEW.quantity, NEW.total_amount, NEW.quantity * p.purchase_price, 1
+                    FROM products p
+                    WHERE p.products_id = NEW.product_id
+                    ON CONFLICT (day, product_id, vendeur_id) DO UPDATE SET
+                        quantity = quantity + excluded.quantity,
+                        revenue = revenue + excluded.revenue,
+                        cost = cost + excluded.cost,
+                        transactions = transactions + 1;
+                END
+            """,
+            "DELETE FROM sales_daily",
+            """
+            INSERT INTO sales_daily (day, product_id, vendeur_id, quantity, revenue, cost, transactions)
+            SELECT DATE(sm.created_at), sm.product_id, COALESCE(sm.vendeur_id, 0),
+                   SUM(sm.quantity), SUM(sm.total_amount), SUM(sm.quantity * p.purchase_price), COUNT(*)
+            FROM stock_movements sm
+            JOIN products p ON sm.product_id = p.products_id
+            WHERE sm.movement_type = 'OUT'
+            GROUP BY DATE(sm.created_at), sm.product_id, COALESCE(sm.vendeur_id, 0)
+            """
+        ]),
+        (3, [
+            # Photographies du stock: last_movement_id situe la photo dans l'historique
+            """
+            CREATE TABLE IF NOT EXISTS stock_snapshot_runs (
+                snapshot_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                taken_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_movement_id INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_stock_snapshot_runs_date ON stock_snapshot_runs(taken_at)",
+            """
+            CREATE TABLE IF NOT EXISTS stock_snapshots (
+                snapshot_id INTEGER NOT NULL,
+                product_id INTEGER NOT NULL,
+                quantity INTEGER NOT NULL,
+                purchase_price DECIMAL(10,2) NOT NULL,
+                PRIMARY KEY (snapshot_id, product_id),
+                FOREIGN KEY (snapshot_id) REFERENCES stock_snapshot_runs(snapshot_id)
+            ) WITHOUT ROWID
+            """
+        ]),
+        (4, [
+            # Fichiers d'archives des mouvements (un par année)
+            """
+            CREATE TABLE IF NOT EXISTS movement_archives (
+                year INTEGER PRIMARY KEY,
+                path TEXT NOT NULL,
+                movements INTEGER NOT NULL DEFAULT 0,
+                archived_until DATE NOT NULL,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            # Produits dont une partie de l'historique est archivée (suppression interdite)
+            """
+            CREATE TABLE IF NOT EXISTS archived_products (
+                product_id INTEGER PRIMARY KEY
+            )
+            """
+        ]),
+        (5, [
+            # Pages libres récupérables par PRAGMA incremental_vacuum (le mode ne
+            # s'applique à une base existante qu'après un VACUUM complet)
+            "PRAGMA auto_vacuum = INCREMENTAL",
+            "VACUUM"
+        ]),
+        (6, [
+            # Produits modifiés depuis le dernier rafraîchissement du catalogue en mémoire
+            "CREATE INDEX IF NOT EXISTS idx_products_last_updated ON products(last_updated)"
+        ])
+    ]
+
+    # Caches de résultats partagés par toutes les connexions du processus (un par fichier)
+    query_caches = {}
+
+    def __init__(self, db_path="gestion/database/inventory.db", read_only=False):
+        """Initialise le gestionnaire de base de données (read_only: connexion en lecture seule)"""
         self.db_path = db_path
+        self.read_only = read_only
         # Créer le dossier de base de données s'il n'existe pas
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        if not read_only:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # Dernier data_version vu par cette connexion (None: versions jamais lues)
+        self.data_version = None
+        self.query_cache = self.query_caches.setdefault(
+            os.path.abspath(db_path), QueryCache(config.DB_CONFIG['query_cache_size'])
+        )
         self.init_connection()
 
     def init_connection(self):
         """Initialise la connexion à la base de données"""
         try:
-            self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            if self.read_only:
+                # mode=ro: la base doit exister et aucune écriture n'est possible
+                uri = f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro"
+                self.connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            else:
+                self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
             self.connection.row_factory = sqlite3.Row  # Pour accéder aux colonnes par nom
             self.cursor = self.connection.cursor()
         except Exception as e:
@@ -92,6 +242,14 @@ class DatabaseManager:
                 FOREIGN KEY (user_id) REFERENCES users(users_id),
                 FOREIGN KEY (vendeur_id) REFERENCES vendeur(vendeur_id)
             )
+            """,
+
+            # Compteurs de version par table (détection des modifications)
+            """
+            CREATE TABLE IF NOT EXISTS table_versions (
+                table_name VARCHAR(50) PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
             """
         ]
 
@@ -126,13 +284,319 @@ class DatabaseManager:
             # Créer le trigger
             self.cursor.execute(trigger_sql)
 
+            # Mettre à jour le schéma des bases existantes
+            self.apply_migrations()
+
+            # Créer les compteurs de version et leurs triggers
+            self.create_version_triggers()
+
+            # Créer l'index de recherche plein texte
+            self.create_search_index()
+
             self.connection.commit()
+
+            # Premières statistiques du planificateur: au démarrage, avant l'ouverture des
+            # autres connexions (la création de sqlite_stat1 fait échouer leur requête suivante)
+            if not self.has_statistics():
+                self.analyze()
             print("✅ Tables créées avec succès")
 
         except Exception as e:
             self.connection.rollback()
             raise Exception(f"Erreur lors de la création des tables: {str(e)}")
 
+    def get_schema_version(self):
+        """Retourne la version du schéma (PRAGMA user_version)"""
+        return self.connection.execute("PRAGMA user_version").fetchone()[0]
+
+    def apply_migrations(self):
+        """Applique les migrations non encore passées, chacune dans sa propre transaction"""
+        self.connection.commit()
+        current_version = self.get_schema_version()
+
+        for version, statements in self.MIGRATIONS:
+            if version <= current_version:
+                continue
+            # VACUUM ne peut pas s'exécuter dans une transaction
+            transactional = not any(sql.strip().upper() == 'VACUUM' for sql in statements)
+            try:
+                if transactional:
+                    self.cursor.execute("BEGIN")
+                for sql in statements:
+                    self.cursor.execute(sql)
+                self.cursor.execute(f"PRAGMA user_version = {version}")
+                self.connection.commit()
+                print(f"✅ Migration {version} appliquée")
+            except Exception as e:
+                self.connection.rollback()
+                raise Exception(f"Erreur lors de la migration {version}: {str(e)}")
+
+    def create_version_triggers(self):
+        """Crée les triggers qui incrémentent la version d'une table à chaque écriture"""
+        for table in self.VERSIONED_TABLES:
+            self.cursor.execute(
+                "INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)", (table,)
+            )
+            for operation in ('INSERT', 'UPDATE', 'DELETE'):
+                self.cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS version_{table}_{operation.lower()}
+                        AFTER {operation} ON {table}
+                        BEGIN
+                            UPDATE table_versions SET version = version + 1
+                            WHERE table_name = '{table}';
+                        END
+                """)
+
+    def create_search_index(self):
+        """Crée les tables FTS5 (produits, notes des mouvements) et les triggers de synchronisation"""
+        search_sql = [
+            # rowid = products_id
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                name, category, tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """,
+
+            # rowid = stock_id
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS movements_fts USING fts5(
+                notes, tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """,
+
+            """
+            CREATE TRIGGER IF NOT EXISTS search_products_insert
+                AFTER INSERT ON products
+                BEGIN
+                    INSERT INTO products_fts (rowid, name, category)
+                    VALUES (NEW.products_id, NEW.name,
+                            (SELECT name FROM categories WHERE categories_id = NEW.categories_id));
+                END
+            """,
+
+            # Seuls le nom et la catégorie sont indexés: les ventes ne réindexent rien
+            """
+            CREATE TRIGGER IF NOT EXISTS search_products_update
+                AFTER UPDATE OF name, categories_id ON products
+                BEGIN
+                    DELETE FROM products_fts WHERE rowid = OLD.products_id;
+                    INSERT INTO products_fts (rowid, name, category)
+                    VALUES (NEW.products_id, NEW.name,
+                            (SELECT name FROM categories WHERE categories_id = NEW.categories_id));
+                END
+            """,
+
+            """
+            CREATE TRIGGER IF NOT EXISTS search_products_delete
+                AFTER DELETE ON products
+                BEGIN
+                    DELETE FROM products_fts WHERE rowid = OLD.products_id;
+                END
+            """,
+
+            """
+            CREATE TRIGGER IF NOT EXISTS search_categories_update
+                AFTER UPDATE OF name ON categories
+                BEGIN
+                    UPDATE products_fts SET category = NEW.name
+                    WHERE rowid IN (SELECT products_id FROM products WHERE categories_id = NEW.categories_id);
+                END
+            """,
+
+            """
+            CREATE TRIGGER IF NOT EXISTS search_movements_insert
+                AFTER INSERT ON stock_movements
+                WHEN NEW.notes IS NOT NULL AND NEW.notes != ''
+                BEGIN
+                    INSERT INTO movements_fts (rowid, notes) VALUES (NEW.stock_id, NEW.notes);
+                END
+            """,
+
+            """
+            CREATE TRIGGER IF NOT EXISTS search_movements_update
+                AFTER UPDATE OF notes ON stock_movements
+                BEGIN
+                    DELETE FROM movements_fts WHERE rowid = OLD.stock_id;
+                    INSERT INTO movements_fts (rowid, notes)
+                    SELECT NEW.stock_id, NEW.notes WHERE NEW.notes IS NOT NULL AND NEW.notes != '';
+                END
+            """,
+
+            """
+            CREATE TRIGGER IF NOT EXISTS search_movements_delete
+                AFTER DELETE ON stock_movements
+                BEGIN
+                    DELETE FROM movements_fts WHERE rowid = OLD.stock_id;
+                END
+            """
+        ]
+
+        for sql in search_sql:
+            self.cursor.execute(sql)
+
+        # Base existante: indexer les données écrites avant la création de l'index
+        self.cursor.execute("SELECT (SELECT COUNT(*) FROM products) != (SELECT COUNT(*) FROM products_fts)")
+        if self.cursor.fetchone()[0]:
+            self.rebuild_search_index()
+
+    def rebuild_search_index(self):
+        """Reconstruit entièrement l'index de recherche plein texte"""
+        self.cursor.execute("DELETE FROM products_fts")
+        self.cursor.execute("""
+            INSERT INTO products_fts (rowid, name, category)
+            SELECT p.products_id, p.name, c.name
+            FROM products p
+            LEFT JOIN categories c ON p.categories_id = c.categories_id
+        """)
+        self.cursor.execute("DELETE FROM movements_fts")
+        self.cursor.execute("""
+            INSERT INTO movements_fts (rowid, notes)
+            SELECT stock_id, notes FROM stock_movements
+            WHERE notes IS NOT NULL AND notes != ''
+        """)
+
+    def rebuild_sales_daily(self, start_date=None):
+        """Recalcule le cumul journalier des ventes à partir des mouvements (depuis start_date si fournie)"""
+        try:
+            # Les jours archivés ne sont plus dans stock_movements: conserver leur cumul
+            if not start_date:
+                start_date = self.connection.execute("SELECT MAX(archived_until) FROM movement_archives").fetchone()[0]
+
+            condition = " AND DATE(sm.created_at) >= ?" if start_date else ""
+            params = (start_date,) if start_date else ()
+
+            self.cursor.execute("DELETE FROM sales_daily" + (" WHERE day >= ?" if start_date else ""), params)
+            self.cursor.execute(f"""
+                INSERT INTO sales_daily (day, product_id, vendeur_id, quantity, revenue, cost, transactions)
+                SELECT DATE(sm.created_at), sm.product_id, COALESCE(sm.vendeur_id, 0),
+                       SUM(sm.quantity), SUM(sm.total_amount), SUM(sm.quantity * p.purchase_price), COUNT(*)
+                FROM stock_movements sm
+                JOIN products p ON sm.product_id = p.products_id
+                WHERE sm.movement_type = 'OUT'{condition}
+                GROUP BY DATE(sm.created_at), sm.product_id, COALESCE(sm.vendeur_id, 0)
+            """, params)
+            rows = self.cursor.rowcount
+            # sales_daily n'a pas de version propre: les lecteurs du cumul (rapports en
+            # cache) suivent celle de stock_movements, dont il est dérivé
+            self.cursor.execute(
+                "UPDATE table_versions SET version = version + 1 WHERE table_name = 'stock_movements'"
+            )
+            self.connection.commit()
+            self.sync_table_versions(force=True)
+            self.analyze_after_bulk_write(rows, ['sales_daily'])
+            return rows
+
+        except Exception as e:
+            self.connection.rollback()
+            raise Exception(f"Erreur lors de la reconstruction du cumul des ventes: {str(e)}")
+
+    def has_statistics(self):
+        """Vérifie que ANALYZE a déjà été exécuté (statistiques du planificateur présentes)"""
+        return self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).fetchone() is not None
+
+    def analyze(self, tables=None):
+        """Met à jour les statistiques du planificateur (toute la base ou les tables données)"""
+        try:
+            started = time.perf_counter()
+            self.connection.commit()
+            for table in tables or [None]:
+                self.connection.execute(f"ANALYZE {table}" if table else "ANALYZE")
+            self.connection.commit()
+            elapsed = time.perf_counter() - started
+            logging.info(f"ANALYZE {', '.join(tables) if tables else 'complet'} en {elapsed * 1000:.0f} ms")
+            return elapsed
+        except Exception as e:
+            self.connection.rollback()
+            raise Exception(f"Erreur lors de l'analyse de la base: {str(e)}")
+
+    def analyze_after_bulk_write(self, rows, tables=None):
+        """Relance ANALYZE après une écriture en masse (archivage, reconstruction)"""
+        if rows >= config.DB_CONFIG['analyze_after_rows']:
+            self.analyze(tables)
+
+    def get_freelist_count(self):
+        """Nombre de pages libres dans le fichier"""
+        return self.connection.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def incremental_vacuum(self, pages):
+        """Rend au système au plus pages pages libres et retourne le nombre de pages libérées"""
+        try:
+            started = time.perf_counter()
+            before = self.get_freelist_count()
+            if not before:
+                return 0
+            self.connection.commit()
+            # Le pragma libère une page par pas d'exécution: executescript va jusqu'au bout
+            # (execute() s'arrête au premier pas, faute de colonnes de résultat)
+            self.connection.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+            after = self.get_freelist_count()
+            logging.info(
+                f"incremental_vacuum: {before - after} page(s) libérée(s) en "
+                f"{(time.perf_counter() - started) * 1000:.1f} ms, {after} restante(s)"
+            )
+            return before - after
+        except Exception as e:
+            raise Exception(f"Erreur lors du nettoyage incrémental: {str(e)}")
+
+    def get_data_version(self):
+        """Retourne PRAGMA data_version (change quand une autre connexion valide une écriture)"""
+        # Curseur séparé pour ne pas écraser lastrowid/rowcount de self.cursor
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def get_table_versions(self):
+        """Retourne les compteurs de version de chaque table surveillée"""
+        rows = self.connection.execute("SELECT table_name, version FROM table_versions").fetchall()
+        return {row['table_name']: row['version'] for row in rows}
+
+    def sync_table_versions(self, force=False):
+        """Transmet au cache les versions des tables si une autre connexion a écrit"""
+        data_version = self.get_data_version()
+        if force or data_version != self.data_version:
+            self.query_cache.update_versions(self.get_table_versions())
+            self.data_version = data_version
+
+    def get_current_versions(self, tables):
+        """Retourne les versions à jour d'une liste de tables"""
+        self.sync_table_versions()
+        return self.query_cache.snapshot(tables)
+
+    def execute_cached(self, query, params=None, tables=None):
+        """Exécute une requête de lecture en passant par le cache de résultats"""
+        try:
+            if tables is None:
+                tables = READ_TABLES_PATTERN.findall(query)
+            tables = tuple(sorted(set(table.lower() for table in tables)))
+
+            # Seules les tables versionnées peuvent être invalidées de façon fiable
+            if not tables or not set(tables).issubset(self.VERSIONED_TABLES):
+                return self.execute_query(query, params)
+
+            self.sync_table_versions()
+            key = (query, tuple(params) if params else ())
+            rows = self.query_cache.get(key)
+            if rows is None:
+                versions = self.query_cache.snapshot(tables)
+                rows = self.execute_query(query, params)
+                self.query_cache.put(key, tables, rows, versions)
+
+            return list(rows)
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de l'exécution de la requête: {str(e)}")
+
+    def after_write(self, query):
+        """Invalide le cache des tables touchées par une écriture validée sur cette connexion"""
+        match = WRITE_TABLE_PATTERN.match(query)
+        if match and match.group(1).lower() in self.VERSIONED_TABLES:
+            # data_version ne change pas pour nos propres écritures: forcer la relecture
+            self.sync_table_versions(force=True)
+
+    def get_cache_stats(self):
+        """Retourne les statistiques du cache de résultats (hits, misses, évictions)"""
+        return self.query_cache.get_stats()
+
     def create_default_admin(self):
         """Crée un utilisateur administrateur par défaut"""
         try:
@@ -179,6 +643,7 @@ class DatabaseManager:
             else:
                 self.cursor.execute(query)
             self.connection.commit()
+            self.after_write(query)
             return self.cursor.lastrowid
         except Exception as e:
             self.connection.rollback()
@@ -192,6 +657,7 @@ class DatabaseManager:
             else:
                 self.cursor.execute(query)
             self.connection.commit()
+            self.after_write(query)
             return self.cursor.rowcount
         except Exception as e:
             self.connection.rollback()
@@ -200,7 +666,15 @@ class DatabaseManager:
     def close(self):
         """Ferme la connexion à la base de données"""
         if self.connection:
+            try:
+                # Statistiques mises à jour selon les requêtes faites par cette connexion
+                # (impossible en lecture seule)
+                if not self.read_only:
+                    self.connection.execute("PRAGMA optimize")
+            except Exception:
+                pass
             self.connection.close()
+            self.connection = None
 
     def __del__(self):
         """Destructeur pour fermer automatiquement la connexion"""
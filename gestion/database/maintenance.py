@@ -0,0 +1,73 @@
+# gestion/database/maintenance.py
+"""
+Entretien de la base pendant les périodes d'inactivité (statistiques, pages libres)
+"""
+
+import time
+from gestion.config.config import config
+from gestion.database.database_manager import DatabaseManager
+from gestion.utils.events import event_bus, ALL
+
+class MaintenanceService:
+    def __init__(self, root, interval_ms=None, idle_seconds=None, pages_per_step=None):
+        """Initialise le service d'entretien"""
+        self.root = root
+        self.interval_ms = interval_ms or config.DB_CONFIG['maintenance_interval']
+        self.idle_seconds = idle_seconds if idle_seconds is not None else config.DB_CONFIG['maintenance_idle_seconds']
+        self.pages_per_step = pages_per_step or config.DB_CONFIG['vacuum_pages_per_step']
+        self.db = DatabaseManager()
+        self.data_version = None
+        self.last_activity = time.monotonic()
+        self.job = None
+        self.unsubscribe = None
+
+    def start(self):
+        """Démarre l'entretien périodique"""
+        self.data_version = self.db.get_data_version()
+        self.unsubscribe = event_bus.subscribe(ALL, self.on_activity)
+        self.schedule()
+
+    def stop(self):
+        """Arrête l'entretien et ferme la connexion (PRAGMA optimize)"""
+        if self.job is not None:
+            try:
+                self.root.after_cancel(self.job)
+            except Exception:
+                # Fenêtre déjà détruite: plus rien de planifié
+                pass
+            self.job = None
+        if self.unsubscribe:
+            self.unsubscribe()
+            self.unsubscribe = None
+        self.db.close()
+
+    def schedule(self):
+        """Planifie la prochaine étape sur la boucle Tk"""
+        self.job = self.root.after(self.interval_ms, self.poll)
+
+    def on_activity(self, event):
+        """Une écriture locale repousse l'entretien"""
+        self.last_activity = time.monotonic()
+
+    def poll(self):
+        """Exécute une étape d'entretien si le poste est inactif"""
+        try:
+            self.run_idle_step()
+        except Exception as e:
+            print(f"Erreur lors de l'entretien de la base: {e}")
+        finally:
+            self.schedule()
+
+    def is_idle(self):
+        """Aucune écriture locale ni d'un autre poste depuis idle_seconds"""
+        data_version = self.db.get_data_version()
+        if data_version != self.data_version:
+            self.data_version = data_version
+            self.last_activity = time.monotonic()
+        return time.monotonic() - self.last_activity >= self.idle_seconds
+
+    def run_idle_step(self):
+        """Libère un petit lot de pages libres (quelques millisecondes au plus)"""
+        if not config.DB_CONFIG['auto_vacuum'] or not self.is_idle():
+            return 0
+        return self.db.incremental_vacuum(self.pages_per_step)
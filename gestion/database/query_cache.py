@@ -0,0 +1,96 @@
+# gestion/database/query_cache.py
+"""
+Cache LRU des résultats de requêtes, invalidé par les compteurs de version des tables
+"""
+
+import threading
+from collections import OrderedDict
+
+class QueryCache:
+    def __init__(self, max_entries=128):
+        """Initialise le cache"""
+        self.max_entries = max_entries
+        # clé (requête, paramètres) -> (tables lues, versions au moment de la lecture, lignes)
+        self.entries = OrderedDict()
+        # Dernière version connue de chaque table
+        self.table_versions = {}
+        self.lock = threading.Lock()
+
+        # Statistiques
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Retourne les lignes en cache ou None si absentes ou obsolètes"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            tables, versions, rows = entry
+            if versions != self._versions_of(tables):
+                del self.entries[key]
+                self.invalidations += 1
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return rows
+
+    def snapshot(self, tables):
+        """Versions des tables à mémoriser avant d'exécuter la requête"""
+        with self.lock:
+            return self._versions_of(tables)
+
+    def put(self, key, tables, rows, versions):
+        """Ajoute un résultat au cache en évinçant les entrées les moins récemment utilisées"""
+        with self.lock:
+            # Une écriture a eu lieu pendant la lecture: résultat déjà obsolète
+            if versions != self._versions_of(tables):
+                return
+            self.entries[key] = (tables, versions, rows)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def update_versions(self, versions):
+        """Enregistre les nouvelles versions et supprime les entrées des tables modifiées"""
+        with self.lock:
+            changed = {table for table, version in versions.items()
+                       if self.table_versions.get(table) != version}
+            if not changed:
+                return
+            self.table_versions.update(versions)
+
+            stale = [key for key, (tables, _, _) in self.entries.items() if changed.intersection(tables)]
+            for key in stale:
+                del self.entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """Vide le cache"""
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        """Retourne les statistiques d'utilisation du cache"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0
+            }
+
+    def _versions_of(self, tables):
+        """Versions actuellement connues des tables (appelé sous verrou)"""
+        return tuple(self.table_versions.get(table) for table in tables)
@@ -0,0 +1,88 @@
+# gestion/database/restore.py
+"""
+Restauration d'une base à partir d'une sauvegarde complète compressée et d'un incrément
+
+Usage: python -m gestion.database.restore <sauvegarde .db.xz ou .pages.xz> <base restaurée> [--overwrite]
+"""
+
+import argparse
+import lzma
+import os
+import shutil
+import sqlite3
+from gestion.database.backup_service import (
+    BackupService, FULL_EXTENSION, INCREMENT_EXTENSION, PAGE_RECORD
+)
+
+# Taille des blocs lus lors de la décompression
+CHUNK_SIZE = 1024 * 1024
+
+def restore_backup(backup_path, target_path, overwrite=False):
+    """Reconstruit la base au moment d'une sauvegarde (complète, incrémentale ou copie .db)"""
+    if os.path.exists(target_path) and not overwrite:
+        raise Exception(f"Le fichier {target_path} existe déjà")
+
+    temp_path = target_path + ".restore"
+    try:
+        if backup_path.endswith(INCREMENT_EXTENSION):
+            header = BackupService.read_increment_header(backup_path)
+            base_path = os.path.join(os.path.dirname(backup_path), header['base'])
+            if not os.path.exists(base_path):
+                raise Exception(f"Sauvegarde complète introuvable: {header['base']}")
+            decompress(base_path, temp_path)
+            apply_increment(backup_path, temp_path, header)
+        elif backup_path.endswith(FULL_EXTENSION):
+            decompress(backup_path, temp_path)
+        else:
+            shutil.copyfile(backup_path, temp_path)
+
+        connection = sqlite3.connect(temp_path)
+        try:
+            result = connection.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            connection.close()
+        if result != 'ok':
+            raise Exception(f"Base restaurée corrompue (quick_check: {result})")
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise Exception(f"Erreur lors de la restauration: {str(e)}")
+
+    os.replace(temp_path, target_path)
+    return target_path
+
+def decompress(compressed_path, target_path):
+    """Décompresse une sauvegarde complète par blocs"""
+    with lzma.open(compressed_path, 'rb') as source, open(target_path, 'wb') as target:
+        shutil.copyfileobj(source, target, CHUNK_SIZE)
+
+def apply_increment(increment_path, db_path, header):
+    """Écrit les pages d'un incrément sur la base complète puis l'ajuste à sa taille"""
+    page_size = header['page_size']
+    with lzma.open(increment_path, 'rb') as source, open(db_path, 'r+b') as target:
+        source.readline()
+        while True:
+            record = source.read(PAGE_RECORD.size)
+            if not record:
+                break
+            page_number, = PAGE_RECORD.unpack(record)
+            page = source.read(page_size)
+            if len(page) != page_size:
+                raise Exception("Incrément tronqué")
+            target.seek((page_number - 1) * page_size)
+            target.write(page)
+        target.truncate(header['page_count'] * page_size)
+
+def main():
+    """Point d'entrée en ligne de commande"""
+    parser = argparse.ArgumentParser(description="Restaure une sauvegarde de la base d'inventaire")
+    parser.add_argument('backup', help="sauvegarde complète (.db.xz), incrément (.pages.xz) ou copie (.db)")
+    parser.add_argument('target', help="chemin de la base restaurée")
+    parser.add_argument('--overwrite', action='store_true', help="remplacer le fichier cible s'il existe")
+    args = parser.parse_args()
+
+    path = restore_backup(args.backup, args.target, args.overwrite)
+    print(f"✅ Base restaurée: {path}")
+
+if __name__ == "__main__":
+    main()
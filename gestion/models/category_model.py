@@ -30,7 +30,7 @@ class CategoryModel:
                 GROUP BY c.categories_id, c.name
                 ORDER BY c.name
             """
-            return self.db.execute_query(query)
+            return self.db.execute_cached(query)
 
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des catégories: {str(e)}")
@@ -0,0 +1,51 @@
+# gestion/models/dashboard_model.py
+"""
+Modèle pour les statistiques agrégées du tableau de bord
+"""
+
+from datetime import datetime, timezone
+from gestion.database.database_manager import DatabaseManager
+
+class DashboardModel:
+    def __init__(self):
+        """Initialise le modèle du tableau de bord"""
+        self.db = DatabaseManager()
+
+    def get_dashboard_stats(self):
+        """Récupère toutes les statistiques du tableau de bord en une seule requête"""
+        try:
+            # created_at est en UTC (CURRENT_TIMESTAMP) : le jour local commence à minuit
+            # local converti en UTC, ce qui garde l'index sur created_at utilisable
+            midnight = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+            today = midnight.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+            # Le résultat reste en cache jusqu'à la prochaine écriture sur products ou
+            # stock_movements (ou jusqu'au jour suivant, la borne faisant partie de la clé)
+            query = """
+                SELECT
+                    p.total_products,
+                    p.stock_value,
+                    p.low_stock_count,
+                    (SELECT COUNT(*) FROM stock_movements) as total_movements,
+                    t.today_movements,
+                    t.today_sales_count,
+                    t.today_sales_amount
+                FROM (
+                    SELECT COUNT(*) as total_products,
+                           COALESCE(SUM(quantity * purchase_price), 0) as stock_value,
+                           COALESCE(SUM(quantity <= min_stock_level), 0) as low_stock_count
+                    FROM products
+                ) p,
+                (
+                    SELECT COUNT(*) as today_movements,
+                           COALESCE(SUM(movement_type = 'OUT'), 0) as today_sales_count,
+                           COALESCE(SUM(CASE WHEN movement_type = 'OUT' THEN total_amount END), 0) as today_sales_amount
+                    FROM stock_movements
+                    WHERE created_at >= ?
+                ) t
+            """
+            result = self.db.execute_cached(query, (today,))
+            return dict(result[0])
+
+        except Exception as e:
+            raise Exception(f"Erreur lors du calcul des statistiques du tableau de bord: {str(e)}")
@@ -0,0 +1,491 @@
+# gestion/models/product_catalog.py
+"""
+Index en mémoire du catalogue produits pour les recherches rapides (caisse)
+"""
+
+import os
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain
+from gestion.utils.helpers import normalize_search_text
+
+def extract_trigrams(text):
+    """Trigrammes d'un texte normalisé, chaque mot étant bordé d'espaces ("  mot ")"""
+    trigrams = set()
+    for word in normalize_search_text(text).split():
+        padded = f"  {word} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+class ProductCatalog:
+    """Catalogue stocké en colonnes (tableaux compacts) avec index par ID, nom et catégorie"""
+
+    __slots__ = (
+        'ids', 'names', 'categories_ids', 'category_names', 'purchase_prices',
+        'selling_prices', 'quantities', 'min_stock_levels', 'created_at', 'last_updated',
+        'skus', 'barcodes', 'row_by_id', 'name_index', 'category_index', 'code_index',
+        'codes_by_product', 'trigram_index', 'trigram_counts',
+        'free_rows', 'versions', 'snapshot', 'warmup', 'lock'
+    )
+
+    # Un catalogue partagé par fichier de base de données
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    # Tables dont dépend le contenu du catalogue
+    TABLES = ('categories', 'products', 'product_barcodes')
+
+    # Rafraîchissement: produits relus s'ils ont été modifiés jusqu'à cette marge avant
+    # la dernière modification connue (transactions en cours, horloges des postes)
+    REFRESH_MARGIN_SECONDS = 60
+
+    # Recherche approchée: nombre d'entrées d'index parcourues au plus (au-delà des
+    # FUZZY_MIN_TRIGRAMS trigrammes les plus rares) et candidats reclassés par résultat
+    FUZZY_CANDIDATE_BUDGET = 20000
+    FUZZY_MIN_TRIGRAMS = 3
+    FUZZY_CANDIDATE_FACTOR = 5
+
+    def __init__(self):
+        """Initialise un catalogue vide"""
+        self.lock = threading.RLock()
+        # Thread de préparation (chargement et index des trigrammes) en cours
+        self.warmup = None
+        self.clear()
+
+    @classmethod
+    def for_database(cls, db_path):
+        """Retourne le catalogue partagé associé à une base de données"""
+        key = os.path.abspath(db_path)
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls()
+            return cls._instances[key]
+
+    def clear(self):
+        """Vide le catalogue"""
+        with self.lock:
+            # Colonnes: une ligne par produit, les lignes libérées sont réutilisées
+            self.ids = array('q')
+            self.categories_ids = array('q')
+            self.quantities = array('q')
+            self.min_stock_levels = array('q')
+            self.purchase_prices = array('d')
+            self.selling_prices = array('d')
+            self.names = []
+            self.category_names = []
+            self.created_at = []
+            self.last_updated = []
+            self.skus = []
+            self.barcodes = []
+
+            # Index
+            self.row_by_id = {}
+            self.name_index = []  # liste triée de (nom normalisé, products_id)
+            self.category_index = {}  # categories_id -> ensemble de products_id
+            self.code_index = {}  # SKU ou code-barres -> products_id
+            self.codes_by_product = {}  # products_id -> codes enregistrés dans code_index
+            # trigramme -> ensemble de products_id, construit à la première recherche approchée
+            self.trigram_index = None
+            self.trigram_counts = array('I')
+            self.free_rows = []
+
+            # Versions des tables au moment du chargement (None: non chargé)
+            self.versions = None
+            # Produits modifiés depuis cette date (last_updated) à relire au prochain rafraîchissement
+            self.snapshot = None
+
+    def is_loaded(self, versions):
+        """Vérifie que le catalogue correspond aux versions actuelles des tables"""
+        return self.versions is not None and self.versions == versions
+
+    def is_ready(self):
+        """Catalogue chargé et index des trigrammes construit (lecture sans verrou)"""
+        return self.versions is not None and self.trigram_index is not None
+
+    def load(self, products, versions, extra_barcodes=(), snapshot=None):
+        """Charge entièrement le catalogue à partir des lignes de la base"""
+        barcodes_by_product = self.group_barcodes(extra_barcodes)
+
+        with self.lock:
+            # Un index des trigrammes déjà utilisé est reconstruit avec le catalogue
+            # plutôt qu'à la première recherche approchée qui suit
+            had_trigrams = self.trigram_index is not None
+            self.clear()
+            for product in products:
+                self._insert(product, barcodes_by_product.get(product['products_id'], ()))
+            self.name_index.sort()
+            if had_trigrams:
+                self._build_trigram_index()
+            self.versions = versions
+            self.snapshot = snapshot
+
+    def refresh(self, changed_products, removed_ids, versions, snapshot, extra_barcodes=None, category_names=None):
+        """Répercute les écritures des autres postes: produits modifiés ou supprimés seulement
+
+        extra_barcodes (tous les codes secondaires) n'est fourni que si product_barcodes a changé,
+        category_names (categories_id -> nom) que si categories a changé.
+        """
+        with self.lock:
+            for product_id in removed_ids:
+                if product_id in self.row_by_id:
+                    self._remove(product_id)
+
+            changed_ids = set()
+            barcodes_by_product = self.group_barcodes(extra_barcodes or ())
+            for product in changed_products:
+                product_id = product['products_id']
+                changed_ids.add(product_id)
+                extras = None if extra_barcodes is None else barcodes_by_product.get(product_id, ())
+                # Relu à cause de la marge mais inchangé: rien à réindexer
+                if not self._is_current(product, extras):
+                    self._replace(product, self.extra_codes(product_id) if extras is None else extras)
+
+            if extra_barcodes is not None:
+                # Codes secondaires ajoutés ou retirés sans modification du produit
+                for product_id in set(barcodes_by_product).union(self.codes_by_product) - changed_ids:
+                    row = self.row_by_id.get(product_id)
+                    extras = barcodes_by_product.get(product_id, ())
+                    if row is not None and set(self.extra_codes(product_id)) != set(extras):
+                        self._replace(self._row_to_dict(row), extras)
+
+            if category_names is not None:
+                for row in self.row_by_id.values():
+                    self.category_names[row] = category_names.get(self.categories_ids[row])
+
+            self.versions = versions
+            self.snapshot = snapshot
+
+    @staticmethod
+    def group_barcodes(extra_barcodes):
+        """Codes secondaires regroupés par produit"""
+        barcodes_by_product = {}
+        for row in extra_barcodes:
+            barcodes_by_product.setdefault(row['product_id'], []).append(row['barcode'])
+        return barcodes_by_product
+
+    def extra_codes(self, product_id):
+        """Codes secondaires d'un produit (hors SKU et code-barres principal)"""
+        row = self.row_by_id.get(product_id)
+        if row is None:
+            return []
+        main_codes = (self.skus[row], self.barcodes[row])
+        return [code for code in self.codes_by_product.get(product_id, ()) if code not in main_codes]
+
+    def product_ids(self):
+        """IDs des produits du catalogue"""
+        with self.lock:
+            return list(self.row_by_id)
+
+    def upsert(self, product, versions_before, versions_after, extra_barcodes=()):
+        """Répercute l'ajout ou la modification d'un produit écrit par cette application"""
+        if self.versions is None:
+            # Pas encore chargé (ou chargement en cours dans un autre thread): rien à attendre
+            return
+        with self.lock:
+            if not self._accept_write(versions_before):
+                return
+            self._replace(product, extra_barcodes)
+            self.versions = versions_after
+
+    def remove(self, product_id, versions_before, versions_after):
+        """Répercute la suppression d'un produit"""
+        if self.versions is None:
+            return
+        with self.lock:
+            if not self._accept_write(versions_before):
+                return
+            if product_id in self.row_by_id:
+                self._remove(product_id)
+            self.versions = versions_after
+
+    def _accept_write(self, versions_before):
+        """Une mise à jour incrémentale n'est valable que si le catalogue était à jour avant l'écriture"""
+        if self.versions is None:
+            # Pas encore chargé: il sera lu entièrement à la prochaine recherche
+            return False
+        if self.versions != versions_before:
+            # Modifié entre-temps par un autre poste: le prochain rafraîchissement
+            # relira ce produit avec les autres modifications
+            return False
+        return True
+
+    def get(self, product_id):
+        """Retourne un produit par son ID (O(1))"""
+        with self.lock:
+            row = self.row_by_id.get(product_id)
+            return self._row_to_dict(row) if row is not None else None
+
+    def get_by_code(self, code):
+        """Retourne un produit par SKU ou code-barres (O(1))"""
+        with self.lock:
+            product_id = self.code_index.get(code)
+            return self._row_to_dict(self.row_by_id[product_id]) if product_id is not None else None
+
+    def search_prefix(self, prefix, limit=20):
+        """Retourne les produits dont le nom commence par le préfixe (recherche dichotomique)"""
+        key = normalize_search_text(prefix)
+        with self.lock:
+            results = []
+            position = bisect_left(self.name_index, (key,))
+            while position < len(self.name_index) and len(results) < limit:
+                name, product_id = self.name_index[position]
+                if not name.startswith(key):
+                    break
+                results.append(self._row_to_dict(self.row_by_id[product_id]))
+                position += 1
+            return results
+
+    def search_fuzzy(self, text, limit=20, min_similarity=0.3):
+        """Recherche tolérante aux fautes: produits classés par similarité de trigrammes (Dice)"""
+        query_trigrams = extract_trigrams(text)
+        if not query_trigrams:
+            return []
+
+        with self.lock:
+            if self.trigram_index is None:
+                self._build_trigram_index()
+
+            # Candidats: produits partageant les trigrammes les plus rares (les plus
+            # fréquents, comme " co", ne départagent rien et coûtent le plus cher)
+            postings = sorted((self.trigram_index[t] for t in query_trigrams if t in self.trigram_index), key=len)
+            selected = []
+            size = 0
+            for products in postings:
+                if len(selected) >= self.FUZZY_MIN_TRIGRAMS and size + len(products) > self.FUZZY_CANDIDATE_BUDGET:
+                    break
+                selected.append(products)
+                size += len(products)
+            candidates = Counter(chain.from_iterable(selected)).most_common(limit * self.FUZZY_CANDIDATE_FACTOR)
+
+            # Classement exact sur tous les trigrammes de la requête
+            query_count = len(query_trigrams)
+            scored = []
+            for product_id, _ in candidates:
+                common = sum(product_id in products for products in postings)
+                row = self.row_by_id[product_id]
+                similarity = 2 * common / (query_count + self.trigram_counts[row])
+                if similarity >= min_similarity:
+                    scored.append((similarity, product_id))
+
+            scored.sort(key=lambda item: (-item[0], self.names[self.row_by_id[item[1]]]))
+            results = []
+            for similarity, product_id in scored[:limit]:
+                product = self._row_to_dict(self.row_by_id[product_id])
+                product['similarity'] = round(similarity, 3)
+                results.append(product)
+            return results
+
+    def get_by_category(self, category_id):
+        """Retourne les produits d'une catégorie, triés par nom"""
+        with self.lock:
+            rows = [self.row_by_id[product_id] for product_id in self.category_index.get(category_id, ())]
+            return sorted((self._row_to_dict(row) for row in rows), key=lambda p: p['name'])
+
+    def __len__(self):
+        return len(self.row_by_id)
+
+    def __contains__(self, product_id):
+        return product_id in self.row_by_id
+
+    def _is_current(self, product, extra_barcodes=None):
+        """Vérifie qu'un produit lu en base est identique à sa ligne du catalogue (codes secondaires si fournis)"""
+        row = self.row_by_id.get(product['products_id'])
+        if row is None:
+            return False
+        # Colonnes les plus souvent modifiées (ventes) en premier
+        if (self.last_updated[row] != product['last_updated'] or self.quantities[row] != (product['quantity'] or 0)
+                or self.names[row] != product['name']):
+            return False
+        if extra_barcodes is not None and set(self.extra_codes(product['products_id'])) != set(extra_barcodes):
+            return False
+        current = self._row_to_dict(row)
+        return all(current[key] == product[key] for key in current)
+
+    def _replace(self, product, extra_barcodes=()):
+        """Ajoute un produit ou remplace sa ligne, index des noms compris"""
+        product_id = product['products_id']
+        row = self.row_by_id.get(product_id)
+        if row is not None and self.names[row] == product['name']:
+            # Nom inchangé (vente, prix, stock): ligne modifiée sur place, l'index des
+            # noms et celui des trigrammes restent valables
+            self._update(row, product, extra_barcodes)
+            return row
+
+        if row is not None:
+            self._remove(product_id)
+        row = self._insert(product, extra_barcodes)
+        insort(self.name_index, (normalize_search_text(self.names[row]), product['products_id']))
+        return row
+
+    def _column_values(self, product):
+        """Valeurs d'un produit pour chaque colonne du catalogue"""
+        return (
+            (self.ids, product['products_id']),
+            (self.categories_ids, product['categories_id'] or 0),
+            (self.quantities, product['quantity'] or 0),
+            (self.min_stock_levels, product['min_stock_level'] or 0),
+            (self.purchase_prices, product['purchase_price'] or 0),
+            (self.selling_prices, product['selling_price'] or 0),
+            (self.names, product['name']),
+            (self.category_names, product['category_name']),
+            (self.created_at, product['created_at']),
+            (self.last_updated, product['last_updated']),
+            (self.skus, product['sku']),
+            (self.barcodes, product['barcode'])
+        )
+
+    def _update(self, row, product, extra_barcodes=()):
+        """Réécrit la ligne d'un produit dont le nom n'a pas changé"""
+        product_id = product['products_id']
+        old_category_id = self.categories_ids[row]
+        for column, value in self._column_values(product):
+            column[row] = value
+
+        category_id = self.categories_ids[row]
+        if category_id != old_category_id:
+            products = self.category_index.get(old_category_id)
+            if products:
+                products.discard(product_id)
+                if not products:
+                    del self.category_index[old_category_id]
+            self.category_index.setdefault(category_id, set()).add(product_id)
+
+        self._unindex_codes(product_id)
+        self._index_codes(product, extra_barcodes)
+
+    def _insert(self, product, extra_barcodes=()):
+        """Écrit un produit dans une ligne libre (sans trier l'index des noms)"""
+        product_id = product['products_id']
+        category_id = product['categories_id'] or 0
+        values = self._column_values(product) + ((self.trigram_counts, 0),)
+
+        if self.free_rows:
+            row = self.free_rows.pop()
+            for column, value in values:
+                column[row] = value
+        else:
+            row = len(self.ids)
+            for column, value in values:
+                column.append(value)
+
+        self.row_by_id[product_id] = row
+        self.category_index.setdefault(category_id, set()).add(product_id)
+        self._index_codes(product, extra_barcodes)
+        if self.trigram_index is not None:
+            self._index_trigrams(row, product_id)
+        if self.versions is None:
+            # Chargement initial: l'index est trié une seule fois à la fin
+            self.name_index.append((normalize_search_text(product['name']), product_id))
+        return row
+
+    def _remove(self, product_id):
+        """Libère la ligne d'un produit et le retire des index"""
+        row = self.row_by_id.pop(product_id)
+        key = (normalize_search_text(self.names[row]), product_id)
+        position = bisect_left(self.name_index, key)
+        if position < len(self.name_index) and self.name_index[position] == key:
+            del self.name_index[position]
+
+        self._unindex_codes(product_id)
+
+        if self.trigram_index is not None:
+            for trigram in extract_trigrams(self.names[row]):
+                products = self.trigram_index.get(trigram)
+                if products:
+                    products.discard(product_id)
+                    if not products:
+                        del self.trigram_index[trigram]
+
+        category_id = self.categories_ids[row]
+        products = self.category_index.get(category_id)
+        if products:
+            products.discard(product_id)
+            if not products:
+                del self.category_index[category_id]
+
+        self.ids[row] = 0
+        self.names[row] = None
+        self.free_rows.append(row)
+
+    def _index_codes(self, product, extra_barcodes=()):
+        """Enregistre le SKU et les codes-barres d'un produit"""
+        codes = [code for code in (product['sku'], product['barcode'], *extra_barcodes) if code]
+        for code in codes:
+            self.code_index[code] = product['products_id']
+        self.codes_by_product[product['products_id']] = codes
+
+    def _unindex_codes(self, product_id):
+        """Retire les codes d'un produit de l'index"""
+        for code in self.codes_by_product.pop(product_id, ()):
+            if self.code_index.get(code) == product_id:
+                del self.code_index[code]
+
+    def build_search_index(self):
+        """Construit l'index des trigrammes hors verrou (thread d'arrière-plan) puis l'installe
+
+        Les recherches et les ventes ne sont pas bloquées pendant la construction; les
+        produits modifiés entre-temps sont réindexés au moment de l'installation.
+        """
+        with self.lock:
+            if self.trigram_index is not None:
+                return
+            names = {product_id: (row, self.names[row]) for product_id, row in self.row_by_id.items()}
+
+        index = {}
+        counts = {}
+        for product_id, (row, name) in names.items():
+            trigrams = extract_trigrams(name)
+            counts[product_id] = len(trigrams)
+            for trigram in trigrams:
+                index.setdefault(trigram, set()).add(product_id)
+
+        with self.lock:
+            if self.trigram_index is not None:
+                return
+            # Produits supprimés ou renommés pendant la construction
+            for product_id, (row, name) in names.items():
+                if self.row_by_id.get(product_id) != row or self.names[row] != name:
+                    for trigram in extract_trigrams(name):
+                        products = index.get(trigram)
+                        if products:
+                            products.discard(product_id)
+                            if not products:
+                                del index[trigram]
+            self.trigram_index = index
+            for product_id, row in self.row_by_id.items():
+                if names.get(product_id) == (row, self.names[row]):
+                    self.trigram_counts[row] = counts[product_id]
+                else:
+                    self._index_trigrams(row, product_id)
+
+    def _build_trigram_index(self):
+        """Construit l'index des trigrammes de tous les noms (appelé sous verrou)"""
+        self.trigram_index = {}
+        for product_id, row in self.row_by_id.items():
+            self._index_trigrams(row, product_id)
+
+    def _index_trigrams(self, row, product_id):
+        """Ajoute les trigrammes du nom d'une ligne à l'index"""
+        trigrams = extract_trigrams(self.names[row])
+        self.trigram_counts[row] = len(trigrams)
+        for trigram in trigrams:
+            self.trigram_index.setdefault(trigram, set()).add(product_id)
+
+    def _row_to_dict(self, row):
+        """Reconstruit un produit au format de ProductModel.get_product_by_id"""
+        return {
+            'products_id': self.ids[row],
+            'name': self.names[row],
+            'categories_id': self.categories_ids[row] or None,
+            'purchase_price': self.purchase_prices[row],
+            'selling_price': self.selling_prices[row],
+            'quantity': self.quantities[row],
+            'min_stock_level': self.min_stock_levels[row],
+            'created_at': self.created_at[row],
+            'last_updated': self.last_updated[row],
+            'sku': self.skus[row],
+            'barcode': self.barcodes[row],
+            'category_name': self.category_names[row]
+        }
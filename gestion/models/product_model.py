@@ -4,21 +4,132 @@ Modèle pour la gestion des produits et du stock
 """
 
 from gestion.database.database_manager import DatabaseManager
+from gestion.database.archive_manager import ArchiveManager
+from gestion.models.product_catalog import ProductCatalog
+from gestion.utils.helpers import normalize_search_text
 from datetime import datetime
+import threading
 
-class ProductModel:
-    def __init__(self):
-        """Initialise le modèle produit"""
-        self.db = DatabaseManager()
+def build_fts_query(text):
+    """Construit une requête FTS5 de préfixes ("coca 1,5" -> "coca"* "1"* "5"*)"""
+    return ' '.join(f'"{token}"*' for token in normalize_search_text(text).split())
+
+# Produits du catalogue en mémoire avec le nom de leur catégorie
+CATALOG_QUERY = """
+    SELECT p.*, c.name as category_name
+    FROM products p
+    LEFT JOIN categories c ON p.categories_id = c.categories_id
+"""
 
-    def create_product(self, name, category_id, purchase_price, selling_price, initial_quantity=0, min_stock_level=5):
+class ProductModel:
+    def __init__(self, db=None):
+        """Initialise le modèle produit (db: connexion à utiliser, une nouvelle par défaut)"""
+        self.db = db or DatabaseManager()
+        self.catalog = ProductCatalog.for_database(self.db.db_path)
+        self.archives = ArchiveManager(self.db)
+
+    def get_catalog(self):
+        """Retourne le catalogue en mémoire, mis à jour si la base a changé"""
+        versions = self.db.get_current_versions(ProductCatalog.TABLES)
+        if self.catalog.is_loaded(versions):
+            return self.catalog
+
+        with self.catalog.lock:
+            if self.catalog.versions is None:
+                snapshot = self.catalog_snapshot()
+                extra_barcodes = self.db.execute_query("SELECT barcode, product_id FROM product_barcodes")
+                self.catalog.load(self.iter_catalog_rows(), versions, extra_barcodes, snapshot)
+            elif not self.catalog.is_loaded(versions):
+                self.refresh_catalog(versions)
+        return self.catalog
+
+    def iter_catalog_rows(self, batch_size=5000):
+        """Parcourt les produits par lots de clés: une vente n'attend jamais la lecture complète du catalogue"""
+        last_id = 0
+        while True:
+            rows = self.db.execute_query(
+                CATALOG_QUERY + " WHERE p.products_id > ? ORDER BY p.products_id LIMIT ?", (last_id, batch_size)
+            )
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]['products_id']
+
+    def start_catalog_warmup(self):
+        """Charge le catalogue et son index des trigrammes dans un thread (une fois par base)"""
+        if self.catalog.is_ready() or (self.catalog.warmup is not None and self.catalog.warmup.is_alive()):
+            return
+        self.catalog.warmup = threading.Thread(target=self.warm_catalog, name="catalog-warmup", daemon=True)
+        self.catalog.warmup.start()
+
+    def warm_catalog(self):
+        """Prépare le catalogue sur une connexion dédiée (thread d'arrière-plan)"""
+        db = DatabaseManager(self.db.db_path)
+        try:
+            ProductModel(db).get_catalog().build_search_index()
+        except Exception as e:
+            print(f"⚠️ Préparation du catalogue interrompue: {e}")
+        finally:
+            db.close()
+
+    def catalog_snapshot(self):
+        """Date à partir de laquelle relire les produits modifiés au prochain rafraîchissement"""
+        result = self.db.execute_query(
+            "SELECT datetime(MAX(last_updated), ?) FROM products",
+            (f"-{ProductCatalog.REFRESH_MARGIN_SECONDS} seconds",)
+        )
+        return result[0][0] or ''
+
+    def refresh_catalog(self, versions):
+        """Met à jour le catalogue avec les seuls produits modifiés par un autre poste"""
+        previous = self.catalog.versions
+        snapshot = self.catalog_snapshot()
+        changed = self.db.execute_query(CATALOG_QUERY + " WHERE p.last_updated >= ?", (self.catalog.snapshot or '',))
+
+        # Suppressions: visibles seulement par le nombre de produits restants
+        new_count = sum(1 for product in changed if product['products_id'] not in self.catalog)
+        count = self.db.execute_query("SELECT COUNT(*) FROM products")[0][0]
+        removed_ids = []
+        if len(self.catalog) + new_count != count:
+            existing = {row[0] for row in self.db.execute_query("SELECT products_id FROM products")}
+            removed_ids = [product_id for product_id in self.catalog.product_ids() if product_id not in existing]
+
+        category_names = None
+        if versions[0] != previous[0]:
+            category_names = {row['categories_id']: row['name']
+                              for row in self.db.execute_query("SELECT categories_id, name FROM categories")}
+        extra_barcodes = None
+        if versions[2] != previous[2]:
+            extra_barcodes = self.db.execute_query("SELECT barcode, product_id FROM product_barcodes")
+
+        self.catalog.refresh(changed, removed_ids, versions, snapshot, extra_barcodes, category_names)
+
+    def catalog_versions(self):
+        """Versions des tables du catalogue, à relever avant une écriture"""
+        return self.db.get_current_versions(ProductCatalog.TABLES)
+
+    def sync_catalog(self, product_id, versions_before):
+        """Répercute dans le catalogue une écriture faite par ce modèle"""
+        versions_after = self.db.get_current_versions(ProductCatalog.TABLES)
+        result = self.db.execute_query(CATALOG_QUERY + " WHERE p.products_id = ?", (product_id,))
+        if result:
+            extra_barcodes = [row['barcode'] for row in self.get_product_barcodes(product_id)]
+            self.catalog.upsert(result[0], versions_before, versions_after, extra_barcodes)
+        else:
+            self.catalog.remove(product_id, versions_before, versions_after)
+
+    def create_product(self, name, category_id, purchase_price, selling_price, initial_quantity=0, min_stock_level=5,
+                       sku=None, barcode=None):
         """Crée un nouveau produit"""
         try:
             query = """
-                INSERT INTO products (name, categories_id, purchase_price, selling_price, quantity, min_stock_level)
-                VALUES (?, ?, ?, ?, ?, ?)
+                INSERT INTO products (name, categories_id, purchase_price, selling_price, quantity, min_stock_level, sku, barcode)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """
-            product_id = self.db.execute_insert(query, (name, category_id, purchase_price, selling_price, initial_quantity, min_stock_level))
+            versions_before = self.catalog_versions()
+            product_id = self.db.execute_insert(query, (name, category_id, purchase_price, selling_price, initial_quantity,
+                                                        min_stock_level, sku, barcode))
+            self.sync_catalog(product_id, versions_before)
 
             # Si une quantité initiale est fournie, créer un mouvement de stock
             if initial_quantity > 0:
@@ -29,8 +140,8 @@ class ProductModel:
         except Exception as e:
             raise Exception(f"Erreur lors de la création du produit: {str(e)}")
 
-    def get_all_products(self):
-        """Récupère tous les produits avec leurs catégories"""
+    def get_all_products(self, limit=None):
+        """Récupère tous les produits avec leurs catégories (les limit premiers par nom si précisé)"""
         try:
             query = """
                 SELECT p.products_id, p.name, p.purchase_price, p.selling_price, 
@@ -40,35 +151,42 @@ class ProductModel:
                 LEFT JOIN categories c ON p.categories_id = c.categories_id
                 ORDER BY p.name
             """
+            if limit:
+                return self.db.execute_query(query + " LIMIT ?", (limit,))
             return self.db.execute_query(query)
 
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des produits: {str(e)}")
 
     def get_product_by_id(self, product_id):
-        """Récupère un produit par son ID"""
+        """Récupère un produit par son ID (depuis le catalogue en mémoire s'il est à jour)"""
         try:
-            query = """
-                SELECT p.*, c.name as category_name
-                FROM products p
-                LEFT JOIN categories c ON p.categories_id = c.categories_id
-                WHERE p.products_id = ?
-            """
-            result = self.db.execute_query(query, (product_id,))
+            if self.catalog.is_loaded(self.catalog_versions()):
+                return self.catalog.get(product_id)
+
+            # Catalogue périmé ou pas encore chargé (vente, écriture d'un autre poste):
+            # une ligne lue par sa clé primaire, le catalogue sera rafraîchi par les recherches
+            result = self.db.execute_query(CATALOG_QUERY + " WHERE p.products_id = ?", (product_id,))
             return dict(result[0]) if result else None
 
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération du produit: {str(e)}")
 
-    def update_product(self, product_id, name, category_id, purchase_price, selling_price, min_stock_level):
+    def update_product(self, product_id, name, category_id, purchase_price, selling_price, min_stock_level,
+                       sku=None, barcode=None):
         """Met à jour un produit"""
         try:
             query = """
                 UPDATE products 
-                SET name = ?, categories_id = ?, purchase_price = ?, selling_price = ?, min_stock_level = ?
+                SET name = ?, categories_id = ?, purchase_price = ?, selling_price = ?, min_stock_level = ?,
+                    sku = ?, barcode = ?
                 WHERE products_id = ?
             """
-            return self.db.execute_update(query, (name, category_id, purchase_price, selling_price, min_stock_level, product_id))
+            versions_before = self.catalog_versions()
+            rows_affected = self.db.execute_update(query, (name, category_id, purchase_price, selling_price, min_stock_level,
+                                                           sku, barcode, product_id))
+            self.sync_catalog(product_id, versions_before)
+            return rows_affected
 
         except Exception as e:
             raise Exception(f"Erreur lors de la mise à jour du produit: {str(e)}")
@@ -83,8 +201,15 @@ class ProductModel:
             if result[0][0] > 0:
                 raise Exception("Impossible de supprimer ce produit car il a des mouvements de stock associés")
 
+            # Mouvements déplacés dans les archives
+            if self.db.execute_query("SELECT 1 FROM archived_products WHERE product_id = ?", (product_id,)):
+                raise Exception("Impossible de supprimer ce produit car il a des mouvements de stock archivés")
+
             query = "DELETE FROM products WHERE products_id = ?"
-            return self.db.execute_update(query, (product_id,))
+            versions_before = self.catalog_versions()
+            rows_affected = self.db.execute_update(query, (product_id,))
+            self.sync_catalog(product_id, versions_before)
+            return rows_affected
 
         except Exception as e:
             raise Exception(f"Erreur lors de la suppression du produit: {str(e)}")
@@ -94,6 +219,8 @@ class ProductModel:
         try:
             total_amount = quantity * unit_price
 
+            versions_before = self.catalog_versions()
+
             # Insérer le mouvement
             query = """
                 INSERT INTO stock_movements (product_id, user_id, vendeur_id, movement_type, quantity, unit_price, total_amount, notes)
@@ -108,12 +235,180 @@ class ProductModel:
                 update_query = "UPDATE products SET quantity = quantity - ? WHERE products_id = ?"
 
             self.db.execute_update(update_query, (quantity, product_id))
+            self.sync_catalog(product_id, versions_before)
 
             return movement_id
 
         except Exception as e:
             raise Exception(f"Erreur lors de l'ajout du mouvement de stock: {str(e)}")
 
+    def lookup_by_code(self, code):
+        """Retrouve un produit par SKU ou code-barres (lecture scanner)"""
+        try:
+            versions = self.catalog_versions()
+            if self.catalog.is_loaded(versions):
+                return self.catalog.get_by_code(code)
+
+            # Catalogue périmé (écriture d'un autre poste): ne pas faire attendre le
+            # scan pendant un rechargement complet, passer par les index uniques
+            query = """
+                SELECT p.*, c.name as category_name
+                FROM products p
+                LEFT JOIN categories c ON p.categories_id = c.categories_id
+                WHERE p.products_id = COALESCE(
+                    (SELECT products_id FROM products WHERE barcode = ?),
+                    (SELECT product_id FROM product_barcodes WHERE barcode = ?),
+                    (SELECT products_id FROM products WHERE sku = ?)
+                )
+            """
+            result = self.db.execute_query(query, (code, code, code))
+            return dict(result[0]) if result else None
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la recherche par code: {str(e)}")
+
+    def find_code_owner(self, code):
+        """Retourne l'ID du produit qui utilise déjà un code (SKU, code-barres principal ou secondaire)"""
+        try:
+            query = """
+                SELECT products_id FROM products WHERE sku = ? OR barcode = ?
+                UNION ALL
+                SELECT product_id FROM product_barcodes WHERE barcode = ?
+                LIMIT 1
+            """
+            result = self.db.execute_query(query, (code, code, code))
+            return result[0][0] if result else None
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la vérification du code: {str(e)}")
+
+    def get_product_barcodes(self, product_id):
+        """Récupère les codes-barres supplémentaires d'un produit"""
+        try:
+            query = "SELECT * FROM product_barcodes WHERE product_id = ? ORDER BY barcode"
+            return self.db.execute_query(query, (product_id,))
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération des codes-barres: {str(e)}")
+
+    def add_barcode(self, product_id, barcode):
+        """Ajoute un code-barres supplémentaire à un produit"""
+        try:
+            query = "INSERT INTO product_barcodes (barcode, product_id) VALUES (?, ?)"
+            versions_before = self.catalog_versions()
+            self.db.execute_insert(query, (barcode, product_id))
+            self.sync_catalog(product_id, versions_before)
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de l'ajout du code-barres: {str(e)}")
+
+    def remove_barcode(self, product_id, barcode):
+        """Retire un code-barres supplémentaire d'un produit"""
+        try:
+            query = "DELETE FROM product_barcodes WHERE barcode = ? AND product_id = ?"
+            versions_before = self.catalog_versions()
+            rows_affected = self.db.execute_update(query, (barcode, product_id))
+            self.sync_catalog(product_id, versions_before)
+            return rows_affected
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la suppression du code-barres: {str(e)}")
+
+    def search_products_by_prefix(self, prefix, limit=20):
+        """Recherche les produits dont le nom commence par un préfixe (catalogue en mémoire)"""
+        try:
+            if self.catalog.versions is None:
+                # Catalogue en préparation: index plein texte (préfixes) en attendant
+                self.start_catalog_warmup()
+                return self.search(prefix, 'products', limit)
+            return self.get_catalog().search_prefix(prefix, limit)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la recherche de produits: {str(e)}")
+
+    def fuzzy_search(self, text, limit=20, min_similarity=0.3):
+        """Recherche tolérante aux fautes de frappe ("heinken", "coca 1,5") par trigrammes"""
+        try:
+            if not self.catalog.is_ready():
+                # Index des trigrammes en préparation: ne pas le construire pendant la frappe
+                self.start_catalog_warmup()
+                return self.search(text, 'products', limit)
+            return self.get_catalog().search_fuzzy(text, limit, min_similarity)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la recherche approchée: {str(e)}")
+
+    def search(self, text, scope='products', limit=50):
+        """Recherche plein texte classée par pertinence (bm25)
+
+        scope='products' cherche dans le nom et la catégorie des produits,
+        scope='movements' dans les notes des mouvements de stock.
+        """
+        try:
+            fts_query = build_fts_query(text)
+            if not fts_query:
+                return []
+
+            if scope == 'products':
+                # Le nom compte davantage que la catégorie
+                query = """
+                    SELECT p.*, c.name as category_name
+                    FROM products_fts
+                    JOIN products p ON p.products_id = products_fts.rowid
+                    LEFT JOIN categories c ON p.categories_id = c.categories_id
+                    WHERE products_fts MATCH ?
+                    ORDER BY bm25(products_fts, 10.0, 1.0)
+                    LIMIT ?
+                """
+            elif scope == 'movements':
+                query = """
+                    SELECT sm.*, p.name as product_name, u.full_name as user_name, v.name as vendeur_name
+                    FROM movements_fts
+                    JOIN stock_movements sm ON sm.stock_id = movements_fts.rowid
+                    JOIN products p ON sm.product_id = p.products_id
+                    JOIN users u ON sm.user_id = u.users_id
+                    LEFT JOIN vendeur v ON sm.vendeur_id = v.vendeur_id
+                    WHERE movements_fts MATCH ?
+                    ORDER BY bm25(movements_fts)
+                    LIMIT ?
+                """
+            else:
+                raise Exception(f"Portée de recherche inconnue: {scope}")
+
+            return self.db.execute_query(query, (fts_query, limit))
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la recherche: {str(e)}")
+
+    def search_sales(self, text, limit=500):
+        """Recherche les ventes par nom/catégorie de produit ou par notes (plus récentes d'abord)"""
+        try:
+            fts_query = build_fts_query(text)
+            if not fts_query:
+                return []
+
+            query = """
+                SELECT sm.*, p.name as product_name, u.full_name as user_name, v.name as vendeur_name
+                FROM stock_movements sm
+                JOIN products p ON sm.product_id = p.products_id
+                JOIN users u ON sm.user_id = u.users_id
+                LEFT JOIN vendeur v ON sm.vendeur_id = v.vendeur_id
+                WHERE sm.movement_type = 'OUT'
+                  AND (sm.product_id IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)
+                       OR sm.stock_id IN (SELECT rowid FROM movements_fts WHERE movements_fts MATCH ?))
+                ORDER BY sm.created_at DESC
+                LIMIT ?
+            """
+            return self.db.execute_query(query, (fts_query, fts_query, limit))
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la recherche des ventes: {str(e)}")
+
+    def get_products_by_category(self, category_id):
+        """Récupère les produits d'une catégorie (catalogue en mémoire)"""
+        try:
+            return self.get_catalog().get_by_category(category_id)
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération des produits de la catégorie: {str(e)}")
+
     def get_stock_movements(self, product_id=None, limit=None):
         """Récupère les mouvements de stock"""
         try:
@@ -141,8 +436,25 @@ class ProductModel:
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des mouvements: {str(e)}")
 
-    def get_low_stock_products(self):
-        """Récupère les produits avec un stock faible"""
+    def get_stock_movement_by_id(self, movement_id):
+        """Récupère un mouvement de stock par son ID"""
+        try:
+            query = """
+                SELECT sm.*, p.name as product_name, u.full_name as user_name, v.name as vendeur_name
+                FROM stock_movements sm
+                JOIN products p ON sm.product_id = p.products_id
+                JOIN users u ON sm.user_id = u.users_id
+                LEFT JOIN vendeur v ON sm.vendeur_id = v.vendeur_id
+                WHERE sm.stock_id = ?
+            """
+            result = self.db.execute_query(query, (movement_id,))
+            return dict(result[0]) if result else None
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération du mouvement: {str(e)}")
+
+    def get_low_stock_products(self, limit=None):
+        """Récupère les produits avec un stock faible (les limit plus bas si précisé)"""
         try:
             query = """
                 SELECT p.*, c.name as category_name
@@ -151,43 +463,271 @@ class ProductModel:
                 WHERE p.quantity <= p.min_stock_level
                 ORDER BY p.quantity ASC
             """
+            if limit:
+                return self.db.execute_query(query + " LIMIT ?", (limit,))
             return self.db.execute_query(query)
 
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des produits en stock faible: {str(e)}")
 
+    def take_stock_snapshot(self, only_if_missing_today=False):
+        """Enregistre la quantité et le prix d'achat de chaque produit (une transaction)"""
+        try:
+            if only_if_missing_today:
+                query = "SELECT snapshot_id FROM stock_snapshot_runs WHERE taken_at >= DATE('now')"
+                if self.db.execute_query(query):
+                    return None
+
+            cursor = self.db.cursor
+            try:
+                cursor.execute("""
+                    INSERT INTO stock_snapshot_runs (last_movement_id)
+                    SELECT COALESCE(MAX(stock_id), 0) FROM stock_movements
+                """)
+                snapshot_id = cursor.lastrowid
+                cursor.execute("""
+                    INSERT INTO stock_snapshots (snapshot_id, product_id, quantity, purchase_price)
+                    SELECT ?, products_id, quantity, purchase_price FROM products
+                """, (snapshot_id,))
+                self.db.connection.commit()
+            except Exception:
+                self.db.connection.rollback()
+                raise
+
+            return snapshot_id
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la photographie du stock: {str(e)}")
+
+    def stock_as_of(self, as_of_date):
+        """Stock de chaque produit à la fin d'une journée
+
+        Part de la dernière photographie prise avant la fin de la journée et
+        applique les mouvements suivants; à défaut, part de la photographie
+        suivante (ou du stock actuel) et retire les mouvements postérieurs.
+        """
+        try:
+            day_end = self.db.execute_query("SELECT DATE(?, '+1 day')", (str(as_of_date),))[0][0]
+
+            before = self.db.execute_query("""
+                SELECT snapshot_id, last_movement_id, taken_at FROM stock_snapshot_runs
+                WHERE taken_at < ? ORDER BY taken_at DESC LIMIT 1
+            """, (day_end,))
+
+            if before:
+                snapshot_id, last_movement_id, taken_at = before[0]
+                # Les mouvements postérieurs à la photographie peuvent être archivés
+                source = self.archives.movements_source(taken_at[:10])
+                query = f"""
+                    WITH base AS (
+                        SELECT product_id, quantity, purchase_price FROM stock_snapshots WHERE snapshot_id = ?
+                    ),
+                    delta AS (
+                        SELECT product_id,
+                               SUM(CASE WHEN movement_type = 'IN' THEN quantity ELSE -quantity END) as quantity
+                        FROM {source}
+                        WHERE stock_id > ? AND created_at < ?
+                        GROUP BY product_id
+                    )
+                    SELECT p.products_id, p.name, c.name as category_name,
+                           COALESCE(b.quantity, 0) + COALESCE(d.quantity, 0) as quantity,
+                           COALESCE(b.purchase_price, p.purchase_price) as purchase_price
+                    FROM products p
+                    LEFT JOIN categories c ON p.categories_id = c.categories_id
+                    LEFT JOIN base b ON b.product_id = p.products_id
+                    LEFT JOIN delta d ON d.product_id = p.products_id
+                    WHERE b.product_id IS NOT NULL OR d.product_id IS NOT NULL
+                    ORDER BY p.name
+                """
+                params = (snapshot_id, last_movement_id, day_end)
+            else:
+                source = self.archives.movements_source(as_of_date)
+                after = self.db.execute_query("""
+                    SELECT snapshot_id, last_movement_id FROM stock_snapshot_runs
+                    ORDER BY taken_at LIMIT 1
+                """)
+                if after:
+                    # Photographie postérieure: ses quantités moins les mouvements entre les deux
+                    snapshot_id, last_movement_id = after[0]
+                    base = "SELECT product_id, quantity, purchase_price FROM stock_snapshots WHERE snapshot_id = ?"
+                    base_params = (snapshot_id,)
+                    movement_filter = "stock_id <= ? AND created_at >= ?"
+                    movement_params = (last_movement_id, day_end)
+                else:
+                    # Aucune photographie: le stock actuel en tient lieu
+                    base = "SELECT products_id as product_id, quantity, purchase_price FROM products"
+                    base_params = ()
+                    movement_filter = "created_at >= ?"
+                    movement_params = (day_end,)
+
+                query = f"""
+                    WITH base AS ({base}),
+                    delta AS (
+                        SELECT product_id,
+                               SUM(CASE WHEN movement_type = 'IN' THEN quantity ELSE -quantity END) as quantity
+                        FROM {source}
+                        WHERE {movement_filter}
+                        GROUP BY product_id
+                    )
+                    SELECT p.products_id, p.name, c.name as category_name,
+                           b.quantity - COALESCE(d.quantity, 0) as quantity,
+                           b.purchase_price
+                    FROM base b
+                    JOIN products p ON b.product_id = p.products_id
+                    LEFT JOIN categories c ON p.categories_id = c.categories_id
+                    LEFT JOIN delta d ON d.product_id = p.products_id
+                    WHERE p.created_at < ?
+                    ORDER BY p.name
+                """
+                params = base_params + movement_params + (day_end,)
+
+            results = []
+            for row in self.db.execute_query(query, params):
+                product = dict(row)
+                product['stock_value'] = product['quantity'] * product['purchase_price']
+                results.append(product)
+            return results
+
+        except Exception as e:
+            raise Exception(f"Erreur lors du calcul du stock à date: {str(e)}")
+
+    def get_inventory_valuation(self, as_of_date):
+        """Valorisation de l'inventaire à une date passée"""
+        try:
+            products = self.stock_as_of(as_of_date)
+            return {
+                'date': str(as_of_date),
+                'products': products,
+                'total_quantity': sum(p['quantity'] for p in products),
+                'total_value': sum(p['stock_value'] for p in products)
+            }
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la valorisation de l'inventaire: {str(e)}")
+
+    def get_sales(self, start_date=None, end_date=None, limit=None):
+        """Récupère le détail des ventes d'une période (via l'index sur created_at), les limit plus récentes si précisé"""
+        try:
+            query, params = self._sales_query(start_date, end_date)
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
+            return self.db.execute_query(query, params if params else None)
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération des ventes: {str(e)}")
+
+    def iter_sales(self, start_date=None, end_date=None):
+        """Parcourt les ventes d'une période ligne par ligne (curseur dédié, sans tout charger)"""
+        try:
+            query, params = self._sales_query(start_date, end_date)
+            return self.db.connection.cursor().execute(query, params)
+
+        except Exception as e:
+            raise Exception(f"Erreur lors de la récupération des ventes: {str(e)}")
+
+    def _sales_query(self, start_date, end_date):
+        """Requête du détail des ventes d'une période et ses paramètres"""
+        source = self.archives.movements_source(start_date, end_date)
+        query = f"""
+            SELECT sm.*, p.name as product_name, u.full_name as user_name, v.name as vendeur_name
+            FROM {source} sm
+            JOIN products p ON sm.product_id = p.products_id
+            JOIN users u ON sm.user_id = u.users_id
+            LEFT JOIN vendeur v ON sm.vendeur_id = v.vendeur_id
+            WHERE sm.movement_type = 'OUT'
+        """
+        params = []
+
+        if start_date:
+            query += " AND sm.created_at >= ?"
+            params.append(str(start_date))
+
+        if end_date:
+            query += " AND sm.created_at < DATE(?, '+1 day')"
+            params.append(str(end_date))
+
+        query += " ORDER BY sm.created_at DESC"
+        return query, params
+
+    def get_sales_totals(self, start_date=None, end_date=None, vendeur_id=None):
+        """Totaux des ventes d'une période (nombre, quantité, CA, coût) depuis le cumul journalier"""
+        try:
+            query = """
+                SELECT COALESCE(SUM(transactions), 0) as total_transactions,
+                       COALESCE(SUM(quantity), 0) as total_quantity,
+                       COALESCE(SUM(revenue), 0) as total_sales,
+                       COALESCE(SUM(cost), 0) as total_cost
+                FROM sales_daily
+                WHERE 1 = 1
+            """
+            params = []
+
+            if start_date:
+                query += " AND day >= ?"
+                params.append(str(start_date))
+
+            if end_date:
+                query += " AND day <= ?"
+                params.append(str(end_date))
+
+            if vendeur_id:
+                query += " AND vendeur_id = ?"
+                params.append(vendeur_id)
+
+            return dict(self.db.execute_query(query, params)[0])
+
+        except Exception as e:
+            raise Exception(f"Erreur lors du calcul des totaux des ventes: {str(e)}")
+
+    def get_stock_totals(self):
+        """Totaux du stock actuel (produits, quantités, valeur, alertes) calculés en une requête"""
+        try:
+            query = """
+                SELECT COUNT(*) as total_products,
+                       COALESCE(SUM(quantity), 0) as total_quantity,
+                       COALESCE(SUM(quantity * purchase_price), 0) as stock_value,
+                       COALESCE(SUM(quantity <= min_stock_level), 0) as low_stock_count,
+                       COALESCE(SUM(quantity = 0), 0) as out_of_stock_count
+                FROM products
+            """
+            return dict(self.db.execute_cached(query)[0])
+
+        except Exception as e:
+            raise Exception(f"Erreur lors du calcul des totaux du stock: {str(e)}")
+
     def get_sales_summary(self, start_date=None, end_date=None, vendeur_id=None):
-        """Récupère un résumé des ventes"""
+        """Récupère un résumé des ventes (lu dans le cumul journalier sales_daily)"""
         try:
             query = """
                 SELECT 
-                    DATE(sm.created_at) as date,
+                    sd.day as date,
                     p.name as product_name,
                     v.name as vendeur_name,
-                    SUM(sm.quantity) as total_quantity,
-                    SUM(sm.total_amount) as total_sales,
-                    SUM(sm.quantity * p.purchase_price) as total_cost,
-                    SUM(sm.total_amount - (sm.quantity * p.purchase_price)) as profit
-                FROM stock_movements sm
-                JOIN products p ON sm.product_id = p.products_id
-                LEFT JOIN vendeur v ON sm.vendeur_id = v.vendeur_id
-                WHERE sm.movement_type = 'OUT'
+                    sd.quantity as total_quantity,
+                    sd.revenue as total_sales,
+                    sd.cost as total_cost,
+                    sd.revenue - sd.cost as profit
+                FROM sales_daily sd
+                JOIN products p ON sd.product_id = p.products_id
+                LEFT JOIN vendeur v ON sd.vendeur_id = v.vendeur_id
+                WHERE 1 = 1
             """
             params = []
 
             if start_date:
-                query += " AND DATE(sm.created_at) >= ?"
+                query += " AND sd.day >= ?"
                 params.append(start_date)
 
             if end_date:
-                query += " AND DATE(sm.created_at) <= ?"
+                query += " AND sd.day <= ?"
                 params.append(end_date)
 
             if vendeur_id:
-                query += " AND sm.vendeur_id = ?"
+                query += " AND sd.vendeur_id = ?"
                 params.append(vendeur_id)
 
-            query += " GROUP BY DATE(sm.created_at), sm.product_id, sm.vendeur_id ORDER BY sm.created_at DESC"
+            query += " ORDER BY sd.day DESC"
 
             return self.db.execute_query(query, params if params else None)
 
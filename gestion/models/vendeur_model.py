@@ -6,9 +6,9 @@ Modèle pour la gestion des vendeurs
 from gestion.database.database_manager import DatabaseManager
 
 class VendeurModel:
-    def __init__(self):
-        """Initialise le modèle vendeur"""
-        self.db = DatabaseManager()
+    def __init__(self, db=None):
+        """Initialise le modèle vendeur (db: connexion à utiliser, une nouvelle par défaut)"""
+        self.db = db or DatabaseManager()
 
     def create_vendeur(self, name, telephone=""):
         """Crée un nouveau vendeur"""
@@ -35,7 +35,7 @@ class VendeurModel:
 
             query += " ORDER BY name"
 
-            return self.db.execute_query(query)
+            return self.db.execute_cached(query)
 
         except Exception as e:
             raise Exception(f"Erreur lors de la récupération des vendeurs: {str(e)}")
@@ -84,19 +84,18 @@ class VendeurModel:
             raise Exception(f"Erreur lors du changement de statut du vendeur: {str(e)}")
 
     def get_vendeur_sales_stats(self, vendeur_id=None, start_date=None, end_date=None):
-        """Récupère les statistiques de vente d'un vendeur"""
+        """Récupère les statistiques de vente d'un vendeur (depuis le cumul journalier sales_daily)"""
         try:
             query = """
                 SELECT 
                     v.name as vendeur_name,
-                    COUNT(sm.stock_id) as total_transactions,
-                    SUM(sm.quantity) as total_quantity_sold,
-                    SUM(sm.total_amount) as total_sales,
-                    SUM(sm.quantity * p.purchase_price) as total_cost,
-                    SUM(sm.total_amount - (sm.quantity * p.purchase_price)) as total_profit
+                    COALESCE(SUM(sd.transactions), 0) as total_transactions,
+                    SUM(sd.quantity) as total_quantity_sold,
+                    SUM(sd.revenue) as total_sales,
+                    SUM(sd.cost) as total_cost,
+                    SUM(sd.revenue - sd.cost) as total_profit
                 FROM vendeur v
-                LEFT JOIN stock_movements sm ON v.vendeur_id = sm.vendeur_id AND sm.movement_type = 'OUT'
-                LEFT JOIN products p ON sm.product_id = p.products_id
+                LEFT JOIN sales_daily sd ON v.vendeur_id = sd.vendeur_id
             """
             params = []
 
@@ -107,11 +106,11 @@ class VendeurModel:
                 params.append(vendeur_id)
 
             if start_date:
-                where_conditions.append("DATE(sm.created_at) >= ?")
+                where_conditions.append("sd.day >= ?")
                 params.append(start_date)
 
             if end_date:
-                where_conditions.append("DATE(sm.created_at) <= ?")
+                where_conditions.append("sd.day <= ?")
                 params.append(end_date)
 
             if where_conditions:
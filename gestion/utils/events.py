@@ -0,0 +1,69 @@
+# gestion/utils/events.py
+"""
+Bus d'événements léger (publish/subscribe) pour notifier les vues des modifications
+"""
+
+# Types d'entités publiées par les contrôleurs
+PRODUCT = 'product'
+STOCK_MOVEMENT = 'stock_movement'
+VENDEUR = 'vendeur'
+CATEGORY = 'category'
+
+# Actions possibles
+CREATED = 'created'
+UPDATED = 'updated'
+DELETED = 'deleted'
+# Modifié par une autre connexion: lignes inconnues, à relire
+REFRESHED = 'refreshed'
+
+# Abonnement à toutes les entités
+ALL = '*'
+
+class ChangeEvent:
+    """Décrit une écriture réussie sur une entité"""
+
+    __slots__ = ('entity', 'action', 'ids', 'fields')
+
+    def __init__(self, entity, action, ids, fields=None):
+        """Initialise l'événement"""
+        self.entity = entity
+        self.action = action
+        self.ids = tuple(ids)
+        # Champs modifiés -> nouvelle valeur
+        self.fields = dict(fields or {})
+
+    def __repr__(self):
+        return f"ChangeEvent({self.entity!r}, {self.action!r}, ids={self.ids!r}, fields={sorted(self.fields)!r})"
+
+class EventBus:
+    def __init__(self):
+        """Initialise le bus d'événements"""
+        self._subscribers = {}
+
+    def subscribe(self, entity, callback):
+        """Abonne un callback aux événements d'une entité et retourne la fonction de désabonnement"""
+        self._subscribers.setdefault(entity, []).append(callback)
+        return lambda: self.unsubscribe(entity, callback)
+
+    def unsubscribe(self, entity, callback):
+        """Désabonne un callback"""
+        callbacks = self._subscribers.get(entity, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def publish(self, event):
+        """Diffuse un événement aux abonnés de l'entité et aux abonnés globaux"""
+        # Copier les listes: un callback peut se désabonner pendant la diffusion
+        callbacks = list(self._subscribers.get(event.entity, [])) + list(self._subscribers.get(ALL, []))
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Erreur dans un abonné à l'événement {event!r}: {e}")
+
+    def emit(self, entity, action, ids, fields=None):
+        """Crée et diffuse un événement"""
+        self.publish(ChangeEvent(entity, action, ids, fields))
+
+# Instance globale partagée par les contrôleurs et les vues
+event_bus = EventBus()
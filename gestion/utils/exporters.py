@@ -4,265 +4,584 @@ Fonctions d'export des données vers différents formats
 """
 
 import csv
+import gzip
 import json
+import lzma
+import multiprocessing
 import os
-from datetime import datetime
-from gestion.utils.helpers import clean_filename, format_currency, format_datetime
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from html import escape
+from itertools import chain, repeat
+from urllib.parse import quote
+from gestion.config.config import config
+from gestion.utils.helpers import clean_filename, format_datetime
+from gestion.utils.xlsx_writer import XlsxWriter
+
+# Tampon d'écriture des fichiers exportés (les lignes sont écrites au fil de la lecture)
+EXPORT_BUFFER_SIZE = 1024 * 1024
+
+# Compressions possibles des exports texte et extension ajoutée au fichier
+COMPRESSION_EXTENSIONS = {'gzip': '.gz', 'xz': '.xz'}
+# Formats jamais compressés: pages HTML liées entre elles, classeur Excel déjà compressé
+UNCOMPRESSED_FORMATS = ('html', 'xlsx')
+
+# Formats destinés à la lecture: valeurs mises en forme (montants, dates) à l'écriture.
+# Les autres formats gardent les valeurs brutes typées (nombres, dates ISO)
+PRESENTATION_FORMATS = ('txt', 'html')
+
+# Rapports générables en lot et préfixe de leur fichier
+BATCH_REPORTS = {
+    'sales': 'rapport_ventes',
+    'vendeurs': 'performance_vendeurs',
+    'stock': 'rapport_stock',
+    'alerts': 'alerte_stock',
+    'valuation': 'valorisation_stock'
+}
+# Tables lues par chaque rapport: leurs versions font partie de la clé du cache des rapports
+REPORT_TABLES = {
+    'sales': ('products', 'stock_movements', 'vendeur'),
+    'vendeurs': ('stock_movements', 'vendeur'),
+    'stock': ('categories', 'products'),
+    'alerts': ('categories', 'products'),
+    'valuation': ('categories', 'products', 'stock_movements')
+}
+# Rapports qui dépendent de la période (les autres décrivent le stock actuel)
+PERIOD_REPORTS = ('sales', 'vendeurs', 'valuation')
+
+# Lignes HTML accumulées avant chaque écriture dans le fichier
+HTML_CHUNK_ROWS = 1000
+
+HTML_STYLE = """    <style>
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+            margin: 20px;
+            background-color: #f8f9fa;
+        }
+        .container {
+            max-width: 1200px;
+            margin: 0 auto;
+            background: white;
+            padding: 20px;
+            border-radius: 8px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        }
+        h1 {
+            color: #2c3e50;
+            text-align: center;
+            margin-bottom: 30px;
+        }
+        .export-info {
+            background: #e8f4f8;
+            padding: 10px;
+            border-radius: 4px;
+            margin-bottom: 20px;
+            font-size: 14px;
+            color: #2c3e50;
+        }
+        table {
+            width: 100%;
+            border-collapse: collapse;
+            margin-top: 20px;
+        }
+        th {
+            background-color: #34495e;
+            color: white;
+            padding: 12px;
+            text-align: left;
+            font-weight: bold;
+        }
+        td {
+            padding: 10px 12px;
+            border-bottom: 1px solid #ecf0f1;
+        }
+        tr:nth-child(even) {
+            background-color: #f8f9fa;
+        }
+        tr:hover {
+            background-color: #e8f4f8;
+        }
+        .number {
+            text-align: right;
+        }
+        .navigation {
+            margin-top: 20px;
+            text-align: center;
+        }
+        .footer {
+            margin-top: 30px;
+            text-align: center;
+            font-size: 12px;
+            color: #7f8c8d;
+        }
+    </style>
+"""
+
+def to_date(value):
+    """Date d'un horodatage SQLite ('AAAA-MM-JJ ...'), sans strptime"""
+    if isinstance(value, str) and value:
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return value
+    return value or None
+
+def to_amount(value):
+    """Montant brut: entier lorsqu'il n'a pas de décimales"""
+    if not value:
+        return 0
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def compile_formatters(column_types):
+    """Formateurs de présentation par colonne, construits une fois par export (None: valeur telle quelle)"""
+    currency = config.CURRENCY['format'].format
+    formatters = {
+        'amount': lambda value: currency(value) if isinstance(value, (int, float)) else value,
+        'date': lambda value: value.strftime('%d/%m/%Y') if isinstance(value, date) else value,
+        'datetime': lambda value: value.strftime('%d/%m/%Y %H:%M') if isinstance(value, datetime) else value
+    }
+    return [formatters.get(column_type) for column_type in column_types]
+
+def present_rows(rows, column_types):
+    """Applique les formateurs de présentation aux lignes, au fil de la lecture"""
+    formatters = compile_formatters(column_types)
+    columns = [(index, formatter) for index, formatter in enumerate(formatters) if formatter]
+    for row in rows:
+        row = list(row)
+        for index, formatter in columns:
+            row[index] = formatter(row[index])
+        yield row
 
 class ExportError(Exception):
     """Exception personnalisée pour les erreurs d'export"""
     pass
 
+class RowCounter:
+    """Parcourt des lignes en les comptant (en flux, le total n'est connu qu'à la fin)"""
+
+    def __init__(self, rows):
+        """Initialise le compteur"""
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+class HtmlTableWriter:
+    """Écrit un tableau HTML en flux: lignes échappées, écrites par blocs, une page par rows_per_page lignes"""
+
+    def __init__(self, path, headers, title, rows_per_page):
+        """Initialise l'écrivain"""
+        self.path = path
+        self.base = path[:-len('.html')]
+        self.headers = headers
+        self.title = title
+        self.rows_per_page = rows_per_page
+        # Pages écrites: (fichier, première ligne, dernière ligne, premier champ)
+        self.pages = []
+
+    def page_path(self, number):
+        """Fichier d'une page du rapport découpé"""
+        return f"{self.base}_p{number:04d}.html"
+
+    def write(self, rows):
+        """Écrit toutes les lignes et retourne leur nombre"""
+        count = 0
+        page_file = None
+        buffer = []
+        try:
+            for row in rows:
+                if count % self.rows_per_page == 0:
+                    if page_file is not None:
+                        page_file.write(''.join(buffer))
+                        buffer = []
+                        self.close_page(page_file, count, has_next=True)
+                    page_file = self.open_page(count + 1, row)
+
+                buffer.append(self.format_row(row))
+                count += 1
+                if len(buffer) >= HTML_CHUNK_ROWS:
+                    page_file.write(''.join(buffer))
+                    buffer = []
+
+            if page_file is None:
+                page_file = self.open_page(1, None)
+            page_file.write(''.join(buffer))
+            self.close_page(page_file, count, has_next=False)
+        except Exception:
+            if page_file is not None and not page_file.closed:
+                page_file.close()
+            raise
+
+        if len(self.pages) == 1:
+            # Une seule page: pas de sommaire, le fichier demandé est la page
+            os.replace(self.pages[0][0], self.path)
+        else:
+            self.write_index(count)
+        return count
+
+    def open_page(self, first_row, row):
+        """Ouvre la page suivante et écrit son en-tête"""
+        number = len(self.pages) + 1
+        path = self.page_path(number)
+        first_value = row[0] if row else ''
+        self.pages.append((path, first_row, first_row - 1, first_value))
+
+        page_file = open(path, 'w', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE)
+        header_cells = ''.join(f"                    <th>{escape(str(header))}</th>\n" for header in self.headers)
+        page_file.write(self.page_head(self.title) + f"""        <div class="export-info">
+            📅 Généré le: {datetime.now().strftime('%d/%m/%Y à %H:%M')}
+        </div>
+        <table>
+            <thead>
+                <tr>
+{header_cells}                </tr>
+            </thead>
+            <tbody>
+""")
+        return page_file
+
+    def close_page(self, page_file, last_row, has_next):
+        """Termine une page: lignes contenues et liens de navigation"""
+        number = len(self.pages)
+        path, first_row, _, first_value = self.pages[-1]
+        self.pages[-1] = (path, first_row, last_row, first_value)
+
+        links = []
+        if number > 1 or has_next:
+            if number > 1:
+                links.append(f'<a href="{self.link(self.page_path(number - 1))}">← Précédente</a>')
+            links.append(f'<a href="{self.link(self.path)}">Sommaire</a>')
+            if has_next:
+                links.append(f'<a href="{self.link(self.page_path(number + 1))}">Suivante →</a>')
+        navigation = f'        <div class="navigation">{" | ".join(links)}</div>\n' if links else ''
+        if links:
+            summary = f"Enregistrements: {first_row} à {last_row}"
+        else:
+            summary = f"Nombre d'enregistrements: {last_row}"
+
+        page_file.write(f"""            </tbody>
+        </table>
+{navigation}        <div class="footer">
+            📊 {summary}<br>
+            Généré par le système de Gestion d'Inventaire
+        </div>
+    </div>
+</body>
+</html>
+""")
+        page_file.close()
+
+    def write_index(self, count):
+        """Écrit le sommaire des pages"""
+        items = ''.join(
+            f'                <tr><td><a href="{self.link(path)}">Page {number}</a></td>'
+            f'<td class="number">{first_row} à {last_row}</td><td>{escape(str(first_value))}</td></tr>\n'
+            for number, (path, first_row, last_row, first_value) in enumerate(self.pages, 1)
+        )
+        with open(self.path, 'w', encoding='utf-8') as index_file:
+            index_file.write(self.page_head(self.title) + f"""        <div class="export-info">
+            📅 Généré le: {datetime.now().strftime('%d/%m/%Y à %H:%M')}<br>
+            📊 Nombre d'enregistrements: {count} en {len(self.pages)} pages
+        </div>
+        <table>
+            <thead>
+                <tr><th>Page</th><th>Enregistrements</th><th>{escape(str(self.headers[0])) if self.headers else ''}</th></tr>
+            </thead>
+            <tbody>
+{items}            </tbody>
+        </table>
+        <div class="footer">
+            Généré par le système de Gestion d'Inventaire
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+    def link(self, path):
+        """Lien relatif entre fichiers du même dossier"""
+        return quote(os.path.basename(path))
+
+    @staticmethod
+    def page_head(title):
+        """Début d'une page (styles et titre)"""
+        title = escape(str(title))
+        return f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+{HTML_STYLE}</head>
+<body>
+    <div class="container">
+        <h1>{title}</h1>
+"""
+
+    @staticmethod
+    def format_row(row):
+        """Ligne du tableau, contenu échappé"""
+        cells = []
+        for cell in row:
+            # Détection automatique des nombres pour l'alignement
+            if isinstance(cell, (int, float)) or (isinstance(cell, str) and 'Ar' in cell):
+                cells.append(f'<td class="number">{escape(str(cell))}</td>')
+            else:
+                cells.append(f'<td>{escape(str(cell))}</td>')
+        return f"                <tr>{''.join(cells)}</tr>\n"
+
 class DataExporter:
     def __init__(self):
         """Initialise l'exporteur de données"""
-        self.supported_formats = ['csv', 'txt', 'json', 'html']
+        self.supported_formats = ['csv', 'txt', 'json', 'ndjson', 'html', 'xlsx']
+        # Format, fichier, lignes, octets, durée et débit du dernier export de cette
+        # instance: un exporteur par job quand ces statistiques sont lues (threads, processus)
+        self.last_export_stats = None
 
-    def export_to_csv(self, data, headers, filename, delimiter=','):
-        """Exporte des données vers un fichier CSV"""
+    def export_to_csv(self, data, headers, filename, delimiter=',', compression=None):
+        """Exporte des données (tout itérable, y compris un curseur) vers un fichier CSV"""
         try:
-            clean_filename_str = clean_filename(filename)
-            if not clean_filename_str.endswith('.csv'):
-                clean_filename_str += '.csv'
+            started = time.perf_counter()
+            clean_filename_str = self._output_path(filename, '.csv', compression)
+            rows = RowCounter(data)
 
-            with open(clean_filename_str, 'w', newline='', encoding='utf-8-sig') as csvfile:
+            with self._open_output(clean_filename_str, compression, encoding='utf-8-sig', newline='') as csvfile:
                 writer = csv.writer(csvfile, delimiter=delimiter)
 
                 # Écrire les en-têtes
                 writer.writerow(headers)
 
-                # Écrire les données
-                for row in data:
-                    writer.writerow(row)
+                # Écrire les données au fil de la lecture
+                writer.writerows(rows)
 
+            self._record_stats('csv', clean_filename_str, rows.count, started, compression)
             return clean_filename_str
 
         except Exception as e:
             raise ExportError(f"Erreur lors de l'export CSV: {str(e)}")
 
-    def export_to_txt(self, data, headers, filename, separator='\t'):
-        """Exporte des données vers un fichier texte"""
+    def export_to_txt(self, data, headers, filename, separator='\t', compression=None):
+        """Exporte des données (tout itérable) vers un fichier texte"""
         try:
-            clean_filename_str = clean_filename(filename)
-            if not clean_filename_str.endswith('.txt'):
-                clean_filename_str += '.txt'
+            started = time.perf_counter()
+            clean_filename_str = self._output_path(filename, '.txt', compression)
+            rows = RowCounter(data)
 
-            with open(clean_filename_str, 'w', encoding='utf-8') as txtfile:
+            with self._open_output(clean_filename_str, compression) as txtfile:
                 # Écrire l'en-tête
                 txtfile.write(separator.join(headers) + '\n')
                 txtfile.write('=' * (len(separator.join(headers))) + '\n')
 
                 # Écrire les données
-                for row in data:
+                for row in rows:
                     txtfile.write(separator.join(str(cell) for cell in row) + '\n')
 
+            self._record_stats('txt', clean_filename_str, rows.count, started, compression)
             return clean_filename_str
 
         except Exception as e:
             raise ExportError(f"Erreur lors de l'export TXT: {str(e)}")
 
-    def export_to_json(self, data, headers, filename):
-        """Exporte des données vers un fichier JSON"""
+    def export_to_json(self, data, headers, filename, compression=None):
+        """Exporte des données (tout itérable) vers un fichier JSON, un enregistrement à la fois
+
+        Les métadonnées suivent les données: le nombre d'enregistrements n'est connu qu'à la fin.
+        """
         try:
-            clean_filename_str = clean_filename(filename)
-            if not clean_filename_str.endswith('.json'):
-                clean_filename_str += '.json'
-
-            # Convertir les données en dictionnaires
-            json_data = []
-            for row in data:
-                row_dict = {}
-                for i, header in enumerate(headers):
-                    row_dict[header] = row[i] if i < len(row) else None
-                json_data.append(row_dict)
-
-            # Métadonnées
-            export_info = {
-                'metadata': {
+            started = time.perf_counter()
+            clean_filename_str = self._output_path(filename, '.json', compression)
+            rows = RowCounter(data)
+            encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+
+            with self._open_output(clean_filename_str, compression) as jsonfile:
+                jsonfile.write('{\n  "data": [')
+                separator = '\n    '
+                for row in rows:
+                    # Colonnes manquantes à None, comme une ligne plus courte que les en-têtes
+                    jsonfile.write(separator + encoder.encode(dict(zip(headers, chain(row, repeat(None))))))
+                    separator = ',\n    '
+
+                metadata = {
                     'export_date': datetime.now().isoformat(),
-                    'total_records': len(json_data),
+                    'total_records': rows.count,
                     'headers': headers
-                },
-                'data': json_data
-            }
-
-            with open(clean_filename_str, 'w', encoding='utf-8') as jsonfile:
-                json.dump(export_info, jsonfile, indent=2, ensure_ascii=False, default=str)
+                }
+                jsonfile.write('\n  ],\n  "metadata": ' + encoder.encode(metadata) + '\n}\n')
 
+            self._record_stats('json', clean_filename_str, rows.count, started, compression)
             return clean_filename_str
 
         except Exception as e:
             raise ExportError(f"Erreur lors de l'export JSON: {str(e)}")
 
-    def export_to_html(self, data, headers, filename, title="Rapport"):
-        """Exporte des données vers un fichier HTML"""
+    def export_to_ndjson(self, data, headers, filename, compression=None):
+        """Exporte des données (tout itérable) au format JSON Lines: une ligne de métadonnées puis un objet par ligne"""
         try:
-            clean_filename_str = clean_filename(filename)
-            if not clean_filename_str.endswith('.html'):
-                clean_filename_str += '.html'
+            started = time.perf_counter()
+            clean_filename_str = self._output_path(filename, '.ndjson', compression)
+            rows = RowCounter(data)
+            encoder = json.JSONEncoder(ensure_ascii=False, default=str, separators=(',', ':'))
 
-            html_content = self._generate_html_table(data, headers, title)
+            with self._open_output(clean_filename_str, compression) as ndjsonfile:
+                metadata = {
+                    'export_date': datetime.now().isoformat(),
+                    'headers': headers
+                }
+                ndjsonfile.write(encoder.encode({'metadata': metadata}) + '\n')
+                for row in rows:
+                    ndjsonfile.write(encoder.encode(dict(zip(headers, chain(row, repeat(None))))) + '\n')
+
+            self._record_stats('ndjson', clean_filename_str, rows.count, started, compression)
+            return clean_filename_str
+
+        except Exception as e:
+            raise ExportError(f"Erreur lors de l'export NDJSON: {str(e)}")
 
-            with open(clean_filename_str, 'w', encoding='utf-8') as htmlfile:
-                htmlfile.write(html_content)
+    def export_to_xlsx(self, data, headers, filename, title="Rapport"):
+        """Exporte des données (tout itérable) vers un classeur Excel, nombres et dates typés"""
+        try:
+            started = time.perf_counter()
+            clean_filename_str = self._output_path(filename, '.xlsx')
+
+            count = XlsxWriter(clean_filename_str, title).write(headers, data)
 
+            self._record_stats('xlsx', clean_filename_str, count, started)
             return clean_filename_str
 
         except Exception as e:
-            raise ExportError(f"Erreur lors de l'export HTML: {str(e)}")
+            raise ExportError(f"Erreur lors de l'export Excel: {str(e)}")
 
-    def _generate_html_table(self, data, headers, title):
-        """Génère le contenu HTML pour un tableau"""
-        html = f"""
-<!DOCTYPE html>
-<html lang="fr">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            margin: 20px;
-            background-color: #f8f9fa;
-        }}
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            padding: 20px;
-            border-radius: 8px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        h1 {{
-            color: #2c3e50;
-            text-align: center;
-            margin-bottom: 30px;
-        }}
-        .export-info {{
-            background: #e8f4f8;
-            padding: 10px;
-            border-radius: 4px;
-            margin-bottom: 20px;
-            font-size: 14px;
-            color: #2c3e50;
-        }}
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            margin-top: 20px;
-        }}
-        th {{
-            background-color: #34495e;
-            color: white;
-            padding: 12px;
-            text-align: left;
-            font-weight: bold;
-        }}
-        td {{
-            padding: 10px 12px;
-            border-bottom: 1px solid #ecf0f1;
-        }}
-        tr:nth-child(even) {{
-            background-color: #f8f9fa;
-        }}
-        tr:hover {{
-            background-color: #e8f4f8;
-        }}
-        .number {{
-            text-align: right;
-        }}
-        .footer {{
-            margin-top: 30px;
-            text-align: center;
-            font-size: 12px;
-            color: #7f8c8d;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>{title}</h1>
-        <div class="export-info">
-            📅 Généré le: {datetime.now().strftime('%d/%m/%Y à %H:%M')}<br>
-            📊 Nombre d'enregistrements: {len(data)}
-        </div>
-        <table>
-            <thead>
-                <tr>
-"""
+    def export_to_html(self, data, headers, filename, title="Rapport", rows_per_page=None):
+        """Exporte des données (tout itérable) vers un fichier HTML
 
-        # Ajouter les en-têtes
-        for header in headers:
-            html += f"                    <th>{header}</th>\n"
+        Au-delà de rows_per_page lignes, le rapport est découpé en pages
+        (fichier_p0001.html, ...) et le fichier demandé devient leur sommaire.
+        """
+        try:
+            started = time.perf_counter()
+            clean_filename_str = self._output_path(filename, '.html')
+            rows_per_page = rows_per_page or config.EXPORT_CONFIG['html_rows_per_page']
 
-        html += """                </tr>
-            </thead>
-            <tbody>
-"""
+            writer = HtmlTableWriter(clean_filename_str, headers, title, rows_per_page)
+            count = writer.write(data)
 
-        # Ajouter les données
-        for row in data:
-            html += "                <tr>\n"
-            for i, cell in enumerate(row):
-                css_class = ""
-                # Détection automatique des nombres pour l'alignement
-                if isinstance(cell, (int, float)) or (isinstance(cell, str) and 'Ar' in cell):
-                    css_class = ' class="number"'
+            self._record_stats('html', clean_filename_str, count, started)
+            return clean_filename_str
 
-                html += f"                    <td{css_class}>{cell}</td>\n"
-            html += "                </tr>\n"
+        except Exception as e:
+            raise ExportError(f"Erreur lors de l'export HTML: {str(e)}")
 
-        html += """            </tbody>
-        </table>
-        <div class="footer">
-            Généré par le système de Gestion d'Inventaire
-        </div>
-    </div>
-</body>
-</html>
-"""
-        return html
+    def _export_by_format(self, data, headers, filename, format_type, title, column_types=None, compression=None):
+        """Exporte selon le format demandé
+
+        column_types ('amount', 'date', 'datetime' ou None par colonne) décrit les
+        valeurs brutes, mises en forme seulement pour les formats de présentation.
+        """
+        if column_types and format_type.lower() in PRESENTATION_FORMATS:
+            data = present_rows(data, column_types)
+        if compression and format_type.lower() in UNCOMPRESSED_FORMATS:
+            raise ExportError(f"Compression non disponible pour le format {format_type}")
+        if format_type.lower() == 'csv':
+            return self.export_to_csv(data, headers, filename, compression=compression)
+        elif format_type.lower() == 'txt':
+            return self.export_to_txt(data, headers, filename, compression=compression)
+        elif format_type.lower() == 'json':
+            return self.export_to_json(data, headers, filename, compression)
+        elif format_type.lower() == 'ndjson':
+            return self.export_to_ndjson(data, headers, filename, compression)
+        elif format_type.lower() == 'html':
+            return self.export_to_html(data, headers, filename, title)
+        elif format_type.lower() == 'xlsx':
+            return self.export_to_xlsx(data, headers, filename, title)
+        else:
+            raise ExportError(f"Format non supporté: {format_type}")
+
+    def _output_path(self, filename, extension, compression=None):
+        """Nom de fichier nettoyé avec son extension (suivie de celle de la compression)"""
+        if compression:
+            if compression not in COMPRESSION_EXTENSIONS:
+                raise ExportError(f"Compression non supportée: {compression}")
+            extension += COMPRESSION_EXTENSIONS[compression]
+        clean_filename_str = clean_filename(filename)
+        if not clean_filename_str.endswith(extension):
+            clean_filename_str += extension
+        return clean_filename_str
+
+    def _open_output(self, path, compression, encoding='utf-8', newline=None):
+        """Ouvre le fichier de sortie en écriture texte, compressé en flux si demandé"""
+        if compression == 'gzip':
+            return gzip.open(path, 'wt', compresslevel=config.EXPORT_CONFIG['gzip_level'],
+                             encoding=encoding, newline=newline)
+        if compression == 'xz':
+            return lzma.open(path, 'wt', preset=config.EXPORT_CONFIG['xz_preset'],
+                             encoding=encoding, newline=newline)
+        return open(path, 'w', encoding=encoding, newline=newline, buffering=EXPORT_BUFFER_SIZE)
+
+    def _record_stats(self, format_type, filename, rows, started, compression=None):
+        """Mémorise la taille et le débit du dernier export"""
+        seconds = time.perf_counter() - started
+        self.last_export_stats = {
+            'format': format_type,
+            'compression': compression,
+            'filename': filename,
+            'rows': rows,
+            'bytes': os.path.getsize(filename),
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(rows / seconds) if seconds > 0 else rows
+        }
 
 # Classes spécialisées pour différents types de rapports
 
 class SalesExporter(DataExporter):
     """Exporteur spécialisé pour les rapports de ventes"""
 
-    def export_sales_report(self, sales_data, format_type='csv', filename=None):
+    # Colonnes des rapports (en-têtes et types des valeurs brutes), partagées avec les aperçus
+    SALES_HEADERS = ['Date', 'Produit', 'Vendeur', 'Quantité', 'Prix Unitaire', 'Total', 'Bénéfice']
+    SALES_COLUMN_TYPES = ['date', None, None, None, 'amount', 'amount', None]
+    VENDOR_HEADERS = ['Vendeur', 'Nb Ventes', 'Quantité Totale', 'CA Total', 'CA Moyen', 'Performance']
+    VENDOR_COLUMN_TYPES = [None, None, None, 'amount', 'amount', None]
+
+    def export_sales_report(self, sales_data, format_type='csv', filename=None, compression=None):
         """Exporte un rapport de ventes"""
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"rapport_ventes_{timestamp}"
 
-        headers = ['Date', 'Produit', 'Vendeur', 'Quantité', 'Prix Unitaire', 'Total', 'Bénéfice']
+        return self._export_by_format(self._sales_rows(sales_data), self.SALES_HEADERS, filename, format_type,
+                                      "Rapport des Ventes", self.SALES_COLUMN_TYPES, compression)
 
-        # Formatter les données
-        formatted_data = []
-        for sale in sales_data:
-            row = [
-                format_datetime(sale.get('created_at', ''), output_format='%d/%m/%Y'),
+    def _sales_rows(self, sales_data):
+        """Lignes brutes des ventes, produites au fil de la lecture (dictionnaires ou sqlite3.Row)"""
+        for sale in map(dict, sales_data):
+            yield [
+                to_date(sale.get('created_at')),
                 sale.get('product_name', 'N/A'),
                 sale.get('vendeur_name', 'N/A'),
-                str(sale.get('quantity', 0)),
-                format_currency(sale.get('unit_price', 0)),
-                format_currency(sale.get('total_amount', 0)),
+                sale.get('quantity') or 0,
+                to_amount(sale.get('unit_price')),
+                to_amount(sale.get('total_amount')),
                 'À calculer'  # Le bénéfice nécessite plus de calculs
             ]
-            formatted_data.append(row)
 
-        return self._export_by_format(formatted_data, headers, filename, format_type, "Rapport des Ventes")
-
-    def export_vendor_performance(self, vendor_stats, format_type='csv', filename=None):
+    def export_vendor_performance(self, vendor_stats, format_type='csv', filename=None, compression=None):
         """Exporte les performances des vendeurs"""
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"performance_vendeurs_{timestamp}"
 
-        headers = ['Vendeur', 'Nb Ventes', 'Quantité Totale', 'CA Total', 'CA Moyen', 'Performance']
+        return self._export_by_format(self._vendor_rows(vendor_stats), self.VENDOR_HEADERS, filename, format_type,
+                                      "Performance des Vendeurs", self.VENDOR_COLUMN_TYPES, compression)
 
-        formatted_data = []
-        for vendor in vendor_stats:
+    def _vendor_rows(self, vendor_stats):
+        """Lignes brutes des performances des vendeurs"""
+        for vendor in map(dict, vendor_stats):
             total_sales = vendor.get('total_sales', 0)
             total_transactions = vendor.get('total_transactions', 0)
             avg_sale = total_sales / total_transactions if total_transactions > 0 else 0
@@ -277,31 +596,38 @@ class SalesExporter(DataExporter):
             else:
                 performance = "À améliorer"
 
-            row = [
+            yield [
                 vendor.get('vendeur_name', 'N/A'),
-                str(total_transactions),
-                str(vendor.get('total_quantity_sold', 0)),
-                format_currency(total_sales),
-                format_currency(avg_sale),
+                total_transactions,
+                vendor.get('total_quantity_sold') or 0,
+                to_amount(total_sales),
+                to_amount(round(avg_sale, 2)),
                 performance
             ]
-            formatted_data.append(row)
-
-        return self._export_by_format(formatted_data, headers, filename, format_type, "Performance des Vendeurs")
 
 class InventoryExporter(DataExporter):
     """Exporteur spécialisé pour les rapports d'inventaire"""
 
-    def export_stock_report(self, products_data, format_type='csv', filename=None):
+    # Colonnes des rapports (en-têtes et types des valeurs brutes), partagées avec les aperçus
+    STOCK_HEADERS = ['Produit', 'Catégorie', 'Stock Actuel', 'Stock Min', 'Statut', 'Valeur Stock', 'Dernière MAJ']
+    STOCK_COLUMN_TYPES = [None, None, None, None, None, 'amount', 'date']
+    LOW_STOCK_HEADERS = ['Produit', 'Catégorie', 'Stock Actuel', 'Stock Min', 'Urgence', 'À Commander']
+    LOW_STOCK_COLUMN_TYPES = None
+    VALUATION_HEADERS = ['Produit', 'Catégorie', 'Quantité', 'Prix Achat', 'Valeur Stock']
+    VALUATION_COLUMN_TYPES = [None, None, None, 'amount', 'amount']
+
+    def export_stock_report(self, products_data, format_type='csv', filename=None, compression=None):
         """Exporte un rapport de stock"""
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"rapport_stock_{timestamp}"
 
-        headers = ['Produit', 'Catégorie', 'Stock Actuel', 'Stock Min', 'Statut', 'Valeur Stock', 'Dernière MAJ']
+        return self._export_by_format(self._stock_rows(products_data), self.STOCK_HEADERS, filename, format_type,
+                                      "Rapport de Stock", self.STOCK_COLUMN_TYPES, compression)
 
-        formatted_data = []
-        for product in products_data:
+    def _stock_rows(self, products_data):
+        """Lignes brutes du rapport de stock"""
+        for product in map(dict, products_data):
             stock_value = product.get('quantity', 0) * product.get('purchase_price', 0)
 
             # Déterminer le statut du stock
@@ -312,29 +638,28 @@ class InventoryExporter(DataExporter):
             else:
                 status = "✅ Normal"
 
-            row = [
+            yield [
                 product.get('name', 'N/A'),
                 product.get('category_name', 'N/A'),
-                str(product.get('quantity', 0)),
-                str(product.get('min_stock_level', 0)),
+                product.get('quantity') or 0,
+                product.get('min_stock_level') or 0,
                 status,
-                format_currency(stock_value),
-                format_datetime(product.get('last_updated', ''), output_format='%d/%m/%Y')
+                to_amount(stock_value),
+                to_date(product.get('last_updated'))
             ]
-            formatted_data.append(row)
 
-        return self._export_by_format(formatted_data, headers, filename, format_type, "Rapport de Stock")
-
-    def export_low_stock_alert(self, low_stock_products, format_type='csv', filename=None):
+    def export_low_stock_alert(self, low_stock_products, format_type='csv', filename=None, compression=None):
         """Exporte les alertes de stock faible"""
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"alerte_stock_faible_{timestamp}"
 
-        headers = ['Produit', 'Catégorie', 'Stock Actuel', 'Stock Min', 'Urgence', 'À Commander']
+        return self._export_by_format(self._low_stock_rows(low_stock_products), self.LOW_STOCK_HEADERS, filename,
+                                      format_type, "Alerte Stock Faible", self.LOW_STOCK_COLUMN_TYPES, compression)
 
-        formatted_data = []
-        for product in low_stock_products:
+    def _low_stock_rows(self, low_stock_products):
+        """Lignes brutes des alertes de stock faible"""
+        for product in map(dict, low_stock_products):
             current_stock = product.get('quantity', 0)
             min_stock = product.get('min_stock_level', 0)
 
@@ -349,48 +674,311 @@ class InventoryExporter(DataExporter):
                 urgence = "🟡 MODÉRÉE"
                 to_order = min_stock
 
-            row = [
+            yield [
                 product.get('name', 'N/A'),
                 product.get('category_name', 'N/A'),
-                str(current_stock),
-                str(min_stock),
+                current_stock,
+                min_stock,
                 urgence,
-                str(int(to_order))
+                int(to_order)
             ]
-            formatted_data.append(row)
 
-        return self._export_by_format(formatted_data, headers, filename, format_type, "Alerte Stock Faible")
+    def export_valuation_report(self, valuation, format_type='csv', filename=None, compression=None):
+        """Exporte la valorisation du stock à une date"""
+        if not filename:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"valorisation_stock_{timestamp}"
 
-    def _export_by_format(self, data, headers, filename, format_type, title):
-        """Exporte selon le format demandé"""
-        if format_type.lower() == 'csv':
-            return self.export_to_csv(data, headers, filename)
-        elif format_type.lower() == 'txt':
-            return self.export_to_txt(data, headers, filename)
-        elif format_type.lower() == 'json':
-            return self.export_to_json(data, headers, filename)
-        elif format_type.lower() == 'html':
-            return self.export_to_html(data, headers, filename, title)
-        else:
-            raise ExportError(f"Format non supporté: {format_type}")
+        title = f"Valorisation du Stock au {format_datetime(valuation['date'], input_format='%Y-%m-%d', output_format='%d/%m/%Y')}"
+        return self._export_by_format(self._valuation_rows(valuation), self.VALUATION_HEADERS, filename, format_type,
+                                      title, self.VALUATION_COLUMN_TYPES, compression)
+
+    def _valuation_rows(self, valuation):
+        """Lignes brutes de la valorisation, suivies du total"""
+        for product in valuation['products']:
+            yield [
+                product.get('name', 'N/A'),
+                product.get('category_name') or 'N/A',
+                product.get('quantity') or 0,
+                to_amount(product.get('purchase_price')),
+                to_amount(product.get('stock_value'))
+            ]
+
+        yield ['TOTAL', '', valuation['total_quantity'], '', to_amount(valuation['total_value'])]
 
 # Fonction utilitaire pour l'export rapide
-def quick_export(data, headers, filename, format_type='csv', title="Rapport"):
+def quick_export(data, headers, filename, format_type='csv', title="Rapport", column_types=None, compression=None):
     """Fonction d'export rapide"""
-    exporter = DataExporter()
-
-    if format_type.lower() == 'csv':
-        return exporter.export_to_csv(data, headers, filename)
-    elif format_type.lower() == 'txt':
-        return exporter.export_to_txt(data, headers, filename)
-    elif format_type.lower() == 'json':
-        return exporter.export_to_json(data, headers, filename)
-    elif format_type.lower() == 'html':
-        return exporter.export_to_html(data, headers, filename, title)
-    else:
-        raise ExportError(f"Format non supporté: {format_type}")
+    return DataExporter()._export_by_format(data, headers, filename, format_type, title, column_types, compression)
+
+def read_ndjson(filename):
+    """Relit un export NDJSON (éventuellement compressé) en flux: retourne ses métadonnées et un itérateur sur les enregistrements"""
+    try:
+        if filename.endswith('.gz'):
+            ndjsonfile = gzip.open(filename, 'rt', encoding='utf-8')
+        elif filename.endswith('.xz'):
+            ndjsonfile = lzma.open(filename, 'rt', encoding='utf-8')
+        else:
+            ndjsonfile = open(filename, encoding='utf-8')
+        metadata = json.loads(ndjsonfile.readline() or '{}').get('metadata', {})
+    except Exception as e:
+        raise ExportError(f"Erreur lors de la lecture NDJSON: {str(e)}")
+
+    def records():
+        with ndjsonfile:
+            for line in ndjsonfile:
+                if line.strip():
+                    yield json.loads(line)
+
+    return metadata, records()
+
+# Génération des rapports: lots en parallèle, cache et aperçu
+class ReportJob:
+    """Rapport d'un lot: type, format, période, puis fichier produit ou erreur"""
+
+    def __init__(self, report, format_type='csv', period=None, filename=None, compression=None):
+        """Initialise le rapport à générer (period: (date de début, date de fin) ou None)"""
+        if report not in BATCH_REPORTS:
+            raise ExportError(f"Rapport inconnu: {report}. Choisissez {', '.join(BATCH_REPORTS)}")
+        self.report = report
+        self.format_type = format_type
+        self.start_date, self.end_date = period if period and report in PERIOD_REPORTS else (None, None)
+        self.compression = compression
+        if filename is None:
+            parts = [BATCH_REPORTS[report], datetime.now().strftime("%Y%m%d_%H%M%S")]
+            if self.start_date or self.end_date:
+                parts.append(f"{self.start_date}_{self.end_date}")
+            filename = '_'.join(parts)
+        self.filename = filename
+        self.output = None
+        self.stats = None
+        self.error = None
+        self.done = False
+
+    @property
+    def failed(self):
+        """Le rapport a échoué"""
+        return self.error is not None
+
+    def __repr__(self):
+        """Représentation lisible dans les journaux"""
+        return f"ReportJob({self.report!r}, {self.format_type!r}, {self.start_date}, {self.end_date})"
+
+def run_report_job(job, db_path, use_cache=None):
+    """Génère un rapport sur sa propre connexion en lecture seule (utilisable dans un processus de travail)
+
+    Si les tables lues n'ont pas changé depuis un rapport identique (même type,
+    période, format et compression), le fichier en cache est copié au lieu d'être
+    régénéré; ses statistiques portent alors 'cached': True.
+    """
+    # Import local: les modèles ne sont chargés que dans les processus qui génèrent des rapports
+    from gestion.database.database_manager import DatabaseManager
+    from gestion.models.product_model import ProductModel
+    from gestion.models.vendeur_model import VendeurModel
+    from gestion.utils.report_cache import report_cache
+
+    if use_cache is None:
+        use_cache = config.EXPORT_CONFIG['report_cache']
+    db = DatabaseManager(db_path, read_only=True)
+    try:
+        as_of_date = job.end_date or date.today()
+        if use_cache:
+            versions = db.get_current_versions(REPORT_TABLES[job.report])
+            params = (os.path.abspath(db_path), job.start_date, as_of_date if job.report == 'valuation' else job.end_date)
+            key = report_cache.make_key(job.report, params, job.format_type, job.compression, versions)
+            target = default_exporter._output_path(job.filename, '.' + job.format_type, job.compression)
+            stats = report_cache.fetch(key, target)
+            if stats is not None:
+                return target, stats
+
+        # Exporteur propre au job: ses statistiques ne sont pas écrasées par un export concurrent
+        options = {'filename': job.filename, 'compression': job.compression}
+        if job.report == 'sales':
+            exporter = SalesExporter()
+            sales = ProductModel(db).iter_sales(job.start_date, job.end_date)
+            output = exporter.export_sales_report(sales, job.format_type, **options)
+        elif job.report == 'vendeurs':
+            exporter = SalesExporter()
+            stats = VendeurModel(db).get_vendeur_sales_stats(None, job.start_date, job.end_date)
+            output = exporter.export_vendor_performance(stats, job.format_type, **options)
+        elif job.report == 'stock':
+            exporter = InventoryExporter()
+            output = exporter.export_stock_report(ProductModel(db).get_all_products(), job.format_type, **options)
+        elif job.report == 'alerts':
+            exporter = InventoryExporter()
+            products = ProductModel(db).get_low_stock_products()
+            output = exporter.export_low_stock_alert(products, job.format_type, **options)
+        else:
+            exporter = InventoryExporter()
+            valuation = ProductModel(db).get_inventory_valuation(as_of_date)
+            output = exporter.export_valuation_report(valuation, job.format_type, **options)
+        stats = exporter.last_export_stats
+        if job.report == 'valuation':
+            # Totaux affichés à la fin de l'export (conservés avec l'entrée du cache)
+            stats = dict(stats, products=len(valuation['products']), total_value=to_amount(valuation['total_value']))
+
+        # Un rapport HTML découpé en pages (fichiers liés entre eux) n'est pas mis en cache
+        paged = job.format_type == 'html' and os.path.exists(output[:-len('.html')] + '_p0001.html')
+        if use_cache and not paged:
+            report_cache.store(key, output, stats)
+        return output, stats
+    finally:
+        db.close()
+
+def build_report_preview(report, period=None, db_path=None, limit=None):
+    """Aperçu d'un rapport: ses premières lignes mises en forme et des totaux calculés en SQL
+
+    Lit la base sur sa propre connexion en lecture seule (utilisable depuis un
+    thread). Retourne {'headers', 'rows', 'totals': [(libellé, valeur)], 'total_rows'}.
+    """
+    # Import local: les modèles ne sont chargés que lorsqu'un aperçu est demandé
+    from gestion.database.database_manager import DatabaseManager
+    from gestion.models.product_model import ProductModel
+    from gestion.models.vendeur_model import VendeurModel
+    from gestion.utils.helpers import format_currency
+
+    if report not in BATCH_REPORTS:
+        raise ExportError(f"Aperçu non disponible pour le rapport {report}")
+    limit = limit or config.EXPORT_CONFIG['preview_rows']
+    start_date, end_date = period or (None, None)
+
+    db = DatabaseManager(db_path or config.DATABASE_PATH, read_only=True)
+    try:
+        model = ProductModel(db)
+        if report == 'sales':
+            rows = sales_exporter._sales_rows(model.get_sales(start_date, end_date, limit))
+            headers, column_types = SalesExporter.SALES_HEADERS, SalesExporter.SALES_COLUMN_TYPES
+            totals = model.get_sales_totals(start_date, end_date)
+            total_rows = totals['total_transactions']
+            summary = [
+                ("Ventes", total_rows),
+                ("Quantité vendue", totals['total_quantity']),
+                ("CA total", format_currency(totals['total_sales'])),
+                ("Bénéfice brut", format_currency(totals['total_sales'] - totals['total_cost']))
+            ]
+        elif report == 'vendeurs':
+            # Une ligne par vendeur: l'agrégat est déjà calculé dans sales_daily
+            vendors = VendeurModel(db).get_vendeur_sales_stats(None, start_date, end_date)
+            rows = sales_exporter._vendor_rows(vendors[:limit])
+            headers, column_types = SalesExporter.VENDOR_HEADERS, SalesExporter.VENDOR_COLUMN_TYPES
+            totals = model.get_sales_totals(start_date, end_date)
+            total_rows = len(vendors)
+            summary = [
+                ("Vendeurs", total_rows),
+                ("Ventes", totals['total_transactions']),
+                ("CA total", format_currency(totals['total_sales']))
+            ]
+        elif report == 'stock':
+            rows = inventory_exporter._stock_rows(model.get_all_products(limit))
+            headers, column_types = InventoryExporter.STOCK_HEADERS, InventoryExporter.STOCK_COLUMN_TYPES
+            totals = model.get_stock_totals()
+            total_rows = totals['total_products']
+            summary = [
+                ("Produits", total_rows),
+                ("Quantité en stock", totals['total_quantity']),
+                ("Valeur du stock", format_currency(totals['stock_value'])),
+                ("En stock faible", totals['low_stock_count']),
+                ("En rupture", totals['out_of_stock_count'])
+            ]
+        elif report == 'alerts':
+            rows = inventory_exporter._low_stock_rows(model.get_low_stock_products(limit))
+            headers, column_types = InventoryExporter.LOW_STOCK_HEADERS, InventoryExporter.LOW_STOCK_COLUMN_TYPES
+            totals = model.get_stock_totals()
+            total_rows = totals['low_stock_count']
+            summary = [
+                ("En stock faible", total_rows),
+                ("En rupture", totals['out_of_stock_count'])
+            ]
+        else:
+            valuation = model.get_inventory_valuation(end_date or date.today())
+            # Sans la ligne TOTAL finale: les totaux sont affichés à part
+            rows = list(inventory_exporter._valuation_rows(dict(valuation, products=valuation['products'][:limit])))[:-1]
+            headers, column_types = InventoryExporter.VALUATION_HEADERS, InventoryExporter.VALUATION_COLUMN_TYPES
+            total_rows = len(valuation['products'])
+            summary = [
+                ("Produits en stock", total_rows),
+                ("Quantité", valuation['total_quantity']),
+                ("Valeur au " + valuation['date'], format_currency(valuation['total_value']))
+            ]
+
+        if column_types:
+            rows = present_rows(rows, column_types)
+        return {'headers': headers, 'rows': list(rows), 'totals': summary, 'total_rows': total_rows}
+    finally:
+        db.close()
+
+class ReportBatch:
+    """Lot de rapports générés en parallèle dans un pool de processus
+
+    Chaque processus ouvre sa propre connexion en lecture seule: les rapports
+    n'attendent ni l'interface ni les autres rapports. progress(job, completed, total)
+    est appelé dans le thread qui exécute run() à la fin de chaque rapport.
+    """
+
+    def __init__(self, jobs, db_path=None, max_workers=None, use_cache=None):
+        """Initialise le lot (jobs: ReportJob ou tuples (rapport, format, période))"""
+        self.jobs = [job if isinstance(job, ReportJob) else ReportJob(*job) for job in jobs]
+        self.db_path = os.path.abspath(db_path or config.DATABASE_PATH)
+        self.max_workers = max_workers or config.EXPORT_CONFIG['batch_workers'] or os.cpu_count() or 1
+        self.use_cache = use_cache
+        self.completed = 0
+        self.done = False
+        self.thread = None
+
+    @property
+    def total(self):
+        """Nombre de rapports du lot"""
+        return len(self.jobs)
+
+    @property
+    def failures(self):
+        """Rapports en échec"""
+        return [job for job in self.jobs if job.failed]
+
+    def run(self, progress=None):
+        """Génère tous les rapports et retourne les jobs (fichier ou erreur pour chacun)"""
+        if not os.path.exists(self.db_path):
+            raise ExportError(f"Base de données introuvable: {self.db_path}")
+        try:
+            workers = max(1, min(self.max_workers, self.total))
+            # spawn: un fork copierait les threads en cours (sauvegarde, interface)
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                futures = {executor.submit(run_report_job, job, self.db_path, self.use_cache): job for job in self.jobs}
+                for future in as_completed(futures):
+                    job = futures[future]
+                    try:
+                        job.output, job.stats = future.result()
+                    except Exception as e:
+                        job.error = str(e)
+                    job.done = True
+                    self.completed += 1
+                    if progress:
+                        progress(job, self.completed, self.total)
+        finally:
+            self.done = True
+        return self.jobs
+
+    def run_async(self, progress=None):
+        """Lance le lot dans un thread; une interface Tk consulte completed/done depuis sa boucle (after)"""
+        def run():
+            try:
+                self.run(progress)
+            except Exception as e:
+                for job in self.jobs:
+                    if not job.done:
+                        job.error = str(e)
+                        job.done = True
+
+        self.thread = threading.Thread(target=run, name="report-batch", daemon=True)
+        self.thread.start()
+        return self
+
+def generate_reports(jobs, db_path=None, max_workers=None, progress=None, use_cache=None):
+    """Génère un lot de rapports en parallèle et retourne les jobs terminés"""
+    return ReportBatch(jobs, db_path, max_workers, use_cache).run(progress)
 
 # Instance globale pour utilisation facile
 default_exporter = DataExporter()
 sales_exporter = SalesExporter()
-inventory_exporter = InventoryExporter()
\ No newline at end of file
+inventory_exporter = InventoryExporter()
@@ -5,8 +5,8 @@ Fonctions utilitaires pour l'application
 
 import re
 import os
-import shutil
 import logging
+import unicodedata
 from datetime import datetime, timedelta
 from gestion.config.config import config
 
@@ -107,21 +107,25 @@ def clean_filename(filename):
     # Limiter la longueur
     return clean_name[:200]
 
+def normalize_search_text(text):
+    """Normalise un texte pour la recherche (minuscules, sans accents ni ponctuation)"""
+    if not text:
+        return ""
+    text = str(text).lower().replace('œ', 'oe').replace('æ', 'ae')
+    decomposed = unicodedata.normalize('NFKD', text)
+    without_accents = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    # "Coca-Cola 1,5L" -> "coca cola 1 5l"
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', without_accents).split())
+
 def backup_database(db_path, backup_dir=None):
     """Crée une sauvegarde de la base de données"""
     try:
         if backup_dir is None:
             backup_dir = config.LOGS_DIR
 
-        # Créer le répertoire de sauvegarde
-        os.makedirs(backup_dir, exist_ok=True)
-
-        # Nom du fichier de sauvegarde
-        backup_filename = config.get_backup_filename()
-        backup_path = os.path.join(backup_dir, backup_filename)
-
-        # Copier la base de données
-        shutil.copy2(db_path, backup_path)
+        # Copie cohérente par l'API de sauvegarde SQLite (et non une copie du fichier)
+        from gestion.database.backup_service import BackupService
+        backup_path = BackupService(db_path, backup_dir).backup()
 
         # Nettoyer les anciennes sauvegardes
         cleanup_old_backups(backup_dir)
@@ -0,0 +1,193 @@
+# gestion/utils/report_cache.py
+"""
+Cache des rapports générés: un fichier est réutilisé tant que les données qu'il décrit n'ont pas changé
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from gestion.config.config import config
+
+# Description d'une entrée, écrite à côté du fichier en cache
+ENTRY_FILENAME = 'entry.json'
+
+class ReportCache:
+    """Fichiers de rapports rangés par clé (rapport, paramètres, format, versions des tables)
+
+    Chaque entrée est un dossier du cache; sa date de modification sert d'horodatage
+    LRU, ce qui permet à plusieurs processus (lots, ligne de commande) de partager
+    le même cache sans index commun.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        """Initialise le cache"""
+        self.cache_dir = cache_dir or config.REPORT_CACHE_DIR
+        self.max_bytes = max_bytes or config.EXPORT_CONFIG['report_cache_max_mb'] * 1024 * 1024
+        self.lock = threading.Lock()
+
+        # Statistiques (de ce processus)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def make_key(report, params, format_type, compression, versions):
+        """Clé d'un rapport: les versions des tables changent à chaque écriture"""
+        return {
+            'report': report,
+            'params': [str(value) for value in params],
+            'format': format_type,
+            'compression': compression,
+            'versions': list(versions)
+        }
+
+    @staticmethod
+    def digest(value):
+        """Empreinte courte d'une valeur JSON"""
+        return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()[:24]
+
+    def entry_dir(self, key):
+        """Dossier d'une entrée: empreinte du rapport demandé, puis celle des versions des données"""
+        request = {name: value for name, value in key.items() if name != 'versions'}
+        return os.path.join(self.cache_dir, f"{self.digest(request)}-{self.digest(key['versions'])}")
+
+    def fetch(self, key, target_path):
+        """Copie le rapport en cache vers target_path; retourne ses statistiques d'export ou None"""
+        entry_dir = self.entry_dir(key)
+        try:
+            entry = self.read_entry(entry_dir)
+            if entry is None or entry['key'] != key:
+                with self.lock:
+                    self.misses += 1
+                return None
+            shutil.copyfile(os.path.join(entry_dir, entry['file']), target_path)
+            # Compteur conservé avec l'entrée (partagé entre processus, au mieux)
+            entry['hits'] = entry.get('hits', 0) + 1
+            self.write_entry(entry_dir, entry)
+            # Entrée la plus récemment utilisée
+            os.utime(entry_dir)
+        except OSError:
+            # Entrée supprimée par un autre processus pendant la lecture
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+            self.saved_seconds += entry['stats'].get('seconds', 0)
+        return dict(entry['stats'], filename=target_path, cached=True)
+
+    def store(self, key, path, stats):
+        """Ajoute un rapport au cache (copie) puis évince les entrées les moins récemment utilisées"""
+        size = os.path.getsize(path)
+        if size > self.max_bytes:
+            return False
+
+        entry_dir = self.entry_dir(key)
+        temp_dir = f"{entry_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(temp_dir, exist_ok=True)
+            file_name = os.path.basename(path)
+            shutil.copyfile(path, os.path.join(temp_dir, file_name))
+            entry = {'key': key, 'file': file_name, 'bytes': size, 'created_at': time.time(), 'hits': 0, 'stats': stats}
+            self.write_entry(temp_dir, entry)
+            if os.path.exists(entry_dir):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            os.rename(temp_dir, entry_dir)
+        except OSError:
+            # Entrée écrite au même moment par un autre processus: la sienne est gardée
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return False
+
+        with self.lock:
+            self.stores += 1
+        self.remove_outdated(entry_dir)
+        self.evict()
+        return True
+
+    def remove_outdated(self, entry_dir):
+        """Supprime les versions précédentes du même rapport: leurs données ont changé"""
+        prefix = os.path.basename(entry_dir).split('-')[0] + '-'
+        for _, other_dir, _ in self.list_entries():
+            if other_dir != entry_dir and os.path.basename(other_dir).startswith(prefix):
+                shutil.rmtree(other_dir, ignore_errors=True)
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes"""
+        entries = self.list_entries()
+        total = sum(size for _, _, size in entries)
+        for _, entry_dir, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            with self.lock:
+                self.evictions += 1
+
+    def list_entries(self):
+        """Entrées du cache: (dernière utilisation, dossier, taille en octets)"""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            if name.endswith('.tmp') or not os.path.isdir(entry_dir):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(entry_dir) if entry.is_file())
+                entries.append((os.path.getmtime(entry_dir), entry_dir, size))
+            except OSError:
+                continue
+        return entries
+
+    @staticmethod
+    def read_entry(entry_dir):
+        """Description d'une entrée ou None si absente"""
+        try:
+            with open(os.path.join(entry_dir, ENTRY_FILENAME), encoding='utf-8') as entry_file:
+                return json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def write_entry(entry_dir, entry):
+        """Écrit la description d'une entrée (remplacement atomique)"""
+        path = os.path.join(entry_dir, ENTRY_FILENAME)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}"
+        with open(temp_path, 'w', encoding='utf-8') as entry_file:
+            json.dump(entry, entry_file, default=str)
+        os.replace(temp_path, path)
+
+    def clear(self):
+        """Vide le cache"""
+        for _, entry_dir, _ in self.list_entries():
+            shutil.rmtree(entry_dir, ignore_errors=True)
+
+    def get_stats(self):
+        """Retourne les statistiques d'utilisation du cache (compteurs de ce processus et des entrées)"""
+        entries = self.list_entries()
+        descriptions = [self.read_entry(entry_dir) or {} for _, entry_dir, _ in entries]
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(entries),
+                'bytes': sum(size for _, _, size in entries),
+                'entry_hits': sum(entry.get('hits', 0) for entry in descriptions),
+                'entry_saved_seconds': round(sum(entry.get('hits', 0) * entry.get('stats', {}).get('seconds', 0)
+                                                 for entry in descriptions), 3),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'saved_seconds': round(self.saved_seconds, 3),
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0
+            }
+
+# Instance globale pour utilisation facile
+report_cache = ReportCache()
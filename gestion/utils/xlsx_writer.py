@@ -0,0 +1,226 @@
+# gestion/utils/xlsx_writer.py
+"""
+Écriture de classeurs Excel (.xlsx) sans dépendance externe: XML écrit en flux dans une archive zip
+"""
+
+import math
+import re
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+# Lignes par feuille imposées par Excel (en-tête compris): au-delà, feuille suivante
+XLSX_MAX_ROWS = 1048576
+
+# Mémoire (octets estimés) des chaînes partagées gardées en mémoire: au-delà, les
+# nouvelles chaînes sont écrites directement dans la cellule (inlineStr)
+XLSX_SHARED_STRINGS_BUDGET = 16 * 1024 * 1024
+# Coût estimé d'une entrée du dictionnaire des chaînes, hors texte
+SHARED_STRING_OVERHEAD = 120
+
+# Lignes XML accumulées avant chaque écriture dans l'archive
+XLSX_CHUNK_ROWS = 1000
+
+# Styles (index dans cellXfs de styles.xml)
+STYLE_HEADER = 1
+STYLE_INTEGER = 2
+STYLE_DECIMAL = 3
+STYLE_DATE = 4
+STYLE_DATETIME = 5
+
+# Caractères interdits en XML 1.0
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Origine des dates Excel (système 1900, décalé du faux 29/02/1900)
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+CONTENT_TYPES_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>
+{sheets}</Types>
+"""
+
+ROOT_RELS_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>
+"""
+
+STYLES_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<numFmts count="2"><numFmt numFmtId="164" formatCode="dd/mm/yyyy"/><numFmt numFmtId="165" formatCode="dd/mm/yyyy hh:mm"/></numFmts>
+<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="6">
+<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>
+<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>
+<xf numFmtId="3" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>
+</cellXfs>
+</styleSheet>
+"""
+
+SHEET_START_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>
+<sheetData>
+"""
+
+SHEET_END_XML = """</sheetData>
+</worksheet>
+"""
+
+def xml_text(value):
+    """Texte échappé pour un nœud XML"""
+    return escape(INVALID_XML_CHARS.sub('', value))
+
+class XlsxWriter:
+    """Classeur écrit en flux: une feuille à la fois, chaînes partagées dans la limite du budget"""
+
+    def __init__(self, path, sheet_title="Rapport", strings_budget=None):
+        """Initialise le classeur"""
+        self.path = path
+        # Nom de feuille Excel: 31 caractères, sans []:*?/\
+        self.sheet_title = re.sub(r'[\[\]:*?/\\]', ' ', sheet_title)[:28] or "Feuille"
+        self.strings_budget = strings_budget or XLSX_SHARED_STRINGS_BUDGET
+        self.shared_strings = {}
+        self.shared_size = 0
+        self.sheet_count = 0
+
+    def write(self, headers, rows):
+        """Écrit l'en-tête puis les lignes (réparties sur plusieurs feuilles si nécessaire) et retourne leur nombre"""
+        count = 0
+        with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            sheet = None
+            buffer = []
+            row_number = 0
+            for row in rows:
+                if sheet is None or row_number == XLSX_MAX_ROWS:
+                    if sheet is not None:
+                        sheet.write((''.join(buffer) + SHEET_END_XML).encode('utf-8'))
+                        sheet.close()
+                        buffer = []
+                    sheet = self.open_sheet(archive, headers)
+                    row_number = 1
+
+                row_number += 1
+                buffer.append(self.format_row(row_number, row))
+                count += 1
+                if len(buffer) >= XLSX_CHUNK_ROWS:
+                    sheet.write(''.join(buffer).encode('utf-8'))
+                    buffer = []
+
+            if sheet is None:
+                sheet = self.open_sheet(archive, headers)
+            sheet.write((''.join(buffer) + SHEET_END_XML).encode('utf-8'))
+            sheet.close()
+
+            self.write_workbook(archive)
+        return count
+
+    def open_sheet(self, archive, headers):
+        """Ouvre la feuille suivante dans l'archive et écrit sa ligne d'en-tête"""
+        self.sheet_count += 1
+        # force_zip64: la taille d'une feuille n'est pas connue à l'avance
+        sheet = archive.open(f"xl/worksheets/sheet{self.sheet_count}.xml", 'w', force_zip64=True)
+        header_cells = ''.join(
+            f'<c t="inlineStr" s="{STYLE_HEADER}"><is><t>{xml_text(str(header))}</t></is></c>' for header in headers
+        )
+        sheet.write((SHEET_START_XML + f'<row r="1">{header_cells}</row>\n').encode('utf-8'))
+        return sheet
+
+    def format_row(self, row_number, row):
+        """Ligne XML: nombres et dates typés, textes en chaînes partagées"""
+        cells = []
+        for value in row:
+            if value is None or value == '':
+                cells.append('<c/>')
+            elif isinstance(value, bool):
+                cells.append(f'<c t="b"><v>{int(value)}</v></c>')
+            elif isinstance(value, int):
+                cells.append(f'<c s="{STYLE_INTEGER}"><v>{value}</v></c>')
+            elif isinstance(value, float):
+                if not math.isfinite(value):
+                    # NaN et infinis n'existent pas dans une cellule Excel: écrits en texte
+                    cells.append(self.string_cell(str(value)))
+                    continue
+                style = STYLE_INTEGER if value.is_integer() else STYLE_DECIMAL
+                cells.append(f'<c s="{style}"><v>{value!r}</v></c>')
+            elif isinstance(value, datetime):
+                serial = (value - EXCEL_EPOCH).total_seconds() / 86400
+                cells.append(f'<c s="{STYLE_DATETIME}"><v>{serial!r}</v></c>')
+            elif isinstance(value, date):
+                serial = (value - EXCEL_EPOCH.date()).days
+                cells.append(f'<c s="{STYLE_DATE}"><v>{serial}</v></c>')
+            else:
+                cells.append(self.string_cell(str(value)))
+        return f'<row r="{row_number}">{"".join(cells)}</row>\n'
+
+    def string_cell(self, text):
+        """Cellule texte: chaîne partagée si déjà connue ou si le budget le permet, sinon en ligne"""
+        index = self.shared_strings.get(text)
+        if index is None:
+            size = len(text) + SHARED_STRING_OVERHEAD
+            if self.shared_size + size > self.strings_budget:
+                return f'<c t="inlineStr"><is><t xml:space="preserve">{xml_text(text)}</t></is></c>'
+            index = len(self.shared_strings)
+            self.shared_strings[text] = index
+            self.shared_size += size
+        return f'<c t="s"><v>{index}</v></c>'
+
+    def write_workbook(self, archive):
+        """Écrit les parties communes du classeur (feuilles, styles, chaînes partagées)"""
+        sheets = range(1, self.sheet_count + 1)
+        names = [self.sheet_title if number == 1 else f"{self.sheet_title} {number}" for number in sheets]
+
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES_XML.format(sheets=''.join(
+            f'<Override PartName="/xl/worksheets/sheet{number}.xml" '
+            f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\n'
+            for number in sheets
+        )))
+        archive.writestr('_rels/.rels', ROOT_RELS_XML)
+        archive.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">\n<sheets>'
+            + ''.join(f'<sheet name="{xml_text(name)}" sheetId="{number}" r:id="rId{number}"/>'
+                      for number, name in zip(sheets, names))
+            + '</sheets>\n</workbook>\n'
+        ))
+        archive.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\n'
+            + ''.join(f'<Relationship Id="rId{number}" '
+                      f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                      f'Target="worksheets/sheet{number}.xml"/>\n' for number in sheets)
+            + f'<Relationship Id="rId{self.sheet_count + 1}" '
+              f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>\n'
+            + f'<Relationship Id="rId{self.sheet_count + 2}" '
+              f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" '
+              f'Target="sharedStrings.xml"/>\n'
+            + '</Relationships>\n'
+        ))
+        archive.writestr('xl/styles.xml', STYLES_XML)
+
+        # Chaînes partagées, dans l'ordre de leurs index
+        with archive.open('xl/sharedStrings.xml', 'w', force_zip64=True) as strings:
+            strings.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                f'uniqueCount="{len(self.shared_strings)}">\n'
+            ).encode('utf-8'))
+            buffer = []
+            for text in self.shared_strings:
+                buffer.append(f'<si><t xml:space="preserve">{xml_text(text)}</t></si>')
+                if len(buffer) >= XLSX_CHUNK_ROWS:
+                    strings.write(''.join(buffer).encode('utf-8'))
+                    buffer = []
+            strings.write((''.join(buffer) + '</sst>\n').encode('utf-8'))
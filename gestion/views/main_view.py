@@ -13,6 +13,19 @@ from gestion.views.sales_view import SalesView
 from gestion.views.reports_view import ReportsView
 from gestion.views.vendeur_dialog import VendeurDialog
 from gestion.views.category_dialog import CategoryDialog
+from gestion.utils.events import (
+    event_bus, PRODUCT, STOCK_MOVEMENT, VENDEUR, CATEGORY, CREATED, UPDATED, DELETED, REFRESHED
+)
+
+# Correspondance champ produit -> (colonne de la liste, formatage)
+PRODUCT_COLUMNS = {
+    'name': ('Nom', lambda v: v),
+    'category_name': ('Catégorie', lambda v: v or 'N/A'),
+    'purchase_price': ('Prix Achat', lambda v: f"{v:,.0f} Ar"),
+    'selling_price': ('Prix Vente', lambda v: f"{v:,.0f} Ar"),
+    'quantity': ('Stock', lambda v: v),
+    'min_stock_level': ('Stock Min', lambda v: v)
+}
 
 class MainView:
     def __init__(self, parent, user_data):
@@ -24,9 +37,20 @@ class MainView:
         self.category_model = CategoryModel()
         self.vendeur_model = VendeurModel()
 
+        # Widgets mis à jour par les événements (None tant qu'ils ne sont pas affichés)
+        self.products_tree = None
+        self.vendeurs_tree = None
+        self.low_stock_tree = None
+        self.stat_labels = {}
+        self.dashboard_stats = {}
+        self.dashboard_refresh_pending = False
+        self.product_search_var = None
+        self.product_search_job = None
+
         self.setup_window()
         self.create_menu()
         self.create_main_interface()
+        self.subscribe_to_changes()
         self.load_dashboard()
 
     def setup_window(self):
@@ -134,6 +158,23 @@ class MainView:
         user_frame = tk.Frame(menu_frame, bg='#2c3e50')
         user_frame.pack(side='right', padx=20, pady=15)
 
+        # Sauvegarde à chaud (thread séparé, avancement affiché sur le bouton)
+        self.backup_btn = tk.Button(
+            user_frame,
+            text="💾 Sauvegarder",
+            command=self.start_backup,
+            font=('Segoe UI', 9),
+            fg='white',
+            bg='#34495e',
+            relief='flat',
+            bd=0,
+            padx=10,
+            pady=5,
+            cursor='hand2'
+        )
+        self.backup_btn.pack(side='left', padx=(0, 15))
+        self.backup_job = None
+
         user_label = tk.Label(
             user_frame,
             text=f"👤 {self.user_data['full_name']}",
@@ -207,30 +248,29 @@ class MainView:
         stats_frame.pack(fill='x', pady=(0, 20))
 
         try:
-            # Récupérer les statistiques
-            products = self.product_controller.get_all_products()
-            low_stock = self.product_controller.get_low_stock_products()
-            recent_movements = self.product_controller.get_stock_movements(limit=10)
-
-            # Calculer les statistiques
-            total_products = len(products)
-            low_stock_count = len(low_stock)
-            total_stock_value = sum(p['quantity'] * p['purchase_price'] for p in products)
+            # Récupérer les statistiques (une seule requête agrégée, mise en cache)
+            self.dashboard_stats = self.product_controller.get_dashboard_stats()
+            low_stock = self.product_controller.get_low_stock_products() if self.dashboard_stats['low_stock_count'] else []
+            recent_movements = self.product_controller.get_stock_movements(limit=5)
 
             # Cartes de statistiques
             stats_data = [
-                ("📦 Total Produits", str(total_products), "#3498db"),
-                ("⚠️ Stock Faible", str(low_stock_count), "#e74c3c"),
-                ("💰 Valeur Stock", f"{total_stock_value:,.0f} Ar", "#27ae60"),
-                ("📊 Mouvements", str(len(recent_movements)), "#f39c12")
+                ('total_products', "📦 Total Produits", "#3498db"),
+                ('low_stock_count', "⚠️ Stock Faible", "#e74c3c"),
+                ('stock_value', "💰 Valeur Stock", "#27ae60"),
+                ('today_sales_amount', "💵 Ventes du jour", "#9b59b6"),
+                ('total_movements', "📊 Mouvements", "#f39c12")
             ]
 
-            for i, (title, value, color) in enumerate(stats_data):
-                self.create_stat_card(stats_frame, title, value, color, i)
+            self.stat_labels = {}
+            for i, (key, title, color) in enumerate(stats_data):
+                self.stat_labels[key] = self.create_stat_card(
+                    stats_frame, title, self.format_stat(key), color, i
+                )
 
             # Section des produits en stock faible
             if low_stock:
-                self.create_low_stock_section()
+                self.create_low_stock_section(low_stock)
 
             # Section des mouvements récents
             if recent_movements:
@@ -265,7 +305,16 @@ class MainView:
         )
         value_label.pack(pady=(0, 15))
 
-    def create_low_stock_section(self):
+        return value_label
+
+    def format_stat(self, key):
+        """Formate la valeur d'une carte du tableau de bord"""
+        value = self.dashboard_stats.get(key, 0)
+        if key in ('stock_value', 'today_sales_amount'):
+            return f"{value:,.0f} Ar"
+        return str(value)
+
+    def create_low_stock_section(self, low_stock_products):
         """Crée la section des produits en stock faible"""
         # Titre de section
         section_title = tk.Label(
@@ -284,6 +333,7 @@ class MainView:
         # Treeview pour afficher les produits
         columns = ('Nom', 'Stock Actuel', 'Stock Min', 'Catégorie')
         tree = ttk.Treeview(list_frame, columns=columns, show='headings', style='Modern.Treeview')
+        self.low_stock_tree = tree
 
         # Configuration des colonnes
         for col in columns:
@@ -300,9 +350,8 @@ class MainView:
 
         # Charger les données
         try:
-            low_stock_products = self.product_controller.get_low_stock_products()
             for product in low_stock_products:
-                tree.insert('', 'end', values=(
+                tree.insert('', 'end', iid=str(product['products_id']), values=(
                     product['name'],
                     product['quantity'],
                     product['min_stock_level'],
@@ -342,7 +391,7 @@ class MainView:
             movements_frame.grid_columnconfigure(i, weight=1)
 
         # Données des mouvements
-        for row, movement in enumerate(movements[:5], 1):  # Limiter à 5 mouvements
+        for row, movement in enumerate(movements, 1):
             data = [
                 movement['product_name'][:20] + '...' if len(movement['product_name']) > 20 else movement['product_name'],
                 '📥 Entrée' if movement['movement_type'] == 'IN' else '📤 Sortie',
@@ -436,6 +485,25 @@ class MainView:
             btn.bind('<Enter>', lambda e, b=btn: b.configure(relief='raised'))
             btn.bind('<Leave>', lambda e, b=btn: b.configure(relief='solid'))
 
+        # Recherche plein texte (nom ou catégorie)
+        self.product_search_var = tk.StringVar()
+        search_entry = tk.Entry(
+            toolbar_frame,
+            textvariable=self.product_search_var,
+            font=('Segoe UI', 10),
+            relief='solid',
+            bd=1,
+            width=30
+        )
+        search_entry.pack(side='right', ipady=4)
+        tk.Label(
+            toolbar_frame,
+            text="🔍",
+            font=('Segoe UI', 11),
+            bg='#ecf0f1'
+        ).pack(side='right', padx=(0, 5))
+        self.product_search_var.trace_add('write', lambda *args: self.schedule_product_search())
+
         # Liste des produits
         self.create_products_list()
 
@@ -479,8 +547,15 @@ class MainView:
             for item in self.products_tree.get_children():
                 self.products_tree.delete(item)
 
-            # Charger les produits
-            products = self.product_controller.get_all_products()
+            # Charger les produits (résultats classés par pertinence si une recherche est saisie)
+            search_text = self.get_product_search_text()
+            if search_text:
+                products = self.product_controller.search(search_text, limit=200)
+                if not products:
+                    # Aucun mot trouvé tel quel: tenter une recherche tolérante aux fautes
+                    products = self.product_controller.fuzzy_search(search_text, limit=50)
+            else:
+                products = self.product_controller.get_all_products()
 
             for product in products:
                 # Colorer les lignes selon le stock
@@ -488,15 +563,10 @@ class MainView:
                 if product['quantity'] <= product['min_stock_level']:
                     tags = ['low_stock']
 
-                self.products_tree.insert('', 'end', values=(
-                    product['products_id'],
-                    product['name'],
-                    product['category_name'] or 'N/A',
-                    f"{product['purchase_price']:,.0f} Ar",
-                    f"{product['selling_price']:,.0f} Ar",
-                    product['quantity'],
-                    product['min_stock_level']
-                ), tags=tags)
+                self.products_tree.insert(
+                    '', 'end', iid=str(product['products_id']),
+                    values=self.product_row_values(product), tags=tags
+                )
 
             # Configuration des tags
             self.products_tree.tag_configure('low_stock', background='#ffebee', foreground='#c62828')
@@ -504,10 +574,34 @@ class MainView:
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors du chargement des produits: {str(e)}")
 
+    def get_product_search_text(self):
+        """Retourne le texte de recherche saisi dans la liste des produits"""
+        if self.product_search_var is None:
+            return ''
+        return self.product_search_var.get().strip()
+
+    def schedule_product_search(self):
+        """Relance la recherche 300 ms après la dernière frappe"""
+        if self.product_search_job is not None:
+            self.parent.after_cancel(self.product_search_job)
+        self.product_search_job = self.parent.after(300, self.run_product_search)
+
+    def run_product_search(self):
+        """Exécute la recherche différée"""
+        self.product_search_job = None
+        if self.is_displayed(self.products_tree):
+            self.refresh_products_list()
+
+    def product_row_values(self, product):
+        """Construit les valeurs d'une ligne de la liste des produits"""
+        return (product['products_id'],) + tuple(
+            formatter(product[field]) for field, (_, formatter) in PRODUCT_COLUMNS.items()
+        )
+
     def show_add_product_dialog(self):
         """Affiche la boîte de dialogue d'ajout de produit"""
         from gestion.views.product_dialog import ProductDialog
-        dialog = ProductDialog(self.parent, self.category_model, callback=self.refresh_products_list)
+        dialog = ProductDialog(self.parent, self.category_model)
 
     def show_add_stock_dialog(self):
         """Affiche la boîte de dialogue d'ajout de stock"""
@@ -518,7 +612,7 @@ class MainView:
 
         from gestion.views.stock_dialog import StockDialog
         product_id = self.products_tree.item(selected[0])['values'][0]
-        dialog = StockDialog(self.parent, product_id, self.user_data, 'IN', callback=self.refresh_products_list)
+        dialog = StockDialog(self.parent, product_id, self.user_data, 'IN')
 
     def show_sell_dialog(self):
         """Affiche la boîte de dialogue de vente"""
@@ -529,7 +623,7 @@ class MainView:
 
         from gestion.views.stock_dialog import StockDialog
         product_id = self.products_tree.item(selected[0])['values'][0]
-        dialog = StockDialog(self.parent, product_id, self.user_data, 'OUT', callback=self.refresh_products_list)
+        dialog = StockDialog(self.parent, product_id, self.user_data, 'OUT')
 
     def load_sales(self):
         """Charge la gestion des ventes"""
@@ -661,21 +755,15 @@ class MainView:
             vendeurs = self.vendeur_model.get_all_vendeurs()
 
             for vendeur in vendeurs:
-                # Statut avec émoji
-                statut = "✅ Actif" if vendeur['is_active'] else "❌ Inactif"
-
                 # Couleur selon le statut
                 tags = []
                 if not vendeur['is_active']:
                     tags = ['inactive']
 
-                self.vendeurs_tree.insert('', 'end', values=(
-                    vendeur['vendeur_id'],
-                    vendeur['name'],
-                    vendeur['telephone'] or 'N/A',
-                    statut,
-                    vendeur['created_at'][:10]  # Date seulement
-                ), tags=tags)
+                self.vendeurs_tree.insert(
+                    '', 'end', iid=str(vendeur['vendeur_id']),
+                    values=self.vendeur_row_values(vendeur), tags=tags
+                )
 
             # Configuration des tags
             self.vendeurs_tree.tag_configure('inactive', background='#f8f9fa', foreground='#6c757d')
@@ -683,9 +771,22 @@ class MainView:
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors du chargement des vendeurs: {str(e)}")
 
+    def vendeur_row_values(self, vendeur):
+        """Construit les valeurs d'une ligne de la liste des vendeurs"""
+        # Statut avec émoji
+        statut = "✅ Actif" if vendeur['is_active'] else "❌ Inactif"
+
+        return (
+            vendeur['vendeur_id'],
+            vendeur['name'],
+            vendeur['telephone'] or 'N/A',
+            statut,
+            (vendeur['created_at'] or '')[:10]  # Date seulement
+        )
+
     def show_add_vendeur_dialog(self):
         """Affiche la boîte de dialogue d'ajout de vendeur"""
-        dialog = VendeurDialog(self.parent, callback=self.refresh_vendeurs_list)
+        dialog = VendeurDialog(self.parent)
 
     def show_edit_vendeur_dialog(self):
         """Affiche la boîte de dialogue de modification de vendeur"""
@@ -699,7 +800,7 @@ class MainView:
         try:
             vendeur_data = self.vendeur_model.get_vendeur_by_id(vendeur_id)
             if vendeur_data:
-                dialog = VendeurDialog(self.parent, vendeur_data, callback=self.refresh_vendeurs_list)
+                dialog = VendeurDialog(self.parent, vendeur_data)
             else:
                 messagebox.showerror("Erreur", "Vendeur non trouvé")
         except Exception as e:
@@ -723,7 +824,6 @@ class MainView:
 
                 if success:
                     messagebox.showinfo("Succès", message)
-                    self.refresh_vendeurs_list()
                 else:
                     messagebox.showerror("Erreur", message)
 
@@ -741,8 +841,216 @@ class MainView:
         # Charger SEULEMENT la vue des rapports
         reports_view = ReportsView(self.current_content, self.user_data)
 
+    def subscribe_to_changes(self):
+        """Abonne l'interface aux modifications publiées par les contrôleurs"""
+        self.unsubscribers = [
+            event_bus.subscribe(PRODUCT, self.on_product_changed),
+            event_bus.subscribe(STOCK_MOVEMENT, self.on_stock_movement_changed),
+            event_bus.subscribe(VENDEUR, self.on_vendeur_changed),
+            event_bus.subscribe(CATEGORY, self.on_category_changed)
+        ]
+        self.main_frame.bind('<Destroy>', self.on_destroy, add='+')
+
+    def unsubscribe_from_changes(self):
+        """Retire les abonnements de l'interface (déconnexion, fenêtre détruite)"""
+        for unsubscribe in self.unsubscribers:
+            unsubscribe()
+        self.unsubscribers = []
+
+    def on_destroy(self, event):
+        """Désabonne l'interface lorsque son cadre principal est détruit"""
+        if event.widget is self.main_frame:
+            self.unsubscribe_from_changes()
+
+    def is_displayed(self, widget):
+        """Vérifie qu'un widget existe encore à l'écran"""
+        return widget is not None and widget.winfo_exists()
+
+    def on_product_changed(self, event):
+        """Met à jour uniquement les lignes et cartes touchées par un produit modifié"""
+        if event.action == REFRESHED:
+            # Modifié depuis un autre poste: relire ce qui est affiché
+            if self.is_displayed(self.products_tree):
+                self.refresh_products_list()
+            self.refresh_low_stock_list()
+            self.schedule_dashboard_refresh()
+            return
+
+        for product_id in event.ids:
+            self.patch_product_row(event.action, product_id, event.fields)
+            self.patch_low_stock_row(event.action, product_id)
+        self.schedule_dashboard_refresh()
+
+    def patch_product_row(self, action, product_id, fields):
+        """Met à jour une ligne de la liste des produits"""
+        if not self.is_displayed(self.products_tree):
+            return
+
+        iid = str(product_id)
+        if action == DELETED:
+            if self.products_tree.exists(iid):
+                self.products_tree.delete(iid)
+            return
+
+        if action == CREATED and self.get_product_search_text():
+            # Liste filtrée: laisser la recherche décider si le produit y figure
+            self.refresh_products_list()
+            return
+
+        if not self.products_tree.exists(iid):
+            if action == CREATED:
+                self.products_tree.insert('', self.sorted_index(self.products_tree, 'Nom', fields['name']),
+                                          iid=iid, values=self.product_row_values(fields))
+            else:
+                return
+        else:
+            for field, value in fields.items():
+                if field in PRODUCT_COLUMNS:
+                    column, formatter = PRODUCT_COLUMNS[field]
+                    self.products_tree.set(iid, column, formatter(value))
+
+        # Recalculer la coloration selon le stock
+        row = self.products_tree.set(iid)
+        low = int(row['Stock']) <= int(row['Stock Min'])
+        self.products_tree.item(iid, tags=['low_stock'] if low else [])
+
+    def sorted_index(self, tree, column, value):
+        """Retourne la position d'insertion qui conserve l'ordre alphabétique"""
+        for index, iid in enumerate(tree.get_children()):
+            if str(tree.set(iid, column)) > value:
+                return index
+        return 'end'
+
+    def patch_low_stock_row(self, action, product_id):
+        """Ajoute, met à jour ou retire un produit de la liste des stocks faibles"""
+        if not self.is_displayed(self.low_stock_tree):
+            return
+
+        iid = str(product_id)
+        product = None
+        if action != DELETED:
+            product = self.product_controller.product_model.get_product_by_id(product_id)
+
+        if not product or product['quantity'] > product['min_stock_level']:
+            if self.low_stock_tree.exists(iid):
+                self.low_stock_tree.delete(iid)
+            return
+
+        values = (
+            product['name'],
+            product['quantity'],
+            product['min_stock_level'],
+            product['category_name'] or 'N/A'
+        )
+        if self.low_stock_tree.exists(iid):
+            self.low_stock_tree.item(iid, values=values)
+        else:
+            self.low_stock_tree.insert('', 'end', iid=iid, values=values)
+
+    def refresh_low_stock_list(self):
+        """Recharge entièrement la liste des stocks faibles du tableau de bord"""
+        if not self.is_displayed(self.low_stock_tree):
+            return
+
+        try:
+            for item in self.low_stock_tree.get_children():
+                self.low_stock_tree.delete(item)
+            for product in self.product_controller.get_low_stock_products():
+                self.low_stock_tree.insert('', 'end', iid=str(product['products_id']), values=(
+                    product['name'],
+                    product['quantity'],
+                    product['min_stock_level'],
+                    product['category_name'] or 'N/A'
+                ))
+        except Exception as e:
+            print(f"Erreur lors du chargement des produits en stock faible: {e}")
+
+    def on_stock_movement_changed(self, event):
+        """Met à jour les cartes du tableau de bord après un mouvement"""
+        self.schedule_dashboard_refresh()
+
+    def schedule_dashboard_refresh(self):
+        """Regroupe les événements d'une même écriture en une seule mise à jour des cartes"""
+        if self.dashboard_refresh_pending or not self.stat_labels:
+            return
+        self.dashboard_refresh_pending = True
+        self.parent.after_idle(self.refresh_dashboard_stats)
+
+    def refresh_dashboard_stats(self):
+        """Relit les statistiques agrégées et ne modifie que les cartes qui ont changé"""
+        self.dashboard_refresh_pending = False
+        if not self.stat_labels or not self.is_displayed(self.stat_labels['total_products']):
+            return
+
+        try:
+            stats = self.product_controller.get_dashboard_stats()
+        except Exception as e:
+            print(f"Erreur lors de l'actualisation du tableau de bord: {e}")
+            return
+
+        for key, label in self.stat_labels.items():
+            if stats.get(key) != self.dashboard_stats.get(key):
+                self.dashboard_stats[key] = stats.get(key)
+                label.config(text=self.format_stat(key))
+
+    def on_vendeur_changed(self, event):
+        """Met à jour uniquement les lignes des vendeurs modifiés"""
+        if not self.is_displayed(self.vendeurs_tree):
+            return
+
+        if event.action == REFRESHED:
+            self.refresh_vendeurs_list()
+            return
+
+        for vendeur_id in event.ids:
+            iid = str(vendeur_id)
+            if event.action == CREATED:
+                self.vendeurs_tree.insert('', 'end', iid=iid, values=self.vendeur_row_values(event.fields))
+            elif event.action == UPDATED and self.vendeurs_tree.exists(iid):
+                if 'name' in event.fields:
+                    self.vendeurs_tree.set(iid, 'Nom', event.fields['name'])
+                if 'telephone' in event.fields:
+                    self.vendeurs_tree.set(iid, 'Téléphone', event.fields['telephone'] or 'N/A')
+                if 'is_active' in event.fields:
+                    active = event.fields['is_active']
+                    self.vendeurs_tree.set(iid, 'Statut', "✅ Actif" if active else "❌ Inactif")
+                    self.vendeurs_tree.item(iid, tags=[] if active else ['inactive'])
+
+    def on_category_changed(self, event):
+        """Recharge la liste des produits lorsqu'une catégorie est renommée"""
+        if event.action in (UPDATED, REFRESHED) and self.is_displayed(self.products_tree):
+            self.refresh_products_list()
+
+    def start_backup(self):
+        """Lance une sauvegarde en arrière-plan"""
+        if self.backup_job is not None and not self.backup_job.done:
+            return
+
+        from gestion.database.backup_service import BackupService
+        db_path = self.product_controller.product_model.db.db_path
+        self.backup_service = BackupService(db_path)
+        self.backup_job = self.backup_service.backup_async()
+        self.backup_btn.config(state='disabled')
+        self.poll_backup()
+
+    def poll_backup(self):
+        """Affiche l'avancement de la sauvegarde sans bloquer la boucle Tk"""
+        job = self.backup_job
+        if not job.done:
+            self.backup_btn.config(text=f"💾 {job.progress}%")
+            self.parent.after(200, self.poll_backup)
+            return
+
+        self.backup_btn.config(text="💾 Sauvegarder", state='normal')
+        if job.error:
+            messagebox.showerror("Erreur", str(job.error))
+        else:
+            self.backup_service.cleanup()
+            messagebox.showinfo("Succès", f"Sauvegarde vérifiée: {job.backup_path}")
+
     def logout(self):
         """Déconnecte l'utilisateur"""
         if messagebox.askyesno("Confirmation", "Voulez-vous vraiment vous déconnecter ?"):
             self.auth_controller.logout()
+            self.unsubscribe_from_changes()
             self.parent.quit()
\ No newline at end of file
@@ -29,7 +29,7 @@ class ProductDialog:
         """Configure la boîte de dialogue"""
         title = "Modifier le produit" if self.product_data else "Nouveau produit"
         self.dialog.title(title)
-        self.dialog.geometry("500x600")
+        self.dialog.geometry("500x700")
         self.dialog.resizable(False, False)
         self.dialog.configure(bg='#f0f0f0')
 
@@ -39,8 +39,8 @@ class ProductDialog:
 
         self.dialog.update_idletasks()
         x = (self.dialog.winfo_screenwidth() // 2) - (500 // 2)
-        y = (self.dialog.winfo_screenheight() // 2) - (600 // 2)
-        self.dialog.geometry(f"500x600+{x}+{y}")
+        y = (self.dialog.winfo_screenheight() // 2) - (700 // 2)
+        self.dialog.geometry(f"500x700+{x}+{y}")
 
     def create_widgets(self):
         """Crée l'interface utilisateur"""
@@ -147,6 +147,29 @@ class ProductDialog:
         self.min_stock_entry.grid(row=8, column=1, sticky='ew', pady=(0, 15), ipady=8)
         self.min_stock_entry.insert(0, "5")
 
+        # Codes pour la lecture au scanner (facultatifs)
+        self.create_field(fields_frame, "SKU", 9)
+        self.sku_entry = tk.Entry(
+            fields_frame,
+            font=('Segoe UI', 10),
+            relief='flat',
+            bd=5,
+            highlightthickness=1,
+            highlightcolor='#3498db'
+        )
+        self.sku_entry.grid(row=10, column=0, sticky='ew', pady=(0, 15), padx=(0, 10), ipady=8)
+
+        self.create_field(fields_frame, "Code-barres", 9, column=1)
+        self.barcode_entry = tk.Entry(
+            fields_frame,
+            font=('Segoe UI', 10),
+            relief='flat',
+            bd=5,
+            highlightthickness=1,
+            highlightcolor='#3498db'
+        )
+        self.barcode_entry.grid(row=10, column=1, sticky='ew', pady=(0, 15), ipady=8)
+
         # Configuration des colonnes
         fields_frame.grid_columnconfigure(0, weight=1)
         fields_frame.grid_columnconfigure(1, weight=1)
@@ -255,6 +278,8 @@ class ProductDialog:
             self.selling_price_entry.insert(0, str(self.product_data['selling_price']))
             self.min_stock_entry.delete(0, 'end')
             self.min_stock_entry.insert(0, str(self.product_data['min_stock_level']))
+            self.sku_entry.insert(0, self.product_data['sku'] or '')
+            self.barcode_entry.insert(0, self.product_data['barcode'] or '')
 
             # Sélectionner la catégorie
             if self.product_data['category_name']:
@@ -278,6 +303,8 @@ class ProductDialog:
             selling_price = self.selling_price_entry.get().strip()
             initial_quantity = self.initial_quantity_entry.get().strip() or "0"
             min_stock_level = self.min_stock_entry.get().strip() or "5"
+            sku = self.sku_entry.get().strip()
+            barcode = self.barcode_entry.get().strip()
 
             # Validation de base
             if not all([name, category_name, purchase_price, selling_price]):
@@ -297,11 +324,11 @@ class ProductDialog:
             if self.product_data:  # Modification
                 success, message = self.product_controller.update_product(
                     self.product_data['products_id'],
-                    name, category_id, purchase_price, selling_price, min_stock_level
+                    name, category_id, purchase_price, selling_price, min_stock_level, sku, barcode
                 )
             else:  # Création
                 success, message = self.product_controller.create_product(
-                    name, category_id, purchase_price, selling_price, initial_quantity, min_stock_level
+                    name, category_id, purchase_price, selling_price, initial_quantity, min_stock_level, sku, barcode
                 )
 
             if success:
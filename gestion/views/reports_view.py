@@ -5,11 +5,31 @@ Interface de génération de rapports et statistiques
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from datetime import datetime, timedelta
+from datetime import datetime
 import csv
 import os
+import threading
 from gestion.controllers.product_controller import ProductController
 from gestion.models.vendeur_model import VendeurModel
+from gestion.utils.exporters import UNCOMPRESSED_FORMATS
+from gestion.utils.helpers import get_date_range_options
+
+# Libellé affiché -> format d'export
+EXPORT_FORMATS = {
+    "CSV": 'csv',
+    "Excel": 'xlsx',
+    "Texte": 'txt',
+    "JSON": 'json',
+    "JSON Lines": 'ndjson',
+    "HTML": 'html'
+}
+
+# Libellé affiché -> compression du fichier exporté (formats texte uniquement)
+EXPORT_COMPRESSIONS = {
+    "Aucune": None,
+    "gzip (.gz)": 'gzip',
+    "xz (.xz)": 'xz'
+}
 
 class ReportsView:
     def __init__(self, parent_frame, user_data):
@@ -64,19 +84,29 @@ class ReportsView:
                 'title': '📊 Rapport de Ventes',
                 'desc': 'Analyse des ventes par période',
                 'icon': '📈',
-                'action': self.generate_sales_report
+                'action': self.generate_sales_report,
+                'report': 'sales'
             },
             {
                 'title': '👥 Rapport par Vendeur',
                 'desc': 'Performance de chaque vendeur',
                 'icon': '🏆',
-                'action': self.generate_vendeur_report
+                'action': self.generate_vendeur_report,
+                'report': 'vendeurs'
             },
             {
                 'title': '📦 Rapport de Stock',
                 'desc': 'État actuel du stock',
                 'icon': '📋',
-                'action': self.generate_stock_report
+                'action': self.generate_stock_report,
+                'report': 'stock'
+            },
+            {
+                'title': '🏷️ Valorisation du Stock',
+                'desc': 'Stock et valeur en fin de période',
+                'icon': '📅',
+                'action': self.generate_valuation_report,
+                'report': 'valuation'
             },
             {
                 'title': '💰 Rapport Financier',
@@ -94,7 +124,8 @@ class ReportsView:
                 'title': '⚠️ Alertes Stock',
                 'desc': 'Produits en rupture ou faible stock',
                 'icon': '🚨',
-                'action': self.generate_alerts_report
+                'action': self.generate_alerts_report,
+                'report': 'alerts'
             }
         ]
 
@@ -136,7 +167,7 @@ class ReportsView:
 
         # Lier le clic
         def on_click(event, action=report_data['action']):
-            self.select_report_type(action, report_data['title'])
+            self.select_report_type(action, report_data['title'], report_data.get('report'))
 
         for widget in [card, inner_frame, header_frame, icon_title, desc_label]:
             widget.bind('<Button-1>', on_click)
@@ -200,6 +231,7 @@ class ReportsView:
         ]
         self.period_combo.current(2)  # 7 derniers jours par défaut
         self.period_combo.pack(side='left')
+        self.period_combo.bind('<<ComboboxSelected>>', lambda event: self.show_preview())
 
         # Format de sortie
         format_frame = tk.Frame(params_frame, bg='#ecf0f1')
@@ -220,9 +252,29 @@ class ReportsView:
             state='readonly',
             width=15
         )
-        self.format_combo['values'] = ["CSV", "Texte", "Affichage"]
+        self.format_combo['values'] = list(EXPORT_FORMATS)
         self.format_combo.current(0)  # CSV par défaut
         self.format_combo.pack(side='left')
+        self.format_combo.bind('<<ComboboxSelected>>', self.update_compression_state)
+
+        compression_label = tk.Label(
+            format_frame,
+            text="Compression :",
+            font=('Segoe UI', 9),
+            fg='#34495e',
+            bg='#ecf0f1'
+        )
+        compression_label.pack(side='left', padx=(15, 10))
+
+        self.compression_combo = ttk.Combobox(
+            format_frame,
+            font=('Segoe UI', 9),
+            state='readonly',
+            width=12
+        )
+        self.compression_combo['values'] = list(EXPORT_COMPRESSIONS)
+        self.compression_combo.current(0)  # Pas de compression par défaut
+        self.compression_combo.pack(side='left')
 
         # Boutons d'action
         actions_frame = tk.Frame(right_frame, bg='#ecf0f1')
@@ -261,6 +313,23 @@ class ReportsView:
         )
         preview_btn.pack(side='left')
 
+        # Bouton Lot de clôture (rapports générés en parallèle, hors de la boucle Tk)
+        self.batch_btn = tk.Button(
+            actions_frame,
+            text="📦 Clôture (lot)",
+            command=self.generate_closing_batch,
+            font=('Segoe UI', 10),
+            fg='#8e44ad',
+            bg='white',
+            relief='solid',
+            bd=2,
+            padx=15,
+            pady=8,
+            cursor='hand2'
+        )
+        self.batch_btn.pack(side='left', padx=(10, 0))
+        self.report_batch = None
+
         # Zone d'aperçu
         preview_frame = tk.LabelFrame(
             right_frame,
@@ -297,91 +366,103 @@ class ReportsView:
         # Variables pour le rapport sélectionné
         self.selected_report = None
         self.selected_report_title = ""
+        self.selected_report_kind = None
+        # Numéro du dernier aperçu demandé: les résultats des précédents sont ignorés
+        self.preview_request = 0
 
-    def select_report_type(self, action, title):
+    def select_report_type(self, action, title, report=None):
         """Sélectionne un type de rapport"""
         self.selected_report = action
         self.selected_report_title = title
+        self.selected_report_kind = report
         self.generate_btn.config(state='normal')
 
         # Mettre à jour l'aperçu
         self.show_preview()
 
     def show_preview(self):
-        """Affiche un aperçu du rapport"""
+        """Affiche l'aperçu du rapport sélectionné, lu dans un thread pour ne pas bloquer l'interface"""
+        self.preview_request += 1
         if not self.selected_report:
-            self.preview_text.delete(1.0, 'end')
-            self.preview_text.insert(1.0, "Sélectionnez un type de rapport pour voir l'aperçu...")
+            self.set_preview_text("Sélectionnez un type de rapport pour voir l'aperçu...")
             return
 
-        try:
-            # Générer un aperçu limité
-            preview_data = self.generate_preview_data()
+        period = self.get_selected_period()
+        header = self.preview_header(period)
+        if self.selected_report_kind is None:
+            self.set_preview_text(header + "Aperçu non disponible pour ce rapport.")
+            return
 
-            # Afficher dans la zone d'aperçu
-            self.preview_text.delete(1.0, 'end')
-            self.preview_text.insert(1.0, preview_data)
+        self.set_preview_text(header + "⏳ Chargement de l'aperçu...")
+        from gestion.utils.exporters import build_report_preview
 
-        except Exception as e:
-            self.preview_text.delete(1.0, 'end')
-            self.preview_text.insert(1.0, f"Erreur lors de la génération de l'aperçu:\n{str(e)}")
+        report = self.selected_report_kind
+        db_path = self.product_controller.product_model.db.db_path
+        result = {}
 
-    def generate_preview_data(self):
-        """Génère des données d'aperçu pour le rapport sélectionné"""
-        period = self.get_selected_period()
+        def load():
+            try:
+                result['preview'] = build_report_preview(report, period, db_path)
+            except Exception as e:
+                result['error'] = e
+
+        thread = threading.Thread(target=load, name="report-preview", daemon=True)
+        thread.start()
+        self.poll_preview(self.preview_request, thread, result, header)
+
+    def poll_preview(self, request, thread, result, header):
+        """Affiche l'aperçu une fois lu (consulté depuis la boucle Tk)"""
+        if request != self.preview_request or not self.preview_text.winfo_exists():
+            # Autre rapport ou période choisi entre-temps, ou vue fermée
+            return
+        if thread.is_alive():
+            self.parent_frame.after(50, self.poll_preview, request, thread, result, header)
+            return
+
+        if 'error' in result:
+            self.set_preview_text(header + f"Erreur lors de la génération de l'aperçu:\n{result['error']}")
+        else:
+            self.set_preview_text(header + self.format_preview(result['preview']))
+
+    def set_preview_text(self, text):
+        """Remplace le contenu de la zone d'aperçu"""
+        self.preview_text.delete(1.0, 'end')
+        self.preview_text.insert(1.0, text)
 
+    def preview_header(self, period):
+        """En-tête de l'aperçu"""
         preview = f"=== APERÇU DU RAPPORT ===\n"
         preview += f"Type: {self.selected_report_title}\n"
         preview += f"Période: {period[0]} à {period[1]}\n"
         preview += f"Généré le: {datetime.now().strftime('%d/%m/%Y %H:%M')}\n"
         preview += "=" * 50 + "\n\n"
+        return preview
 
-        if "Ventes" in self.selected_report_title:
-            preview += "Date       | Produit           | Vendeur    | Quantité | Total\n"
-            preview += "-" * 60 + "\n"
-            preview += "05/12/2024 | Bière Heineken    | Jean       | 10       | 100,000 Ar\n"
-            preview += "05/12/2024 | Coca-Cola 1.5L    | Marie      | 5        | 25,000 Ar\n"
-            preview += "..." + "\n"
-
-        elif "Vendeur" in self.selected_report_title:
-            preview += "Vendeur    | Nb Ventes | Quantité | CA Total    | Performance\n"
-            preview += "-" * 55 + "\n"
-            preview += "Jean       | 25        | 150      | 500,000 Ar  | Excellent\n"
-            preview += "Marie      | 18        | 95       | 280,000 Ar  | Bon\n"
-            preview += "..." + "\n"
-
-        elif "Stock" in self.selected_report_title:
-            preview += "Produit           | Catégorie | Stock | Stock Min | Statut\n"
-            preview += "-" * 55 + "\n"
-            preview += "Bière Heineken    | Boissons  | 45    | 10        | OK\n"
-            preview += "Coca-Cola 1.5L    | Boissons  | 3     | 5         | FAIBLE\n"
-            preview += "..." + "\n"
-
-        preview += "\n[Aperçu limité - Le rapport complet contiendra toutes les données]"
+    def format_preview(self, preview, max_width=30):
+        """Met en forme l'aperçu: totaux, puis premières lignes en colonnes alignées"""
+        text = ""
+        for label, value in preview['totals']:
+            text += f"{label}: {value}\n"
+        text += "\n"
 
-        return preview
+        if not preview['rows']:
+            return text + "Aucune donnée à afficher."
+
+        cells = [[str(value)[:max_width] for value in row] for row in [preview['headers']] + preview['rows']]
+        widths = [max(len(row[i]) for row in cells) for i in range(len(cells[0]))]
+        lines = [" | ".join(value.ljust(width) for value, width in zip(row, widths)) for row in cells]
+        lines.insert(1, "-" * len(lines[0]))
+        text += "\n".join(lines) + "\n"
+
+        shown = len(preview['rows'])
+        if preview['total_rows'] > shown:
+            text += f"\n[Aperçu: {shown} premières lignes sur {preview['total_rows']} - le rapport complet contiendra toutes les données]"
+        return text
 
     def get_selected_period(self):
-        """Retourne la période sélectionnée"""
-        period_text = self.period_combo.get()
-        today = datetime.now().date()
-
-        if period_text == "Aujourd'hui":
-            return today, today
-        elif period_text == "Hier":
-            yesterday = today - timedelta(days=1)
-            return yesterday, yesterday
-        elif period_text == "7 derniers jours":
-            start = today - timedelta(days=7)
-            return start, today
-        elif period_text == "30 derniers jours":
-            start = today - timedelta(days=30)
-            return start, today
-        elif period_text == "Ce mois":
-            start = today.replace(day=1)
-            return start, today
-        else:
-            return today - timedelta(days=30), today
+        """Retourne la période sélectionnée (30 derniers jours pour la période personnalisée)"""
+        options = get_date_range_options()
+        return options.get(self.period_combo.get(), options["30 derniers jours"])
 
     def generate_selected_report(self):
         """Génère le rapport sélectionné"""
@@ -396,94 +477,65 @@ class ReportsView:
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de la génération du rapport: {str(e)}")
 
+    def get_format_type(self):
+        """Format d'export correspondant au libellé choisi (None si inconnu)"""
+        return EXPORT_FORMATS.get(self.format_combo.get())
+
+    def get_compression(self):
+        """Compression choisie pour le fichier exporté (None: aucune ou format non compressible)"""
+        if self.get_format_type() in UNCOMPRESSED_FORMATS:
+            return None
+        return EXPORT_COMPRESSIONS.get(self.compression_combo.get())
+
+    def update_compression_state(self, event=None):
+        """Désactive le choix de compression pour les formats qui ne se compressent pas (HTML, Excel)"""
+        if self.get_format_type() in UNCOMPRESSED_FORMATS:
+            self.compression_combo.current(0)
+            self.compression_combo.config(state='disabled')
+        else:
+            self.compression_combo.config(state='readonly')
+
     def generate_sales_report(self):
         """Génère le rapport de ventes avec vraies données"""
         try:
             # Récupérer les paramètres de génération
             start_date, end_date = self.get_selected_period()
-            format_type = self.format_combo.get().lower()
+            format_type = self.get_format_type()
 
             # Validation du format
-            if format_type not in ['csv', 'txt', 'json', 'html']:
-                messagebox.showerror("Erreur", "Format non supporté. Choisissez CSV, TXT, JSON ou HTML.")
+            if format_type is None:
+                messagebox.showerror("Erreur", f"Format non supporté. Choisissez {', '.join(EXPORT_FORMATS)}.")
                 return
 
-            # Récupérer les données de ventes réelles
-            all_movements = self.product_controller.get_stock_movements()
-
-            # Filtrer pour ne garder que les ventes (mouvement OUT)
-            sales_data = [movement for movement in all_movements if movement['movement_type'] == 'OUT']
-
-            # Appliquer les filtres de date si spécifiés
-            if start_date and end_date:
-                filtered_sales = []
-                for sale in sales_data:
-                    try:
-                        # Extraire la date du mouvement
-                        sale_date_str = sale['created_at'][:10]  # Format YYYY-MM-DD
-                        from datetime import datetime
-                        sale_date = datetime.strptime(sale_date_str, '%Y-%m-%d').date()
-
-                        # Vérifier si la vente est dans la plage
-                        if start_date <= sale_date <= end_date:
-                            filtered_sales.append(sale)
-                    except:
-                        # En cas d'erreur de parsing de date, inclure la vente
-                        filtered_sales.append(sale)
-
-                sales_data = filtered_sales
+            # Statistiques lues dans le cumul journalier
+            totals = self.product_controller.get_sales_totals(start_date, end_date)
+            total_ca = totals['total_sales']
+            total_quantity = totals['total_quantity']
+            sales_count = totals['total_transactions']
 
             # Vérifier qu'il y a des données à exporter
-            if not sales_data:
+            if not sales_count:
                 messagebox.showwarning("Aucune donnée",
                                      "Aucune vente trouvée pour la période sélectionnée.")
                 return
 
-            # Préparer les données pour l'export
-            formatted_sales_data = []
-            total_ca = 0
-            total_quantity = 0
-
-            for sale in sales_data:
-                # Calculer le total pour les statistiques
-                total_ca += float(sale.get('total_amount', 0))
-                total_quantity += int(sale.get('quantity', 0))
-
-                # Formater les données pour l'export
-                formatted_sale = {
-                    'created_at': sale.get('created_at', ''),
-                    'product_name': sale.get('product_name', 'N/A'),
-                    'vendeur_name': sale.get('vendeur_name', 'N/A'),
-                    'quantity': sale.get('quantity', 0),
-                    'unit_price': sale.get('unit_price', 0),
-                    'total_amount': sale.get('total_amount', 0),
-                    'notes': sale.get('notes', '')
-                }
-                formatted_sales_data.append(formatted_sale)
-
-            # Utiliser l'exporteur spécialisé
-            from gestion.utils.exporters import sales_exporter
-
             # Générer un nom de fichier avec timestamp
             from datetime import datetime
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             base_filename = f"rapport_ventes_{timestamp}"
 
-            # Exporter selon le format choisi
-            filename = sales_exporter.export_sales_report(
-                formatted_sales_data,
-                format_type,
-                base_filename
-            )
+            # Les ventes sont lues sur un curseur et écrites au fil de l'eau (mémoire constante)
+            filename, stats = self.export_report('sales', format_type, (start_date, end_date), base_filename)
+            origin = " (repris du cache: données inchangées)" if stats.get('cached') else ""
 
             # Afficher les statistiques dans un message de succès
-            avg_sale = total_ca / len(sales_data) if sales_data else 0
-            success_message = f"""📊 Rapport généré avec succès !
+            avg_sale = total_ca / sales_count if sales_count else 0
+            success_message = f"""📊 Rapport généré avec succès !{origin}
     
     📁 Fichier: {filename}
     📅 Période: {start_date} au {end_date}
     📈 Statistiques:
-       • Nombre de ventes: {len(sales_data)}
+       • Nombre de ventes: {sales_count}
        • Quantité totale: {total_quantity}
        • CA total: {total_ca:,.0f} Ar
        • Vente moyenne: {avg_sale:,.0f} Ar"""
@@ -522,12 +574,60 @@ class ReportsView:
                                f"Erreur lors de la génération du rapport:\n{str(e)}\n\n"
                                f"Vérifiez que tous les fichiers sont présents.")
 
+    def export_report(self, report, format_type, period, filename):
+        """Génère un rapport (repris du cache des rapports si ses données n'ont pas changé)"""
+        from gestion.utils.exporters import ReportJob, run_report_job
+
+        job = ReportJob(report, format_type, period, filename, self.get_compression())
+        return run_report_job(job, self.product_controller.product_model.db.db_path)
+
+    def generate_closing_batch(self):
+        """Génère en parallèle les rapports de clôture (ventes, vendeurs, stock, alertes)"""
+        if self.report_batch is not None and not self.report_batch.done:
+            return
+
+        format_type = self.get_format_type()
+        if format_type is None:
+            messagebox.showerror("Erreur", f"Format non supporté. Choisissez {', '.join(EXPORT_FORMATS)}.")
+            return
+
+        try:
+            from gestion.utils.exporters import ReportBatch, ReportJob
+
+            period = self.get_selected_period()
+            jobs = [
+                ReportJob(report, format_type, period, compression=self.get_compression())
+                for report in ('sales', 'vendeurs', 'stock', 'alerts')
+            ]
+            db_path = self.product_controller.product_model.db.db_path
+            self.report_batch = ReportBatch(jobs, db_path).run_async()
+            self.batch_btn.config(state='disabled')
+            self.poll_closing_batch()
+
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Erreur lors du lancement du lot: {str(e)}")
+
+    def poll_closing_batch(self):
+        """Affiche l'avancement du lot sans bloquer la boucle Tk"""
+        batch = self.report_batch
+        if not batch.done:
+            self.batch_btn.config(text=f"📦 {batch.completed}/{batch.total}")
+            self.parent_frame.after(300, self.poll_closing_batch)
+            return
+
+        self.batch_btn.config(text="📦 Clôture (lot)", state='normal')
+        lines = [f"✅ {job.output}" if not job.failed else f"❌ {job.report}: {job.error}" for job in batch.jobs]
+        if batch.failures:
+            messagebox.showwarning("Lot terminé avec erreurs", "\n".join(lines))
+        else:
+            messagebox.showinfo("Succès", "Rapports de clôture générés:\n" + "\n".join(lines))
+
     def generate_vendeur_report(self):
         """Génère le rapport de performance des vendeurs"""
         try:
             # Récupérer les paramètres
             start_date, end_date = self.get_selected_period()
-            format_type = self.format_combo.get().lower()
+            format_type = self.get_format_type()
 
             # Récupérer les statistiques des vendeurs
             vendor_stats = self.vendeur_model.get_vendeur_sales_stats(
@@ -541,16 +641,11 @@ class ReportsView:
                                      "Aucune donnée de vendeur trouvée pour la période.")
                 return
 
-            # Utiliser l'exporteur
-            from gestion.utils.exporters import sales_exporter
             from datetime import datetime
 
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = sales_exporter.export_vendor_performance(
-                vendor_stats,
-                format_type,
-                f"performance_vendeurs_{timestamp}"
-            )
+            filename, _ = self.export_report('vendeurs', format_type, (start_date, end_date),
+                                             f"performance_vendeurs_{timestamp}")
 
             messagebox.showinfo("Succès", f"Rapport vendeurs généré: {filename}")
 
@@ -572,25 +667,17 @@ class ReportsView:
     def generate_stock_report(self):
         """Génère le rapport de stock"""
         try:
-            format_type = self.format_combo.get().lower()
-
-            # Récupérer tous les produits
-            products_data = self.product_controller.get_all_products()
+            format_type = self.get_format_type()
 
-            if not products_data:
+            # Nombre de produits lu dans les statistiques en cache du tableau de bord
+            if not self.product_controller.get_dashboard_stats()['total_products']:
                 messagebox.showwarning("Aucune donnée", "Aucun produit trouvé.")
                 return
 
-            # Utiliser l'exporteur d'inventaire
-            from gestion.utils.exporters import inventory_exporter
             from datetime import datetime
 
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = inventory_exporter.export_stock_report(
-                products_data,
-                format_type,
-                f"rapport_stock_{timestamp}"
-            )
+            filename, _ = self.export_report('stock', format_type, None, f"rapport_stock_{timestamp}")
 
             messagebox.showinfo("Succès", f"Rapport de stock généré: {filename}")
 
@@ -609,33 +696,63 @@ class ReportsView:
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de la génération: {str(e)}")
 
+    def generate_valuation_report(self):
+        """Génère la valorisation du stock au dernier jour de la période"""
+        try:
+            _, end_date = self.get_selected_period()
+            format_type = self.get_format_type()
+
+            from datetime import datetime
+
+            # Valorisation au dernier jour de la période (repris du cache si le stock n'a pas changé)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename, stats = self.export_report('valuation', format_type, (None, end_date),
+                                                 f"valorisation_stock_{timestamp}")
+
+            if not stats['products']:
+                messagebox.showwarning("Aucune donnée", "Aucun produit en stock à cette date.")
+                return
+
+            messagebox.showinfo("Succès",
+                              f"Valorisation générée: {filename}\n"
+                              f"📅 Au {end_date}: {stats['total_value']:,.0f} Ar")
+
+            # Ouvrir le fichier
+            try:
+                import os, platform
+                if platform.system() == "Windows":
+                    os.startfile(filename)
+                elif platform.system() == "Darwin":
+                    os.system(f"open '{filename}'")
+                else:
+                    os.system(f"xdg-open '{filename}'")
+            except:
+                pass
+
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Erreur lors de la génération: {str(e)}")
+
     def generate_alerts_report(self):
         """Génère le rapport d'alertes stock faible"""
         try:
-            format_type = self.format_combo.get().lower()
+            format_type = self.get_format_type()
 
-            # Récupérer les produits en stock faible
-            low_stock_products = self.product_controller.get_low_stock_products()
+            # Nombre de produits en stock faible lu dans les statistiques du tableau de bord
+            low_stock_count = self.product_controller.get_dashboard_stats()['low_stock_count']
 
-            if not low_stock_products:
+            if not low_stock_count:
                 messagebox.showinfo("Information",
                                   "Aucun produit en stock faible trouvé. Excellent !")
                 return
 
-            # Utiliser l'exporteur d'inventaire
-            from gestion.utils.exporters import inventory_exporter
             from datetime import datetime
 
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = inventory_exporter.export_low_stock_alert(
-                low_stock_products,
-                format_type,
-                f"alerte_stock_{timestamp}"
-            )
+            filename, _ = self.export_report('alerts', format_type, None, f"alerte_stock_{timestamp}")
 
             messagebox.showinfo("Succès",
                               f"Rapport d'alertes généré: {filename}\n"
-                              f"⚠️ {len(low_stock_products)} produit(s) en stock faible !")
+                              f"⚠️ {low_stock_count} produit(s) en stock faible !")
 
             # Ouvrir le fichier
             try:
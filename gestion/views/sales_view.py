@@ -8,6 +8,7 @@ from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
 from gestion.controllers.product_controller import ProductController
 from gestion.models.vendeur_model import VendeurModel
+from gestion.utils.events import event_bus, STOCK_MOVEMENT, VENDEUR, CREATED, REFRESHED
 
 class SalesView:
     def __init__(self, parent_frame, user_data):
@@ -20,11 +21,21 @@ class SalesView:
         # Initialiser les attributs à None pour éviter les erreurs
         self.summary_tree = None
         self.sales_tree = None
+        self.current_sales = []
+        self.search_var = None
+        self.search_job = None
 
         self.create_sales_interface()
         # Charger les données seulement après que l'interface soit créée
         self.load_sales_data()
 
+        # Mises à jour incrémentales tant que la vue est affichée
+        self.unsubscribers = [
+            event_bus.subscribe(STOCK_MOVEMENT, self.on_stock_movement_changed),
+            event_bus.subscribe(VENDEUR, self.on_vendeur_changed)
+        ]
+        self.parent_frame.bind('<Destroy>', self.on_destroy, add='+')
+
     def create_sales_interface(self):
         """Crée l'interface de gestion des ventes"""
         # Titre
@@ -155,6 +166,51 @@ class SalesView:
         )
         refresh_btn.pack(side='left')
 
+        # Deuxième ligne: recherche plein texte (produit, catégorie ou notes)
+        row2_frame = tk.Frame(inner_frame, bg='#ecf0f1')
+        row2_frame.pack(fill='x')
+
+        search_label = tk.Label(
+            row2_frame,
+            text="Recherche :",
+            font=('Segoe UI', 9),
+            fg='#34495e',
+            bg='#ecf0f1'
+        )
+        search_label.pack(side='left', padx=(0, 10))
+
+        self.search_var = tk.StringVar()
+        search_entry = tk.Entry(
+            row2_frame,
+            textvariable=self.search_var,
+            font=('Segoe UI', 9),
+            relief='solid',
+            bd=1,
+            width=40
+        )
+        search_entry.pack(side='left', ipady=3)
+        self.search_var.trace_add('write', lambda *args: self.schedule_search())
+
+        # Lecture scanner (douchette en mode clavier: code puis Entrée)
+        scan_label = tk.Label(
+            row2_frame,
+            text="Scanner :",
+            font=('Segoe UI', 9),
+            fg='#34495e',
+            bg='#ecf0f1'
+        )
+        scan_label.pack(side='left', padx=(20, 10))
+
+        self.scan_entry = tk.Entry(
+            row2_frame,
+            font=('Segoe UI', 9),
+            relief='solid',
+            bd=1,
+            width=20
+        )
+        self.scan_entry.pack(side='left', ipady=3)
+        self.scan_entry.bind('<Return>', self.on_scan)
+
         # Lier les événements de changement
         self.date_filter.bind('<<ComboboxSelected>>', lambda e: self.load_sales_data())
         self.vendeur_filter.bind('<<ComboboxSelected>>', lambda e: self.load_sales_data())
@@ -366,8 +422,12 @@ class SalesView:
             vendeur_id = self.get_selected_vendeur_id()
             product_name = self.get_selected_product_name()
 
-            # Récupérer les mouvements de sortie (ventes)
-            movements = self.product_controller.get_stock_movements()
+            # Récupérer les mouvements de sortie (ventes), via l'index plein texte si une recherche est saisie
+            search_text = self.get_search_text()
+            if search_text:
+                movements = self.product_controller.search_sales(search_text)
+            else:
+                movements = self.product_controller.get_stock_movements()
 
             # Filtrer les ventes seulement
             sales = [m for m in movements if m['movement_type'] == 'OUT']
@@ -376,6 +436,7 @@ class SalesView:
             filtered_sales = self.apply_filters(sales, start_date, end_date, vendeur_id, product_name)
 
             # Mettre à jour l'affichage
+            self.current_sales = list(filtered_sales)
             self.update_sales_display(filtered_sales)
             self.update_products_summary(filtered_sales)
             self.calculate_and_display_stats(filtered_sales)
@@ -384,6 +445,42 @@ class SalesView:
             messagebox.showerror("Erreur", f"Erreur lors du chargement des ventes: {str(e)}")
             print(f"Erreur détaillée: {e}")  # Pour le débogage
 
+    def on_scan(self, event=None):
+        """Ouvre la vente du produit correspondant au code scanné"""
+        code = self.scan_entry.get()
+        self.scan_entry.delete(0, 'end')
+        try:
+            product = self.product_controller.lookup_by_code(code)
+        except Exception as e:
+            messagebox.showerror("Erreur", str(e))
+            return
+
+        if not product:
+            if code.strip():
+                messagebox.showwarning("Attention", f"Aucun produit pour le code {code.strip()}")
+            return
+
+        from gestion.views.stock_dialog import StockDialog
+        StockDialog(self.parent_frame.winfo_toplevel(), product['products_id'], self.user_data, 'OUT')
+
+    def get_search_text(self):
+        """Retourne le texte de recherche saisi"""
+        if self.search_var is None:
+            return ''
+        return self.search_var.get().strip()
+
+    def schedule_search(self):
+        """Relance le chargement 300 ms après la dernière frappe"""
+        if self.search_job is not None:
+            self.parent_frame.after_cancel(self.search_job)
+        self.search_job = self.parent_frame.after(300, self.run_search)
+
+    def run_search(self):
+        """Exécute la recherche différée"""
+        self.search_job = None
+        if self.sales_tree is not None and self.sales_tree.winfo_exists():
+            self.load_sales_data()
+
     def apply_filters(self, sales, start_date, end_date, vendeur_id, product_name):
         """Applique les filtres aux ventes"""
         filtered = sales
@@ -601,6 +698,69 @@ class SalesView:
 
         self.update_stats_display(total_sales, total_quantity, total_amount, avg_sale)
 
+    def on_destroy(self, event):
+        """Désabonne la vue lorsque son cadre est détruit"""
+        if event.widget is self.parent_frame:
+            if self.search_job is not None:
+                self.parent_frame.after_cancel(self.search_job)
+                self.search_job = None
+            for unsubscribe in self.unsubscribers:
+                unsubscribe()
+            self.unsubscribers = []
+
+    def on_stock_movement_changed(self, event):
+        """Ajoute une nouvelle vente à la liste sans tout recharger"""
+        if self.sales_tree is None or not self.sales_tree.winfo_exists():
+            return
+
+        if event.action == REFRESHED:
+            # Ventes enregistrées sur un autre poste
+            self.load_sales_data()
+            return
+
+        if event.action != CREATED or event.fields.get('movement_type') != 'OUT':
+            return
+
+        if self.get_search_text():
+            # Liste filtrée par la recherche: laisser l'index décider
+            self.load_sales_data()
+            return
+
+        sale = event.fields
+        start_date, end_date = self.get_date_range()
+        if not self.apply_filters([sale], start_date, end_date,
+                                  self.get_selected_vendeur_id(), self.get_selected_product_name()):
+            return
+
+        self.current_sales.insert(0, sale)
+        self.sales_tree.insert('', 0, values=(
+            sale['created_at'][:10] if sale['created_at'] else '',
+            sale['product_name'],
+            sale['vendeur_name'] or 'N/A',
+            sale['quantity'],
+            f"{sale['unit_price']:,.0f} Ar",
+            f"{sale['total_amount']:,.0f} Ar"
+        ))
+
+        # Premier achat de ce produit: l'ajouter au filtre
+        product_values = list(self.product_filter['values'])
+        if sale['product_name'] not in product_values:
+            self.product_filter['values'] = [product_values[0]] + sorted(product_values[1:] + [sale['product_name']])
+
+        # Le résumé et les statistiques sont recalculés en mémoire
+        self.update_products_summary(self.current_sales)
+        self.calculate_and_display_stats(self.current_sales)
+
+    def on_vendeur_changed(self, event):
+        """Recharge la liste des vendeurs du filtre en conservant la sélection"""
+        if not self.vendeur_filter.winfo_exists():
+            return
+
+        selected = self.vendeur_filter.get()
+        self.load_vendeurs_filter()
+        if selected in self.vendeur_filter['values']:
+            self.vendeur_filter.set(selected)
+
     def update_stats_display(self, total_sales, total_quantity, total_amount, avg_sale):
         """Met à jour l'affichage des statistiques"""
         stats_data = [